@@ -54,11 +54,38 @@ bool pidAktiv = true; // PID startet standardmäßig aktiv
 unsigned long lastPlotterMillis = 0; // Für non-blocking Plotter-Ausgabe
 const long plotterInterval = 1000;    // Sende Daten an Plotter jede Sekunde
 
+// ================================================================
+// 🔹 Binäre Telemetrie (optional, Standard bleibt ASCII für den Serial Plotter)
+// ================================================================
+// 'b' schaltet auf binäre Frames mit 115200 Baud um (alle 10 ms),
+// 'a' zurück auf ASCII mit 9600 Baud. Host-Decoder: incubator/telemetry.py
+const long asciiBaud = 9600;
+const long binaryBaud = 115200;
+const unsigned long binaryIntervalMicros = 10000; // 100 Frames pro Sekunde
+bool binaryTelemetry = false;
+uint16_t telemetrySeq = 0;           // Lücken in der Folge = verlorene Frames
+unsigned long lastFrameMicros = 0;
+uint16_t lastAdc = 0;                // Gemittelter Roh-ADC-Wert der letzten Messung
+
+// 26 Byte, Little Endian (AVR und ARM)
+struct __attribute__((packed)) TelemetryFrame {
+  uint8_t sync[2];       // 0xA5 0x5A
+  uint16_t seq;
+  uint32_t timeMicros;   // micros() beim Senden
+  uint16_t adc;
+  float temperature;
+  float setpoint;
+  float output;          // PID-Output
+  uint8_t pwm;           // tatsächlich gesetzter PWM-Wert
+  uint8_t mode;          // 0 = PID aus, 1 = PID aktiv
+  uint16_t checksum;     // Fletcher-16 über seq .. mode
+};
+
 // ================================================================
 //                           SETUP
 // ================================================================
 void setup() {
-  Serial.begin(9600);
+  Serial.begin(asciiBaud);
   pinMode(mosfetPin, OUTPUT);
   digitalWrite(mosfetPin, LOW); // Sicherstellen, dass Heizung anfangs aus ist
 
@@ -88,7 +115,7 @@ void loop() {
       myPID.SetMode(MANUAL);
       finalPWM = 0;
       analogWrite(mosfetPin, finalPWM);
-      Serial.println(F("PID deaktiviert"));
+      if (!binaryTelemetry) Serial.println(F("PID deaktiviert"));
     } else if (eingabe == '1') {
       pidAktiv = true;
       // WICHTIG: Internen Zustand des PID zurücksetzen, wenn er wieder aktiviert wird?
@@ -96,7 +123,17 @@ void loop() {
       // aber explizit kann es manchmal helfen, wenn unerwartetes Verhalten auftritt.
       // myPID.Initialize(); // Optional, falls nötig
       myPID.SetMode(AUTOMATIC);
-      Serial.println(F("PID aktiviert"));
+      if (!binaryTelemetry) Serial.println(F("PID aktiviert"));
+    } else if (eingabe == 'b' && !binaryTelemetry) {
+      Serial.flush();                // ausstehende Textausgabe noch senden
+      Serial.end();
+      Serial.begin(binaryBaud);
+      binaryTelemetry = true;
+    } else if (eingabe == 'a' && binaryTelemetry) {
+      Serial.flush();
+      Serial.end();
+      Serial.begin(asciiBaud);
+      binaryTelemetry = false;
     }
   }
 
@@ -123,8 +160,14 @@ void loop() {
   // --- 4. Finalen PWM-Wert an MOSFET senden ---
   analogWrite(mosfetPin, finalPWM);
 
-  // --- 5. Serielle Ausgabe für Plotter (non-blocking) ---
-  if (currentMillis - lastPlotterMillis >= plotterInterval) {
+  // --- 5. Serielle Ausgabe: binäre Frames oder ASCII für Plotter (non-blocking) ---
+  if (binaryTelemetry) {
+    unsigned long nowMicros = micros();
+    if (nowMicros - lastFrameMicros >= binaryIntervalMicros) {
+      lastFrameMicros = nowMicros;
+      sendTelemetryFrame(nowMicros);
+    }
+  } else if (currentMillis - lastPlotterMillis >= plotterInterval) {
     lastPlotterMillis = currentMillis; // Zeit für nächste Ausgabe merken
 
     Serial.print(Input, 2);      // Ist-Temperatur (mit 2 Nachkommastellen)
@@ -139,6 +182,35 @@ void loop() {
 
 } // Ende loop()
 
+// ================================================================
+// Binäre Telemetrie: ein Frame senden
+// ================================================================
+uint16_t fletcher16(const uint8_t *data, size_t len) {
+  uint16_t sum1 = 0, sum2 = 0;
+  for (size_t i = 0; i < len; i++) {
+    sum1 = (sum1 + data[i]) % 255;
+    sum2 = (sum2 + sum1) % 255;
+  }
+  return (sum2 << 8) | sum1;
+}
+
+void sendTelemetryFrame(unsigned long nowMicros) {
+  TelemetryFrame frame;
+  frame.sync[0] = 0xA5;
+  frame.sync[1] = 0x5A;
+  frame.seq = telemetrySeq++;
+  frame.timeMicros = nowMicros;
+  frame.adc = lastAdc;
+  frame.temperature = (float)Input;
+  frame.setpoint = (float)Setpoint;
+  frame.output = (float)Output;
+  frame.pwm = (uint8_t)finalPWM;
+  frame.mode = pidAktiv ? 1 : 0;
+  // Prüfsumme über alles zwischen Sync-Bytes und Prüfsumme
+  frame.checksum = fletcher16((const uint8_t *)&frame + 2, sizeof(frame) - 4);
+  Serial.write((const uint8_t *)&frame, sizeof(frame));
+}
+
 // ================================================================
 // Funktion zur Temperaturberechnung aus dem NTC-Widerstand
 // (Verwendet Beta-Formel der Steinhart-Hart Gleichung)
@@ -152,6 +224,7 @@ double getTemperature() {
     delayMicroseconds(100); // Kleine Pause zwischen den Messungen
   }
   float ain = totalAin / numReadings;
+  lastAdc = (uint16_t)(ain + 0.5); // Rohwert für die binäre Telemetrie
 
   // Prüfe auf unsinnige ADC-Werte (Kurzschluss/Unterbrechung)
   if (ain < 5 || ain > 1018) {
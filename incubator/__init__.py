@@ -0,0 +1,46 @@
+"""
+Host-side tools for the incubator PID controller and the NTC characterization.
+
+Submodules are imported on first attribute access, so `import incubator`
+does not pull in NumPy, pyserial, SciPy or matplotlib:
+
+    from incubator import BinaryLogReader   # imports incubator.binary_log only
+
+Command line: `python -m incubator {monitor,characterize,analyze} --help`
+"""
+import importlib
+
+__version__ = '0.2.0'
+
+_LAZY = {
+    'BetaModel': 'ntc_lookup',
+    'SteinhartHartModel': 'ntc_lookup',
+    'NTCLookupTable': 'ntc_lookup',
+    'BlockFrameParser': 'frame_parser',
+    'LineBuffer': 'serial_reader',
+    'SerialLineReader': 'serial_reader',
+    'MultiplexReader': 'serial_reader',
+    'parse_pid_line': 'serial_reader',
+    'BinaryLogWriter': 'binary_log',
+    'BinaryLogReader': 'binary_log',
+    'export_csv': 'binary_log',
+    'LiveSeries': 'live_plot',
+    'StreamingBinner': 'binned_stats',
+    'StreamingWelch': 'streaming_welch',
+    'oadev': 'allan',
+}
+
+__all__ = sorted(_LAZY)
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module 'incubator' has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
@@ -0,0 +1,339 @@
+"""
+Streaming alarm / watchdog rules for the monitors.
+
+The monitors push every parsed sample into an AlarmEngine; the engine
+evaluates the rules in its own thread (woken per pushed batch, and every
+`tick` seconds for the watchdog), so a slow plot or log never delays an
+alarm and an alarm never delays the acquisition. Every condition keeps a
+constant amount of state per chamber (windowed conditions a deque that is
+trimmed as it grows, amortized O(1) per sample), so hundreds of rules over
+several chambers cost a few microseconds per sample.
+
+A rule is declared as a dict (JSON file, or DEFAULT_RULES below):
+
+    {"name": "over_temperature", "when": "temperature > 40", "for": 5, "action": "off"}
+
+when    one condition or a list of conditions that must all hold:
+            CHANNEL OP NUMBER             OP: > >= < <= == !=
+            delta(CHANNEL, S) OP NUMBER   change over the last S seconds
+            rate(CHANNEL, S) OP NUMBER    the same per second
+            stuck(CHANNEL, S[, TOL])      value within +-TOL (default 0) for S seconds
+            stale(S)                      no sample for S seconds (watchdog, host clock)
+        CHANNEL: temperature, setpoint, pwm, deviation (temperature -
+        setpoint) and adc (binary telemetry only; rules on a channel a
+        stream does not carry never fire)
+for     seconds (sample time) the condition has to hold continuously, default 0
+action  "off": send '0' (PID OFF) when raised; "log" (default): report only
+source  only this chamber (multi_monitor); without it every chamber is
+        watched separately
+
+An alarm is raised once when its condition starts to hold (for `for`
+seconds) and cleared when it stops holding; both are reported through
+on_event as AlarmEvent.
+
+Usage:
+    python -m incubator monitor --alarms                 # DEFAULT_RULES
+    python -m incubator monitor --alarms rules.json
+    python -m incubator.multi_monitor --device COM6 --device COM7 --alarms rules.json
+"""
+import json
+import operator
+import re
+import threading
+import time
+from collections import deque, namedtuple
+
+from . import metrics
+
+CHANNELS = ('temperature', 'setpoint', 'pwm', 'deviation', 'adc')
+ACTIONS = ('log', 'off')
+CMD_OFF = b'0'
+
+DEFAULT_RULES = [
+    {'name': 'over_temperature', 'when': 'temperature > 40', 'for': 5, 'action': 'off'},
+    # open / shorted NTC (the ADC range check of getTemperature() in PIDcontrol.ino)
+    {'name': 'ntc_open', 'when': 'temperature < 0', 'for': 2, 'action': 'off'},
+    {'name': 'ntc_short', 'when': 'temperature > 90', 'for': 2, 'action': 'off'},
+    {'name': 'adc_low', 'when': 'adc < 5', 'for': 2, 'action': 'off'},
+    {'name': 'adc_high', 'when': 'adc > 1018', 'for': 2, 'action': 'off'},
+    # full heater power without warming: heater/MOSFET failed or sensor outside the chamber
+    {'name': 'heater_no_rise', 'when': ['pwm >= 255', 'delta(temperature, 120) < 0.2'], 'for': 120,
+     'action': 'off'},
+    {'name': 'temperature_stuck', 'when': 'stuck(temperature, 300)', 'action': 'log'},
+    {'name': 'fast_rise', 'when': 'rate(temperature, 30) > 0.2', 'action': 'log'},
+    {'name': 'telemetry_stalled', 'when': 'stale(5)', 'action': 'off'},
+]
+
+AlarmEvent = namedtuple('AlarmEvent', ['time', 'source', 'rule', 'raised', 'values'])
+
+_NUMBER = r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?'
+_COMPARE = re.compile(rf'^(?:(delta|rate)\(\s*(\w+)\s*,\s*({_NUMBER})\s*\)|(\w+))\s*(>=|<=|==|!=|>|<)\s*({_NUMBER})$')
+_STUCK = re.compile(rf'^stuck\(\s*(\w+)\s*,\s*({_NUMBER})\s*(?:,\s*({_NUMBER})\s*)?\)$')
+_STALE = re.compile(rf'^stale\(\s*({_NUMBER})\s*\)$')
+_OPS = {'>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le,
+        '==': operator.eq, '!=': operator.ne}
+
+
+def _check_channel(channel):
+    if channel not in CHANNELS:
+        raise ValueError(f"unknown channel {channel!r} (expected one of {', '.join(CHANNELS)})")
+    return channel
+
+
+class Compare:
+    """CHANNEL OP LIMIT, optionally on delta()/rate() over a window."""
+
+    def __init__(self, channel, op, limit, function=None, window_s=None):
+        self.channel = _check_channel(channel)
+        self.op = _OPS[op]
+        self.op_text = op
+        self.limit = float(limit)
+        self.function = function
+        self.window_s = None if window_s is None else float(window_s)
+
+    def __str__(self):
+        term = f"{self.function}({self.channel}, {self.window_s:g})" if self.function else self.channel
+        return f"{term} {self.op_text} {self.limit:g}"
+
+    def new_state(self):
+        return deque() if self.function else None
+
+    def update(self, state, t, values):
+        """True/False, or None while the channel or the window is missing."""
+        v = values.get(self.channel)
+        if v is None:
+            return None
+        if self.function is None:
+            return self.op(v, self.limit)
+        state.append((t, v))
+        cutoff = t - self.window_s
+        while len(state) > 1 and state[1][0] <= cutoff:
+            state.popleft()
+        t0, v0 = state[0]
+        if t0 > cutoff:
+            return None  # window not filled yet
+        d = v - v0
+        if self.function == 'rate':
+            d /= t - t0
+        return self.op(d, self.limit)
+
+
+class Stuck:
+    """Value stayed within +-tolerance of where it settled for window_s seconds."""
+
+    def __init__(self, channel, window_s, tolerance=0.0):
+        self.channel = _check_channel(channel)
+        self.window_s = float(window_s)
+        self.tolerance = float(tolerance)
+
+    def __str__(self):
+        return f"stuck({self.channel}, {self.window_s:g}, {self.tolerance:g})"
+
+    def new_state(self):
+        return [None, None]  # anchor value, since
+
+    def update(self, state, t, values):
+        v = values.get(self.channel)
+        if v is None:
+            return None
+        if state[0] is None or abs(v - state[0]) > self.tolerance:
+            state[0], state[1] = v, t
+        return t - state[1] >= self.window_s
+
+
+class Stale:
+    """No sample for timeout_s seconds; checked by the engine on its timer, not per sample."""
+
+    def __init__(self, timeout_s):
+        self.timeout_s = float(timeout_s)
+
+    def __str__(self):
+        return f"stale({self.timeout_s:g})"
+
+
+def parse_condition(text):
+    text = text.strip()
+    m = _COMPARE.match(text)
+    if m:
+        function, channel, window, plain, op, limit = m.groups()
+        if function and float(window) <= 0:
+            raise ValueError(f"{text!r}: window must be positive")
+        return Compare(channel or plain, op, limit, function, window)
+    m = _STUCK.match(text)
+    if m:
+        return Stuck(m.group(1), m.group(2), m.group(3) or 0.0)
+    m = _STALE.match(text)
+    if m:
+        return Stale(m.group(1))
+    raise ValueError(f"cannot parse condition {text!r}")
+
+
+class Rule:
+    def __init__(self, name, when, for_s=0.0, action='log', source=None):
+        if action not in ACTIONS:
+            raise ValueError(f"rule {name!r}: unknown action {action!r} (expected one of {', '.join(ACTIONS)})")
+        self.name = name
+        self.conditions = [parse_condition(c) for c in ([when] if isinstance(when, str) else when)]
+        if not self.conditions:
+            raise ValueError(f"rule {name!r}: no condition")
+        self.stale = next((c for c in self.conditions if isinstance(c, Stale)), None)
+        if self.stale is not None and len(self.conditions) > 1:
+            raise ValueError(f"rule {name!r}: stale() cannot be combined with other conditions")
+        self.for_s = float(for_s)
+        self.action = action
+        self.source = source
+
+    @classmethod
+    def from_spec(cls, spec):
+        unknown = set(spec) - {'name', 'when', 'for', 'action', 'source'}
+        if unknown:
+            raise ValueError(f"rule {spec.get('name')!r}: unknown keys {sorted(unknown)}")
+        return cls(spec['name'], spec['when'], spec.get('for', 0.0), spec.get('action', 'log'), spec.get('source'))
+
+    def __str__(self):
+        text = " and ".join(map(str, self.conditions))
+        return f"{text} for {self.for_s:g} s" if self.for_s else text
+
+    def new_state(self):
+        return {'conditions': [None if self.stale else c.new_state() for c in self.conditions],
+                'since': None, 'active': False}
+
+    def update(self, state, t, values):
+        """Evaluates one sample. Returns True/False on a raise/clear, else None."""
+        # every condition sees every sample (windows stay current), no short-circuit
+        results = [c.update(s, t, values) for c, s in zip(self.conditions, state['conditions'])]
+        holds = all(results)
+        if not holds:
+            state['since'] = None
+        elif state['since'] is None:
+            state['since'] = t
+        active = holds and t - state['since'] >= self.for_s
+        if active != state['active']:
+            state['active'] = active
+            return active
+        return None
+
+
+def load_rules(spec='default'):
+    """'default' -> DEFAULT_RULES, otherwise a JSON file with a list of rule dicts."""
+    if spec == 'default':
+        specs = DEFAULT_RULES
+    else:
+        with open(spec, encoding='utf-8') as f:
+            specs = json.load(f)
+    return [Rule.from_spec(s) for s in specs]
+
+
+class AlarmEngine:
+    """
+    Evaluates rules on pushed samples in a background thread. push() only
+    appends to a queue and returns; on_event(AlarmEvent) and
+    command(source, b'0') are called from the engine thread.
+    """
+
+    def __init__(self, rules, on_event=None, command=None, tick=0.1, maxlen=100000):
+        self.rules = list(rules)
+        self.on_event = on_event
+        self.command = command
+        self.tick = float(tick)
+        self._queue = deque()
+        self._maxlen = int(maxlen)
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()  # evaluate() from the thread or, after stop(), the caller
+        self._states = {}  # source -> [(rule, state), ...]
+        self._last_seen = {}  # source -> monotonic time of the last sample
+        self.samples = 0
+        self.dropped = 0
+        self.command_errors = 0
+        self.latency_max = 0.0  # push -> evaluated, seconds
+        self.events = deque(maxlen=1000)
+        self._metrics = metrics.get()
+
+    def add_source(self, source=None):
+        """Registers a chamber, so the watchdog also fires if it never sends anything."""
+        if source not in self._states:
+            self._states[source] = [(rule, rule.new_state()) for rule in self.rules
+                                    if rule.source is None or rule.source == source]
+            self._last_seen[source] = time.monotonic()
+        return self._states[source]
+
+    def push(self, t, source=None, **values):
+        """Queues one sample (t in seconds, values by channel name)."""
+        if len(self._queue) >= self._maxlen:
+            self._queue.popleft()
+            self.dropped += 1
+        self._queue.append((time.monotonic(), t, source, values))
+        self._wakeup.set()
+
+    def start(self):
+        for source in list(self._states) or [None]:
+            self.add_source(source)
+        self._thread = threading.Thread(target=self._run, name='alarms', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(self.tick)
+            self._wakeup.clear()
+            self.evaluate()
+
+    def active(self):
+        """[(source, rule name), ...] of the alarms currently raised."""
+        return [(source, rule.name) for source, states in self._states.items()
+                for rule, state in states if state['active']]
+
+    def evaluate(self):
+        """Evaluates everything queued so far and the watchdog rules. Returns the number of samples."""
+        with self._lock:
+            m = self._metrics
+            count = 0
+            pop = self._queue.popleft
+            for _ in range(len(self._queue)):
+                pushed, t, source, values = pop()
+                t0 = m.clock()
+                states = self._states.get(source) or self.add_source(source)
+                self._last_seen[source] = pushed
+                if values.get('temperature') is not None and values.get('setpoint') is not None:
+                    values['deviation'] = values['temperature'] - values['setpoint']
+                for rule, state in states:
+                    if rule.stale is None:
+                        changed = rule.update(state, t, values)
+                        if changed is not None:
+                            self._emit(rule, state, source, changed, t, values)
+                m.stage('alarm_rules', t0)
+                latency = time.monotonic() - pushed
+                self.latency_max = max(self.latency_max, latency)
+                if m.enabled:
+                    m.observe('alarm_latency', latency * 1e9)
+                count += 1
+            self.samples += count
+
+            now = time.monotonic()
+            for source, states in self._states.items():
+                silent = now - self._last_seen[source]
+                for rule, state in states:
+                    if rule.stale is not None and (silent > rule.stale.timeout_s) != state['active']:
+                        state['active'] = not state['active']
+                        self._emit(rule, state, source, state['active'], None, {'silent_s': silent})
+            if m.enabled:
+                m.gauge('alarms_active', len(self.active()))
+            return count
+
+    def _emit(self, rule, state, source, raised, t, values):
+        event = AlarmEvent(t, source, rule, raised, dict(values))
+        self.events.append(event)
+        if raised and rule.action == 'off' and self.command is not None:
+            try:
+                self.command(source, CMD_OFF)
+            except OSError:
+                self.command_errors += 1
+        if self.on_event is not None:
+            self.on_event(event)
@@ -0,0 +1,105 @@
+import os
+import tempfile
+from collections import namedtuple
+
+import numpy as np
+
+AllanResult = namedtuple('AllanResult', ['taus', 'adev', 'adev_low', 'adev_high', 'n'])
+
+CHUNK_SAMPLES = 1 << 22  # samples per chunk (~32 MB of float64)
+
+
+def tau_grid(n_samples, rate, kind='log', points=50, max_fraction=1.0 / 3.0):
+    """
+    Averaging factors m (tau = m / rate) for an Allan deviation.
+    kind='octave' gives m = 1, 2, 4, ...; kind='log' gives `points`
+    log-spaced values. m is limited to max_fraction * n_samples.
+    """
+    m_max = int(n_samples * max_fraction)
+    if m_max < 1:
+        return np.zeros(0, dtype=np.int64), np.zeros(0)
+    if kind == 'octave':
+        m = 2 ** np.arange(int(np.log2(m_max)) + 1)
+    elif kind == 'log':
+        m = np.unique(np.round(np.logspace(0, np.log10(m_max), points)).astype(np.int64))
+    else:
+        raise ValueError(f"Unknown tau grid: {kind!r}")
+    m = m.astype(np.int64)
+    return m, m / float(rate)
+
+
+def _phase(data, chunk, workdir):
+    """
+    Integrated (phase) series S[0..N] of the mean-removed frequency data,
+    S[0] = 0, in units of samples. Large inputs go to a temporary memmap.
+    """
+    n = len(data)
+    offset = float(np.mean(data[:min(n, chunk)], dtype=np.float64))
+    if n + 1 <= chunk:
+        phase = np.empty(n + 1)
+    else:
+        phase = np.memmap(os.path.join(workdir, 'phase.f8'), dtype=np.float64, mode='w+', shape=(n + 1,))
+    phase[0] = 0.0
+    running = 0.0
+    for start in range(0, n, chunk):
+        block = np.asarray(data[start:start + chunk], dtype=np.float64) - offset
+        out = phase[start + 1:start + 1 + len(block)]
+        np.cumsum(block, out=out)
+        out += running
+        running = float(out[-1])
+    return phase
+
+
+def _white_fm_edf(n, m):
+    """Equivalent degrees of freedom of the overlapping ADEV for white FM noise."""
+    return (3.0 * (n - 1) / (2.0 * m) - 2.0 * (n - 2) / n) * (4.0 * m ** 2) / (4.0 * m ** 2 + 5.0)
+
+
+def oadev(data, rate, taus=None, kind='log', points=50, confidence=0.683, chunk=CHUNK_SAMPLES):
+    """
+    Overlapping Allan deviation of frequency-type data (e.g. a temperature series).
+
+    Uses the cumulative sum of the data, so each tau costs one vectorized
+    pass of second differences S[i+2m] - 2 S[i+m] + S[i] over the record,
+    O(n) per tau and O(n * len(taus)) in total. The taus are looped over on
+    purpose: gathering all m at once needs fancy indexing, which measured
+    2.5-3.5x slower than these contiguous slices. The record is processed
+    in chunks of `chunk` samples; `data` may be an np.memmap and is never
+    loaded as a whole (the cumulative sum is spilled to a temporary file for
+    large inputs).
+
+    taus: explicit averaging times in seconds; otherwise a `kind` grid
+    ('log' or 'octave') up to a third of the record length.
+    Confidence limits assume white FM noise (chi-squared with the
+    equivalent degrees of freedom for overlapping samples).
+    """
+    n = len(data)
+    rate = float(rate)
+    if taus is None:
+        m_values, _ = tau_grid(n, rate, kind, points)
+    else:
+        m_values = np.unique(np.maximum(np.round(np.asarray(taus) * rate), 1).astype(np.int64))
+    m_values = m_values[(m_values >= 1) & (2 * m_values < n)]
+
+    adev = np.zeros(len(m_values))
+    counts = np.zeros(len(m_values), dtype=np.int64)
+    with tempfile.TemporaryDirectory(prefix='oadev_') as workdir:
+        phase = _phase(data, chunk, workdir)
+        for k, m in enumerate(m_values):
+            terms = n + 1 - 2 * m
+            total = 0.0
+            for start in range(0, terms, chunk):
+                stop = min(start + chunk, terms)
+                d = phase[start + 2 * m:stop + 2 * m] - 2.0 * phase[start + m:stop + m] + phase[start:stop]
+                total += float(np.dot(d, d))
+            adev[k] = np.sqrt(total / (2.0 * m * m * terms))
+            counts[k] = terms
+        del phase
+
+    from scipy.stats import chi2
+
+    edf = np.maximum(_white_fm_edf(n + 1, m_values.astype(np.float64)), 1.0)
+    alpha = (1.0 - confidence) / 2.0
+    adev_low = adev * np.sqrt(edf / chi2.ppf(1.0 - alpha, edf))
+    adev_high = adev * np.sqrt(edf / chi2.ppf(alpha, edf))
+    return AllanResult(m_values / rate, adev, adev_low, adev_high, counts)
@@ -0,0 +1,431 @@
+"""
+Virtual Arduino for load-testing the host scripts without hardware.
+
+Opens a pseudo-terminal (Linux/macOS) and emulates one of the two serial
+protocols used in this repository:
+
+  pid   - PIDcontrol.ino: starts with the PID active, banner with the
+          gains, "temp,setpoint,pwm" lines, commands '0' (PID off),
+          '1' (PID on), 'b' / 'a' (binary telemetry frames every 10 ms /
+          back to ASCII lines); with --manual-mode also 'm' + number
+          (manual PWM as in pwmmanuell.ino, telemetry mode 2)
+  ntc   - characterization firmware: "Arduino ready" banner followed by
+          'S' + <uint16 n><uint32 duration_us> + n * uint16 ADC + 'E' blocks
+
+The temperature comes from a first-order heater model driven by the PWM
+output. Time can run faster than real time (--speed), and noise,
+corrupted frames/lines, dropouts and a device clock error (--clock-ppm)
+can be injected.
+
+Usage:
+    python -m incubator.arduino_sim pid --speed 10
+    python -m incubator.arduino_sim ntc --rate 2000 --block 200 --corrupt 0.01
+Then point the host script at the printed /dev/pts/N device.
+"""
+import argparse
+import math
+import os
+import random
+import struct
+import time
+
+from .telemetry import encode_frame
+
+ADC_MAX = 1023
+
+
+class ThermalPlant:
+    """
+    First-order heater model with optional dead time:
+    tau * dT/dt = T_ambient + gain * pwm/255 - T
+    """
+
+    def __init__(self, ambient=22.0, gain=40.0, tau=300.0, dead_time=0.0, initial=None):
+        self.ambient = float(ambient)
+        self.gain = float(gain)
+        self.tau = float(tau)
+        self.dead_time = float(dead_time)
+        self.temperature = self.ambient if initial is None else float(initial)
+        self._delay_line = []  # (release_time, pwm)
+        self._pwm = 0.0
+        self._time = 0.0
+
+    def step(self, dt, pwm):
+        self._time += dt
+        if self.dead_time > 0:
+            self._delay_line.append((self._time + self.dead_time, pwm))
+            while self._delay_line and self._delay_line[0][0] <= self._time:
+                self._pwm = self._delay_line.pop(0)[1]
+        else:
+            self._pwm = pwm
+        target = self.ambient + self.gain * self._pwm / 255.0
+        self.temperature = target + (self.temperature - target) * math.exp(-dt / self.tau)
+        return self.temperature
+
+
+class PIDv1:
+    """
+    Port of the Arduino PID_v1 library (DIRECT, proportional on error):
+    fixed sample time, integral and output clamped to the output limits,
+    derivative on measurement, bumpless transfer when switched to AUTOMATIC.
+    """
+
+    def __init__(self, kp, ki, kd, setpoint, sample_time_ms=100, out_min=0.0, out_max=255.0):
+        self.setpoint = float(setpoint)
+        self.sample_time_ms = int(sample_time_ms)
+        self.out_min = float(out_min)
+        self.out_max = float(out_max)
+        self.set_tunings(kp, ki, kd)
+        self.automatic = False
+        self.output = 0.0
+        self._output_sum = 0.0
+        self._last_input = 0.0
+        self._last_time_ms = -self.sample_time_ms
+
+    def set_tunings(self, kp, ki, kd):
+        sample_time_s = self.sample_time_ms / 1000.0
+        self.kp = float(kp)
+        self.ki = float(ki) * sample_time_s
+        self.kd = float(kd) / sample_time_s
+
+    def set_mode(self, automatic, current_input):
+        if automatic and not self.automatic:
+            self._output_sum = min(max(self.output, self.out_min), self.out_max)
+            self._last_input = current_input
+        self.automatic = automatic
+
+    def compute(self, current_input, now_ms):
+        if not self.automatic or now_ms - self._last_time_ms < self.sample_time_ms:
+            return False
+        error = self.setpoint - current_input
+        d_input = current_input - self._last_input
+        self._output_sum = min(max(self._output_sum + self.ki * error, self.out_min), self.out_max)
+        output = self.kp * error + self._output_sum - self.kd * d_input
+        self.output = min(max(output, self.out_min), self.out_max)
+        self._last_input = current_input
+        self._last_time_ms = now_ms
+        return True
+
+
+def temperature_to_adc(temp_c, beta=3435.0, r0=10000.0, t0_k=298.15, r_fixed=10000.0):
+    """Inverse of the Beta model for 5V --- NTC --- A0 --- R_fixed --- GND (float ADC counts)."""
+    r_ntc = r0 * math.exp(beta * (1.0 / (temp_c + 273.15) - 1.0 / t0_k))
+    return ADC_MAX * r_fixed / (r_fixed + r_ntc)
+
+
+def adc_to_temperature(ain, beta=3435.0, r0=10000.0, t0_k=298.15, r_fixed=10000.0):
+    """Same computation as getTemperature() in the firmware."""
+    ain = min(max(ain, 1), 1022)
+    r2 = r_fixed * (1023.0 / ain - 1.0)
+    return 1.0 / ((1.0 / t0_k) + (math.log(r2 / r0) / beta)) - 273.15
+
+
+class PIDFirmware:
+    """
+    Emulates PIDcontrol.ino (gains and banner of the sketch, PID active from
+    the start, prints once per second). manual_mode=True additionally
+    accepts pwmmanuell.ino's 'm' + PWM command, which the real sketch ignores.
+    """
+
+    MODE_OFF, MODE_PID, MODE_MANUAL = 0, 1, 2
+
+    def __init__(self, plant, kp=36.2768, ki=0.1448, kd=0.0, setpoint=37.0, adc_noise=0.5,
+                 print_interval_ms=1000, corrupt_rate=0.0, drop_rate=0.0, rng=None,
+                 binary_interval_ms=10, clock_ppm=0.0, manual_mode=False):
+        self.plant = plant
+        self.pid = PIDv1(kp, ki, kd, setpoint)
+        self.gains = (float(kp), float(ki), float(kd))
+        self.manual_mode = bool(manual_mode)
+        self.adc_noise = float(adc_noise)
+        self.print_interval_ms = int(print_interval_ms)
+        self.binary_interval_ms = int(binary_interval_ms)
+        self.clock_scale = 1.0 + float(clock_ppm) * 1e-6  # micros() per true microsecond
+        self.corrupt_rate = float(corrupt_rate)
+        self.drop_rate = float(drop_rate)
+        self.rng = rng or random.Random()
+        self.mode = self.MODE_PID  # pidAktiv = true
+        self.pwm = 0
+        self.manual_pwm = 0
+        self.input = plant.temperature
+        self.pid.set_mode(True, self.input)
+        self.adc = 0
+        self.binary = False
+        self._seq = 0
+        self._last_print_ms = 0
+        self._last_frame_ms = 0
+        self._manual_digits = None  # collecting digits after 'm'
+        self._manual_deadline_ms = 0
+        self._now_ms = 0
+
+    def banner(self):
+        kp, ki, kd = self.gains
+        return (
+            "PID-Regler gestartet mit angepassten Werten.\r\n"
+            f"Setpoint: {self.pid.setpoint:.2f}\r\n"
+            f"Kp: {kp:.2f}\r\n"
+            f"Ki: {ki:.2f}\r\n"
+            f"Kd: {kd:.2f}\r\n"
+            f"Max PWM: {int(self.pid.out_max)}\r\n"
+        ).encode()
+
+    def handle_input(self, data):
+        out = []
+        for ch in data.decode('ascii', errors='ignore'):
+            if self._manual_digits is not None:
+                if ch.isdigit():
+                    self._manual_digits += ch
+                    continue
+                if self._manual_digits:
+                    out.append(self._finish_manual())
+                    continue
+                if ch in '\r\n ':
+                    continue
+                self._manual_digits = None
+            if ch == '0':
+                self.mode = self.MODE_OFF
+                self.pid.set_mode(False, self.input)
+                self.pwm = self.manual_pwm = 0
+                out.append("PID deaktiviert\r\n")
+            elif ch == '1':
+                self.mode = self.MODE_PID
+                self.pid.set_mode(True, self.input)
+                out.append("PID aktiviert\r\n")
+            elif ch in 'mM' and self.manual_mode:
+                self.mode = self.MODE_MANUAL
+                self.pid.set_mode(False, self.input)
+                self._manual_digits = ''
+                self._manual_deadline_ms = self._now_ms + 5000
+                out.append("MODE: MANUAL. Please send a PWM value (0-255):\r\n")
+            elif ch == 'b':
+                self.binary = True
+            elif ch == 'a':
+                self.binary = False
+        # status text would corrupt the binary stream
+        return b'' if self.binary else ''.join(out).encode()
+
+    def _finish_manual(self):
+        self.manual_pwm = min(max(int(self._manual_digits), 0), 255)
+        self.pwm = self.manual_pwm
+        self._manual_digits = None
+        return f"Manual PWM set to: {self.pwm}\r\n"
+
+    def _read_temperature(self):
+        center = temperature_to_adc(self.plant.temperature)
+        total = sum(min(max(round(center + self.rng.gauss(0.0, self.adc_noise)), 0), ADC_MAX)
+                    for _ in range(5))
+        self.adc = int(round(total / 5.0))
+        return adc_to_temperature(total / 5.0)
+
+    def tick(self, now_ms, dt_s):
+        """Advances the firmware to now_ms. Returns bytes to send."""
+        self._now_ms = now_ms
+        out = b''
+        if self._manual_digits is not None:
+            if self._manual_digits:
+                out += self._finish_manual().encode()
+            elif now_ms >= self._manual_deadline_ms:
+                self._manual_digits = None
+                out += (f"Timeout - no PWM number received. PWM remains unchanged "
+                        f"(current: {self.pwm}).\r\n").encode()
+
+        self.plant.step(dt_s, self.pwm)
+        self.input = self._read_temperature()
+        if self.mode == self.MODE_PID:
+            if self.pid.compute(self.input, now_ms):
+                self.pwm = int(self.pid.output)
+        elif self.mode == self.MODE_MANUAL:
+            self.pwm = self.manual_pwm
+        else:
+            self.pwm = 0
+
+        if self.binary:
+            if now_ms - self._last_frame_ms >= self.binary_interval_ms:
+                self._last_frame_ms = now_ms
+                output = self.pid.output if self.mode == self.MODE_PID else float(self.pwm)
+                frame = encode_frame(self._seq, int(now_ms * 1000 * self.clock_scale), self.adc, self.input,
+                                     self.pid.setpoint, output, self.pwm, self.mode)
+                self._seq += 1
+                out = self._inject_errors(frame)  # status text is suppressed in binary mode
+        elif now_ms - self._last_print_ms >= self.print_interval_ms:
+            self._last_print_ms = now_ms
+            line = f"{self.input:.2f},{self.pid.setpoint:.2f},{self.pwm}\r\n".encode()
+            out += self._inject_errors(line)
+        return out
+
+    def _inject_errors(self, data):
+        if self.rng.random() < self.drop_rate:
+            return b''
+        if self.rng.random() < self.corrupt_rate:
+            return _corrupt(data, self.rng)
+        return data
+
+
+class CharacterizationFirmware:
+    """Emulates the NTC characterization firmware block protocol."""
+
+    def __init__(self, plant, sample_rate=1000.0, block_samples=100, adc_noise=1.0,
+                 jitter_us=0, corrupt_rate=0.0, drop_rate=0.0, rng=None, clock_ppm=0.0):
+        self.plant = plant
+        self.sample_rate = float(sample_rate)
+        self.block_samples = int(block_samples)
+        self.adc_noise = float(adc_noise)
+        self.jitter_us = int(jitter_us)
+        self.clock_scale = 1.0 + float(clock_ppm) * 1e-6
+        self.corrupt_rate = float(corrupt_rate)
+        self.drop_rate = float(drop_rate)
+        self.rng = rng or random.Random()
+        self.block_period_ms = 1000.0 * self.block_samples / self.sample_rate
+        self._next_block_ms = self.block_period_ms
+        self._format = struct.Struct(f'<{self.block_samples}H')
+
+    def banner(self):
+        return b"Arduino ready\r\n"
+
+    def handle_input(self, data):
+        return b''
+
+    def tick(self, now_ms, dt_s):
+        self.plant.step(dt_s, 0)
+        out = b''
+        while now_ms >= self._next_block_ms:
+            self._next_block_ms += self.block_period_ms
+            center = temperature_to_adc(self.plant.temperature)
+            samples = [min(max(int(round(center + self.rng.gauss(0.0, self.adc_noise))), 0), ADC_MAX)
+                       for _ in range(self.block_samples)]
+            duration_us = (int(self.block_period_ms * 1000 * self.clock_scale)
+                           + self.rng.randint(-self.jitter_us, self.jitter_us))
+            frame = (b'S' + struct.pack('<HL', self.block_samples, max(duration_us, 1))
+                     + self._format.pack(*samples) + b'E')
+            if self.rng.random() < self.drop_rate:
+                continue
+            if self.rng.random() < self.corrupt_rate:
+                frame = _corrupt(frame, self.rng)
+            out += frame
+        return out
+
+
+def _corrupt(data, rng):
+    """Flips one byte or truncates the frame."""
+    if not data:
+        return data
+    if rng.random() < 0.5:
+        i = rng.randrange(len(data))
+        return data[:i] + bytes([data[i] ^ 0xFF]) + data[i + 1:]
+    return data[:rng.randrange(len(data))]
+
+
+class VirtualArduino:
+    """
+    Runs a firmware emulation on the master side of a pseudo-terminal.
+    `speed` scales simulated time (10 = ten times faster than real time,
+    0 = as fast as the reader consumes the data).
+    """
+
+    def __init__(self, firmware, speed=1.0, step_ms=10):
+        import tty
+
+        self.firmware = firmware
+        self.speed = float(speed)
+        self.step_ms = int(step_ms)
+        self.master_fd, self.slave_fd = os.openpty()
+        tty.setraw(self.slave_fd)
+        os.set_blocking(self.master_fd, False)
+        self.port = os.ttyname(self.slave_fd)
+        self.bytes_sent = 0
+
+    def _write(self, data):
+        view = memoryview(data)
+        while view:
+            try:
+                n = os.write(self.master_fd, view)
+            except BlockingIOError:
+                time.sleep(0.001)  # reader is behind; wait for it
+                continue
+            view = view[n:]
+            self.bytes_sent += n
+
+    def _read_commands(self):
+        try:
+            return os.read(self.master_fd, 4096)
+        except (BlockingIOError, OSError):
+            return b''
+
+    def run(self, duration_s=None):
+        self._write(self.firmware.banner())
+        start = time.monotonic()
+        sim_ms = 0
+        while duration_s is None or sim_ms < duration_s * 1000:
+            commands = self._read_commands()
+            if commands:
+                self._write(self.firmware.handle_input(commands))
+            sim_ms += self.step_ms
+            out = self.firmware.tick(sim_ms, self.step_ms / 1000.0)
+            if out:
+                self._write(out)
+            if self.speed > 0:
+                lag = sim_ms / 1000.0 / self.speed - (time.monotonic() - start)
+                if lag > 0:
+                    time.sleep(lag)
+
+    def close(self):
+        os.close(self.master_fd)
+        os.close(self.slave_fd)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Virtual Arduino on a pseudo-terminal.")
+    parser.add_argument('protocol', choices=['pid', 'ntc'])
+    parser.add_argument('--speed', type=float, default=1.0, help="time acceleration, 0 = unthrottled")
+    parser.add_argument('--duration', type=float, default=None, help="simulated seconds to run")
+    parser.add_argument('--noise', type=float, default=None, help="ADC noise (counts, 1 sigma)")
+    parser.add_argument('--corrupt', type=float, default=0.0, help="probability of a corrupted line/frame")
+    parser.add_argument('--drop', type=float, default=0.0, help="probability of a dropped line/frame")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--clock-ppm', type=float, default=0.0, help="device clock error (micros() runs fast by N ppm)")
+    # Thermal plant
+    parser.add_argument('--ambient', type=float, default=22.0)
+    parser.add_argument('--gain', type=float, default=40.0, help="steady-state rise at PWM 255 (°C)")
+    parser.add_argument('--tau', type=float, default=300.0, help="plant time constant (s)")
+    parser.add_argument('--dead-time', type=float, default=0.0, help="plant dead time (s)")
+    # PID protocol (defaults of PIDcontrol.ino)
+    parser.add_argument('--kp', type=float, default=36.2768)
+    parser.add_argument('--ki', type=float, default=0.1448)
+    parser.add_argument('--kd', type=float, default=0.0)
+    parser.add_argument('--setpoint', type=float, default=37.0)
+    parser.add_argument('--manual-mode', action='store_true',
+                        help="also accept 'm' + PWM 0-255 (pwmmanuell.ino; not in PIDcontrol.ino)")
+    parser.add_argument('--interval-ms', type=int, default=1000, help="telemetry print interval")
+    # NTC protocol
+    parser.add_argument('--rate', type=float, default=1000.0, help="ADC sample rate (Hz)")
+    parser.add_argument('--block', type=int, default=100, help="samples per block")
+    parser.add_argument('--jitter-us', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    plant = ThermalPlant(args.ambient, args.gain, args.tau, args.dead_time)
+    if args.protocol == 'pid':
+        firmware = PIDFirmware(plant, args.kp, args.ki, args.kd, args.setpoint,
+                               adc_noise=0.5 if args.noise is None else args.noise,
+                               print_interval_ms=args.interval_ms,
+                               corrupt_rate=args.corrupt, drop_rate=args.drop, rng=rng,
+                               clock_ppm=args.clock_ppm, manual_mode=args.manual_mode)
+    else:
+        firmware = CharacterizationFirmware(plant, args.rate, args.block,
+                                            adc_noise=1.0 if args.noise is None else args.noise,
+                                            jitter_us=args.jitter_us,
+                                            corrupt_rate=args.corrupt, drop_rate=args.drop, rng=rng,
+                                            clock_ppm=args.clock_ppm)
+
+    arduino = VirtualArduino(firmware, speed=args.speed)
+    print(f"Virtual Arduino ({args.protocol}) on {arduino.port}  (Ctrl+C to stop)")
+    try:
+        arduino.run(args.duration)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        arduino.close()
+        print(f"Stopped after {arduino.bytes_sent} bytes.")
+
+
+if __name__ == '__main__':
+    main()
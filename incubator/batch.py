@@ -0,0 +1,446 @@
+"""
+Batch analysis of recorded runs.
+
+Every run found under the given directories (.npz from `characterize
+--save`, raw .cap captures, binary .bin / compressed .zlog logs and .csv
+exports) is analyzed in its own worker process: 1 s binning, Welch
+PSD/ASD, mean NETD and the Allan deviation, as in `analyze`. One file is
+one sensor; its name is the path relative to the input directory.
+
+Files are streamed in chunks of --chunk samples and never loaded whole:
+binning and Welch are updated per chunk, the temperature series is spilled
+to a temporary file that oadev() reads as a memmap.
+
+Output (--out): summary.csv with one row per sensor, summary_asd.png and
+summary_adev.png comparing all sensors, and per-sensor plots in plots/.
+With --cache, results of files whose content and parameters are unchanged
+are taken from the analysis cache (cache.py).
+
+Usage:
+    python -m incubator.batch runs/ --out report/ --jobs 8
+    python -m incubator.batch runs/ --out report/ --cache
+    python -m incubator.batch runs/ --pattern '*.cap' --beta 3380 --no-plot
+"""
+import argparse
+import csv
+import fnmatch
+import itertools
+import json
+import os
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from .characterize import ADEV_TAU_GRID, ADEV_TAU_POINTS, ADC_LUT, BIN_WIDTH_S, WELCH_NPERSEG, make_lut
+
+RUN_PATTERNS = ('*.npz', '*.cap', '*.bin', '*.zlog', '*.csv')
+CHUNK_SAMPLES = 1 << 20
+SUMMARY_FIELDS = ['sensor', 'path', 'samples', 'duration_s', 'fs_hz', 'temp_mean_c', 'temp_std_c',
+                  'voltage_mean_v', 'voltage_std_v', 'netd_c_rthz', 'netd_band_hz', 'adev_min_c',
+                  'adev_min_tau_s', 'welch_segments', 'elapsed_s', 'error']
+
+
+def find_runs(paths, patterns=RUN_PATTERNS):
+    """Returns sorted (sensor name, path) pairs for all matching files under `paths`."""
+    runs = []
+    for root in paths:
+        if os.path.isfile(root):
+            runs.append((os.path.basename(root), root))
+            continue
+        for dirpath, _, filenames in os.walk(root):
+            for name in filenames:
+                if any(fnmatch.fnmatch(name, p) for p in patterns):
+                    path = os.path.join(dirpath, name)
+                    runs.append((os.path.relpath(path, root), path))
+    return sorted(runs)
+
+
+class RunStream:
+    """
+    Iterates over a recorded run in chunks of (timestamps, temperatures,
+    voltages or None). `fs` is the stored (.npz) or block-derived (.cap)
+    sample rate, or the median sample interval of the data for logs; it is
+    final once the iteration is complete.
+    """
+
+    def __init__(self, path, chunk_samples=CHUNK_SAMPLES, lut=ADC_LUT):
+        self.path = path
+        self.chunk_samples = int(chunk_samples)
+        self.lut = lut
+        self.fs = 0.0
+
+    def __iter__(self):
+        if self.path.endswith('.npz'):
+            return self._npz()
+        if self.path.endswith('.cap'):
+            return self._capture()
+        if self.path.endswith('.csv'):
+            return self._log(self._csv_columns())
+        return self._log(self._bin_columns())
+
+    def _npz(self):
+        """Reads the .npy members of the archive sequentially, without loading them."""
+        with zipfile.ZipFile(self.path) as archive:
+            with archive.open('fs.npy') as f:
+                self.fs = float(np.load(f))
+            streams = []
+            for name in ('timestamps', 'temperatures', 'voltages'):
+                f = archive.open(name + '.npy')
+                version = np.lib.format.read_magic(f)
+                if version == (1, 0):
+                    shape, _, dtype = np.lib.format.read_array_header_1_0(f)
+                else:
+                    shape, _, dtype = np.lib.format.read_array_header_2_0(f)
+                streams.append((f, dtype, shape[0] if shape else 0))
+            try:
+                n = streams[0][2]
+                for start in range(0, n, self.chunk_samples):
+                    k = min(self.chunk_samples, n - start)
+                    t, temp, volt = (np.frombuffer(f.read(k * dtype.itemsize), dtype=dtype) if size else None
+                                     for f, dtype, size in streams)
+                    yield t, temp, volt
+            finally:
+                for f, _, _ in streams:
+                    f.close()
+
+    def _capture(self):
+        """Replays the capture through the frame parser and `lut`, like characterize.acquire()."""
+        from .capture import CaptureReader
+        from .clock_sync import BlockClock
+        from .frame_parser import BlockFrameParser
+
+        capture = CaptureReader(self.path)
+        parser = BlockFrameParser()
+        block_clock = BlockClock()
+        pending = []
+        pending_samples = 0
+        try:
+            for i in range(len(capture)):
+                receive_time = capture.start_time + capture.times[i]
+                blocks = parser.feed(capture.chunk(i))
+                block_times = block_clock.timestamps(receive_time, [(b.num_samples, b.duration_micros) for b in blocks])
+                for (_, _, adc_values), sample_times in zip(blocks, block_times):
+                    temps_c, volts_r_fixed, valid = self.lut.convert(adc_values)
+                    pending.append((sample_times[valid], temps_c[valid], volts_r_fixed[valid]))
+                    pending_samples += len(pending[-1][0])
+                if pending_samples >= self.chunk_samples:
+                    yield tuple(np.concatenate(c) for c in zip(*pending))
+                    pending, pending_samples = [], 0
+            if pending:
+                yield tuple(np.concatenate(c) for c in zip(*pending))
+        finally:
+            capture.close()
+        self.fs = block_clock.mean_sample_rate
+
+    def _bin_columns(self):
+        from .binary_log import BinaryLogReader, open_reader
+
+        reader = open_reader(self.path)
+        if not isinstance(reader, BinaryLogReader):
+            # compressed log: decoded block by block
+            for chunk in reader.iter_chunks():
+                yield chunk['time'], chunk['temperature'].astype(np.float64)
+            return
+        records = reader.records
+        for start in range(0, len(records), self.chunk_samples):
+            chunk = records[start:start + self.chunk_samples]
+            yield np.array(chunk['time']), chunk['temperature'].astype(np.float64)
+
+    def _csv_columns(self):
+        with open(self.path) as f:
+            next(f, None)  # header
+            while True:
+                lines = list(itertools.islice(f, self.chunk_samples))
+                if not lines:
+                    return
+                table = np.loadtxt(lines, delimiter=',', usecols=(0, 1), ndmin=2)
+                yield table[:, 0], table[:, 1]
+
+    def _log(self, columns):
+        intervals = []
+        for t, temp in columns:
+            if len(t) > 1:
+                intervals.append(float(np.median(np.diff(t))))
+            yield t, temp, None
+        self.fs = 1.0 / float(np.median(intervals)) if intervals else 0.0
+
+
+def analyze_run(sensor, path, bin_width=BIN_WIDTH_S, nperseg=WELCH_NPERSEG, chunk_samples=CHUNK_SAMPLES,
+                beta=None, r_fixed=None, plot_dir=None, cache_dir=None, cache_bytes=None):
+    """
+    Full analysis of one run (executed in a worker process). Returns a
+    summary row (SUMMARY_FIELDS) plus the 'binned' temperature series and
+    the 'asd' and 'adev' curves for the plots. With cache_dir, results are
+    looked up by the file's content hash and the parameters first (see
+    cache.py), so unchanged runs are not analyzed again.
+    """
+    started = time.perf_counter()
+    lut = make_lut(beta, r_fixed)
+    cache = key = None
+    if cache_dir:
+        from .cache import DEFAULT_MAX_BYTES, AnalysisCache, file_digest
+
+        cache = AnalysisCache(cache_dir, cache_bytes or DEFAULT_MAX_BYTES)
+        key = cache.key('batch_run', file_digest(path), {
+            'bin_width': bin_width, 'nperseg': nperseg, 'lut': repr(lut),
+            'tau_grid': ADEV_TAU_GRID, 'tau_points': ADEV_TAU_POINTS, 'timestamps': 'clock_sync'})
+        entry = cache.get(key)
+        result = _unpack(entry) if entry is not None else None
+    if cache is None or result is None:
+        result = _analyze_stream(RunStream(path, chunk_samples, lut), bin_width, nperseg)
+        if cache is not None and not result['row']['error']:
+            cache.put(key, _pack(result))
+    result['row'].update(sensor=sensor, path=path)
+
+    if plot_dir and result['binned'] is not None:
+        _plot_run(sensor, result, bin_width, os.path.join(plot_dir, _safe_name(sensor) + '.png'))
+    result['row']['elapsed_s'] = round(time.perf_counter() - started, 2)
+    return result
+
+
+_CURVES = ('binned', 'asd', 'adev')
+
+
+def _pack(result):
+    """Result -> flat dict of arrays for the cache."""
+    arrays = {'row': np.array(json.dumps(result['row']))}
+    for name in _CURVES:
+        if result[name] is not None:
+            for i, values in enumerate(result[name]):
+                arrays[f'{name}_{i}'] = values
+    return arrays
+
+
+def _unpack(entry):
+    result = {'row': json.loads(str(entry['row']))}
+    for name in _CURVES:
+        parts = sorted((k for k in entry if k.startswith(name + '_')), key=lambda k: int(k.rsplit('_', 1)[1]))
+        result[name] = tuple(entry[k] for k in parts) if parts else None
+    return result
+
+
+def _analyze_stream(stream, bin_width, nperseg):
+    from .allan import oadev
+    from .binned_stats import StreamingBinner
+    from .streaming_welch import StreamingWelch
+
+    row = {'error': ''}
+    result = {'row': row, 'binned': None, 'asd': None, 'adev': None}
+    binner = None
+    welch = StreamingWelch(nperseg=nperseg, noverlap=nperseg // 2, detrend='linear')
+    n = 0
+    t_first = t_last = None
+    with tempfile.TemporaryDirectory(prefix='batch_') as workdir:
+        spill_path = os.path.join(workdir, 'temperature.f8')
+        with open(spill_path, 'wb') as spill:
+            for t, temp, volt in stream:
+                if not len(t):
+                    continue
+                if binner is None:
+                    channels = ('temperature',) if volt is None else ('temperature', 'voltage')
+                    binner = StreamingBinner(bin_width, channels=channels)
+                    t_first = float(t[0])
+                values = {'temperature': temp}
+                if volt is not None:
+                    values['voltage'] = volt
+                binner.update(t, **values)
+                welch.update(temp)
+                np.asarray(temp, dtype=np.float64).tofile(spill)
+                n += len(t)
+                t_last = float(t[-1])
+
+        fs = stream.fs
+        row.update(samples=n, fs_hz=round(fs, 3), welch_segments=welch.n_segments)
+        if not n:
+            row['error'] = 'no valid samples'
+            return result
+        row['duration_s'] = round(t_last - t_first, 3)
+        temperatures = np.memmap(spill_path, dtype=np.float64, mode='r', shape=(n,))
+
+        times, means, stds = binner.series('temperature')
+        result['binned'] = (times, means, stds)
+        counts = binner.counts()
+        counts = counts[counts > 0]
+        mean = float(np.average(means, weights=counts))
+        row['temp_mean_c'] = round(mean, 5)
+        row['temp_std_c'] = float(f"{_pooled_std(binner, 'temperature', mean):.5g}")
+        if 'voltage' in binner.channels:
+            _, v_means, _ = binner.series('voltage')
+            v_mean = float(np.average(v_means, weights=counts))
+            row['voltage_mean_v'] = round(v_mean, 6)
+            row['voltage_std_v'] = float(f"{_pooled_std(binner, 'voltage', v_mean):.5g}")
+
+        if fs > 0 and welch.n_segments:
+            frequencies, asd = welch.asd(fs)
+            low = max(1.0, frequencies[1] * 1.1)
+            high = min(fs / 2.1, 1000)
+            if low < high:
+                row['netd_c_rthz'] = float(f"{welch.mean_asd(low, high, fs):.5g}")
+                row['netd_band_hz'] = f"{low:.1f}-{high:.1f}"
+            result['asd'] = (frequencies[1:], asd[1:])
+
+        if fs > 0 and n > 100:
+            allan = oadev(temperatures, rate=fs, kind=ADEV_TAU_GRID, points=ADEV_TAU_POINTS)
+            if len(allan.adev):
+                best = int(np.argmin(allan.adev))
+                row['adev_min_c'] = float(f"{allan.adev[best]:.5g}")
+                row['adev_min_tau_s'] = float(f"{allan.taus[best]:.4g}")
+                result['adev'] = (allan.taus, allan.adev)
+        del temperatures
+    return result
+
+
+def _pooled_std(binner, channel, mean):
+    """Overall population std from the per-bin means/stds (law of total variance)."""
+    _, means, stds = binner.series(channel)
+    counts = binner.counts()
+    counts = counts[counts > 0]
+    total = np.sum(counts * (stds ** 2 + (means - mean) ** 2))
+    return float(np.sqrt(total / np.sum(counts)))
+
+
+def _safe_name(sensor):
+    return sensor.replace(os.sep, '__').replace('/', '__')
+
+
+def _plot_run(sensor, result, bin_width, path):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    fig, (ax_t, ax_asd, ax_adev) = plt.subplots(3, 1, figsize=(10, 12))
+    fig.suptitle(sensor)
+    times, means, stds = result['binned']
+    ax_t.errorbar(times, means, yerr=stds, fmt='-', capsize=2)
+    ax_t.set_xlabel("Time since measurement start (s)")
+    ax_t.set_ylabel(f"Temperature (°C), {bin_width:g}s bins")
+    ax_t.grid(True)
+    if result['asd'] is not None:
+        ax_asd.loglog(*result['asd'])
+    ax_asd.set_xlabel('Frequency (Hz)')
+    ax_asd.set_ylabel('ASD / NETD (°C/$\\sqrt{\\mathrm{Hz}}$)')
+    ax_asd.grid(True, which='both', linestyle='--', linewidth=0.5)
+    if result['adev'] is not None:
+        ax_adev.loglog(*result['adev'], '-o', markersize=3)
+    ax_adev.set_xlabel('Averaging time τ (s)')
+    ax_adev.set_ylabel('Allan Deviation σ(τ) (°C)')
+    ax_adev.grid(True, which='both', linestyle='--', linewidth=0.5)
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def _plot_summary(results, out_dir):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    for key, filename, xlabel, ylabel in (
+            ('asd', 'summary_asd.png', 'Frequency (Hz)', 'ASD / NETD (°C/$\\sqrt{\\mathrm{Hz}}$)'),
+            ('adev', 'summary_adev.png', 'Averaging time τ (s)', 'Allan Deviation σ(τ) (°C)')):
+        curves = [(r['row']['sensor'], r[key]) for r in results if r[key] is not None]
+        if not curves:
+            continue
+        fig, ax = plt.subplots(figsize=(10, 6))
+        for sensor, (x, y) in curves:
+            ax.loglog(x, y, label=sensor, linewidth=1)
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel(ylabel)
+        ax.grid(True, which='both', linestyle='--', linewidth=0.5)
+        if len(curves) <= 20:
+            ax.legend(fontsize='small')
+        fig.tight_layout()
+        fig.savefig(os.path.join(out_dir, filename))
+        plt.close(fig)
+
+
+def write_summary(rows, path):
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def run_batch(paths, out_dir, jobs=None, patterns=RUN_PATTERNS, plot=True, **options):
+    """
+    Analyzes all runs under `paths` in a process pool (`jobs` workers,
+    default: all cores). `options` go to analyze_run(). Writes the summary
+    table (and plots) to out_dir and returns the list of results.
+    """
+    runs = find_runs(paths, patterns)
+    if not runs:
+        print("No recorded runs found.")
+        return []
+    os.makedirs(out_dir, exist_ok=True)
+    plot_dir = None
+    if plot:
+        plot_dir = os.path.join(out_dir, 'plots')
+        os.makedirs(plot_dir, exist_ok=True)
+
+    jobs = jobs or os.cpu_count() or 1
+    print(f"Analyzing {len(runs)} runs with {min(jobs, len(runs))} worker processes...")
+    started = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=min(jobs, len(runs))) as pool:
+        futures = {pool.submit(analyze_run, sensor, path, plot_dir=plot_dir, **options): (sensor, path)
+                   for sensor, path in runs}
+        for future in as_completed(futures):
+            sensor, path = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {'row': {'sensor': sensor, 'path': path, 'error': f"{type(e).__name__}: {e}"},
+                          'binned': None, 'asd': None, 'adev': None}
+            results.append(result)
+            row = result['row']
+            status = row['error'] or (f"{row['samples']} samples, NETD {row.get('netd_c_rthz', '-')}, "
+                                      f"min ADEV {row.get('adev_min_c', '-')}")
+            print(f"[{len(results)}/{len(runs)}] {sensor}: {status}")
+
+    results.sort(key=lambda r: r['row']['sensor'])
+    summary_path = os.path.join(out_dir, 'summary.csv')
+    write_summary([r['row'] for r in results], summary_path)
+    if plot:
+        _plot_summary(results, out_dir)
+    print(f"Summary of {len(results)} runs written to '{summary_path}' "
+          f"({time.perf_counter() - started:.1f} s).")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze a directory of recorded runs in parallel.")
+    parser.add_argument('paths', nargs='+', help="directories (searched recursively) or run files")
+    parser.add_argument('--out', default='batch_report', help="output directory")
+    parser.add_argument('--jobs', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--pattern', action='append', help=f"file pattern, repeatable (default: {' '.join(RUN_PATTERNS)})")
+    parser.add_argument('--chunk', type=int, default=CHUNK_SAMPLES, help="samples per streamed chunk")
+    parser.add_argument('--bin-width', type=float, default=BIN_WIDTH_S, help="time bin (s)")
+    parser.add_argument('--nperseg', type=int, default=WELCH_NPERSEG, help="Welch segment length")
+    parser.add_argument('--beta', type=float, default=None, help="NTC beta for .cap files (default: characterize.BETA)")
+    parser.add_argument('--r-fixed', type=float, default=None, help="divider resistor for .cap files (ohm)")
+    parser.add_argument('--no-plot', action='store_true', help="summary table only")
+    parser.add_argument('--cache', nargs='?', const='', default=None, metavar='DIR',
+                        help="reuse results of unchanged runs (default dir: see incubator/cache.py)")
+    parser.add_argument('--cache-mb', type=float, default=None, help="cache size bound (default 1024 MB)")
+    args = parser.parse_args()
+
+    cache_dir = None
+    if args.cache is not None:
+        from .cache import DEFAULT_DIR
+
+        cache_dir = args.cache or DEFAULT_DIR
+
+    results = run_batch(args.paths, args.out, jobs=args.jobs, patterns=tuple(args.pattern or RUN_PATTERNS),
+                        plot=not args.no_plot, bin_width=args.bin_width, nperseg=args.nperseg,
+                        chunk_samples=args.chunk, beta=args.beta, r_fixed=args.r_fixed, cache_dir=cache_dir,
+                        cache_bytes=int(args.cache_mb * 1e6) if args.cache_mb else None)
+    failed = [r['row']['sensor'] for r in results if r['row']['error']]
+    if failed:
+        print(f"{len(failed)} runs failed: {', '.join(failed)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,293 @@
+"""
+Throughput / latency benchmark for the host-side acquisition pipelines.
+
+Everything runs in memory on synthetic data, no hardware needed:
+
+  characterization  'S'...'E' block stream -> frame parsing -> ADC conversion
+                    -> per-sample bookkeeping -> binning -> Welch -> Allan
+  pid               "temp,setpoint,pwm" lines -> line reader thread -> parsing
+                    -> binary log / CSV export -> plot data update, plus the
+                    end-to-end latency from a line arriving to it being plotted
+
+Results are printed (or written with --output) as JSON so runs can be
+compared across versions.
+
+Usage:
+    python -m incubator.benchmark --output bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+
+from .allan import oadev
+from .binary_log import BinaryLogWriter, export_csv
+from .binned_stats import StreamingBinner
+from .frame_parser import BlockFrameParser, HEADER
+from .live_plot import LiveSeries
+from .ntc_lookup import BetaModel, NTCLookupTable
+from .serial_reader import SerialLineReader, parse_pid_line
+from .streaming_welch import StreamingWelch
+from .timeseries import TimeSeriesStore
+
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_bytes():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class StageTimer:
+    """
+    Accumulates wall time per named stage. With memory tracing enabled
+    (tracemalloc, slows everything down noticeably) also the peak memory
+    allocated inside each stage.
+    """
+
+    def __init__(self):
+        self.elapsed = {}
+        self.peak_bytes = {}
+        self.items = {}
+
+    def run(self, name, items, func, *args):
+        # Without reset_peak (Python < 3.9) the peak would span all earlier stages
+        tracing = tracemalloc.is_tracing() and hasattr(tracemalloc, 'reset_peak')
+        if tracing:
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        result = func(*args)
+        self.elapsed[name] = self.elapsed.get(name, 0.0) + time.perf_counter() - start
+        if tracing:
+            _, peak = tracemalloc.get_traced_memory()
+            self.peak_bytes[name] = max(self.peak_bytes.get(name, 0), peak - base)
+        self.items[name] = self.items.get(name, 0) + items
+        return result
+
+    def report(self):
+        stages = {}
+        for name, elapsed in self.elapsed.items():
+            n = self.items[name]
+            stages[name] = {
+                'seconds': elapsed,
+                'samples': n,
+                'samples_per_s': n / elapsed if elapsed > 0 else None,
+                'us_per_sample': 1e6 * elapsed / n if n else None,
+                'peak_bytes': self.peak_bytes.get(name),
+            }
+        return stages
+
+
+def synthetic_block_stream(n_samples, block_samples, fs, rng):
+    """ADC blocks around 37 °C with white noise, encoded like the firmware."""
+    lut_model = BetaModel()
+    r_ntc = lut_model.r0 * np.exp(lut_model.beta * (1.0 / (37.0 + 273.15) - 1.0 / lut_model.t0_k))
+    center = 1023.0 * 10000.0 / (10000.0 + r_ntc)
+    n_blocks = n_samples // block_samples
+    adc = np.clip(np.round(center + rng.normal(0.0, 1.0, n_blocks * block_samples)), 1, 1022)
+    adc = adc.astype('<u2').reshape(n_blocks, block_samples)
+    header = HEADER.pack(block_samples, int(1e6 * block_samples / fs))
+    return b''.join(b'S' + header + row.tobytes() + b'E' for row in adc), n_blocks * block_samples
+
+
+def bench_characterization(n_samples, block_samples, fs, chunk_bytes, seed):
+    rng = np.random.default_rng(seed)
+    stream, n_samples = synthetic_block_stream(n_samples, block_samples, fs, rng)
+    timer = StageTimer()
+    lut = NTCLookupTable(BetaModel())
+    parser = BlockFrameParser()
+    binner = StreamingBinner(1.0)
+    welch = StreamingWelch(2048)
+    store = TimeSeriesStore((('time', np.float64), ('temperature', np.float64), ('voltage', np.float64)),
+                            capacity=1 << 16)
+    block_duration_s = block_samples / fs
+    offsets = np.arange(block_samples) / block_samples * block_duration_s
+    t_block = 0.0
+
+    view = memoryview(stream)
+    for start in range(0, len(view), chunk_bytes):
+        chunk = view[start:start + chunk_bytes]
+        blocks = timer.run('parse', 0, parser.feed, chunk)
+        for block in blocks:
+            n = block.num_samples
+            timer.items['parse'] += n
+            temps, volts, valid = timer.run('convert', n, lut.convert, block.samples)
+
+            def bookkeeping():
+                times = t_block + offsets[:n]
+                store.extend(times[valid], temps[valid], volts[valid])
+                return times
+
+            times = timer.run('bookkeeping', n, bookkeeping)
+            timer.run('binning', n, lambda: binner.update(times[valid], temperature=temps[valid],
+                                                          voltage=volts[valid]))
+            timer.run('welch', n, welch.update, temps[valid])
+            t_block += block_duration_s
+
+    temps_np = store['temperature']
+    timer.run('allan', len(temps_np), oadev, temps_np, fs)
+
+    stages = timer.report()
+    total = sum(s['seconds'] for s in stages.values())
+    return {
+        'samples': n_samples,
+        'bytes': len(stream),
+        'block_samples': block_samples,
+        'frames': parser.frames_received,
+        'samples_per_s': n_samples / total if total else None,
+        'stages': stages,
+    }
+
+
+class _ReplaySerial:
+    """Minimal pyserial stand-in fed from memory by a producer thread."""
+
+    port = 'replay'
+
+    def __init__(self):
+        self._chunks = []
+        self._lock = threading.Lock()
+        self._data = threading.Event()
+
+    def push(self, data):
+        with self._lock:
+            self._chunks.append(data)
+        self._data.set()
+
+    @property
+    def in_waiting(self):
+        with self._lock:
+            return sum(len(c) for c in self._chunks)
+
+    def read(self, size=1):
+        if not self._data.wait(0.01):
+            return b''
+        with self._lock:
+            data = b''.join(self._chunks)
+            self._chunks = []
+            self._data.clear()
+        return data
+
+
+def bench_pid(n_lines, line_rate, frame_interval, seed):
+    rng = np.random.default_rng(seed)
+    temps = 37.0 + rng.normal(0.0, 0.05, n_lines)
+    pwms = rng.integers(0, 256, n_lines)
+    payload = [f"{t:.2f},37.00,{p}\r\n".encode() for t, p in zip(temps, pwms)]
+
+    timer = StageTimer()
+    ser = _ReplaySerial()
+    reader = SerialLineReader(ser, clock=time.perf_counter)
+    temp_series = LiveSeries(600.0, 1000)
+    pwm_series = LiveSeries(600.0, 1000)
+    latencies = []
+
+    with tempfile.TemporaryDirectory(prefix='bench_') as workdir:
+        log_path = os.path.join(workdir, 'bench.bin')
+        log_writer = BinaryLogWriter(log_path, start_time=0.0)
+
+        def produce():
+            period = 1.0 / line_rate
+            start = time.perf_counter()
+            for i, line in enumerate(payload):
+                delay = start + i * period - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                ser.push(line)
+
+        producer = threading.Thread(target=produce, daemon=True)
+        reader.start()
+        producer.start()
+        received = 0
+        next_frame = time.perf_counter()
+        deadline = next_frame + n_lines / line_rate + 5.0
+        while received < n_lines and time.perf_counter() < deadline:
+            next_frame += frame_interval
+            time.sleep(max(0.0, next_frame - time.perf_counter()))
+            lines = reader.drain()
+            for receive_time, line_bytes in lines:
+                parsed = timer.run('parse', 1, parse_pid_line, line_bytes)
+                if parsed is None:
+                    continue
+                temp, setpoint, pwm = parsed
+                timer.run('log', 1, log_writer.append, receive_time, temp, setpoint, pwm)
+                timer.run('plot_append', 1, lambda: (temp_series.append(receive_time, temp),
+                                                     pwm_series.append(receive_time, pwm)))
+            if lines:
+                timer.run('plot_update', len(lines), lambda: (temp_series.xy(), pwm_series.xy()))
+                done = time.perf_counter()
+                latencies.extend(done - t for t, _ in lines)
+                received += len(lines)
+        reader.stop()
+        log_writer.close()
+        timer.run('csv_export', received, export_csv, log_path, os.path.join(workdir, 'bench.csv'))
+
+    latencies_ms = 1e3 * np.array(latencies) if latencies else np.zeros(1)
+    return {
+        'lines': n_lines,
+        'received': received,
+        'dropped': reader.dropped,
+        'line_rate_hz': line_rate,
+        'frame_interval_s': frame_interval,
+        'latency_ms': {**{f'p{q}': float(np.percentile(latencies_ms, q)) for q in (50, 90, 99, 99.9)},
+                       'max': float(latencies_ms.max())},
+        'stages': timer.report(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the host-side acquisition pipelines.")
+    parser.add_argument('--samples', type=int, default=1_000_000, help="ADC samples for the characterization run")
+    parser.add_argument('--block', type=int, default=200, help="samples per block")
+    parser.add_argument('--fs', type=float, default=1000.0, help="nominal sample rate (Hz)")
+    parser.add_argument('--chunk-bytes', type=int, default=4096, help="bytes per simulated serial read")
+    parser.add_argument('--lines', type=int, default=20_000, help="telemetry lines for the PID run")
+    parser.add_argument('--line-rate', type=float, default=10_000.0, help="telemetry lines per second")
+    parser.add_argument('--frame-interval', type=float, default=0.2, help="plot frame interval (s)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="report per-stage peak allocations (tracemalloc, slows timings)")
+    parser.add_argument('--output', help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    if args.trace_memory:
+        tracemalloc.start()
+    result = {
+        'meta': {
+            'timestamp': time.time(),
+            'python': sys.version.split()[0],
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+        },
+        'characterization': bench_characterization(args.samples, args.block, args.fs,
+                                                    args.chunk_bytes, args.seed),
+        'pid': bench_pid(args.lines, args.line_rate, args.frame_interval, args.seed),
+    }
+    result['peak_rss_bytes'] = peak_rss_bytes()
+    if args.trace_memory:
+        tracemalloc.stop()
+
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
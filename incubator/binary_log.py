@@ -0,0 +1,150 @@
+import csv
+import os
+import struct
+import time
+
+import numpy as np
+
+MAGIC = b'INCLOG01'
+HEADER = struct.Struct('<8sHHd')  # magic, header_size, record_size, start_time (unix epoch)
+HEADER_SIZE = 64
+
+# One fixed-width record per sample. "time" is seconds since start_time.
+LOG_DTYPE = np.dtype([
+    ('time', '<f8'),
+    ('temperature', '<f4'),
+    ('setpoint', '<f4'),
+    ('pwm', 'u1'),
+])
+
+CSV_HEADER = ["Zeit (s)", "Temperatur (°C)", "PWM"]
+
+
+class BinaryLogWriter:
+    """
+    Buffered writer for the binary temperature log.
+
+    Samples are collected in a preallocated record array and written as one
+    chunk when it is full. The file is fsync'ed at most every
+    `fsync_interval` seconds (and on close), so a crash loses at most one
+    chunk plus the unsynced tail.
+    """
+
+    def __init__(self, path, start_time=None, chunk_records=1024, fsync_interval=10.0):
+        self.path = path
+        self.start_time = time.time() if start_time is None else float(start_time)
+        self.fsync_interval = float(fsync_interval)
+        self._chunk = np.zeros(int(chunk_records), dtype=LOG_DTYPE)
+        self._count = 0
+        self._last_fsync = time.monotonic()
+        self.records_written = 0
+
+        self._file = open(path, 'wb')
+        header = HEADER.pack(MAGIC, HEADER_SIZE, LOG_DTYPE.itemsize, self.start_time)
+        self._file.write(header.ljust(HEADER_SIZE, b'\0'))
+
+    def append(self, t, temperature, setpoint, pwm):
+        self._chunk[self._count] = (t, temperature, setpoint, pwm)
+        self._count += 1
+        if self._count == len(self._chunk):
+            self.flush()
+
+    def flush(self, sync=False):
+        if self._count:
+            self._file.write(self._chunk[:self._count].tobytes())
+            self.records_written += self._count
+            self._count = 0
+        self._file.flush()
+        now = time.monotonic()
+        if sync or now - self._last_fsync >= self.fsync_interval:
+            os.fsync(self._file.fileno())
+            self._last_fsync = now
+
+    def close(self):
+        if not self._file.closed:
+            self.flush(sync=True)
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class BinaryLogReader:
+    """
+    Memory-mapped reader for logs written by BinaryLogWriter.
+
+    Only the pages that are actually accessed are read from disk, so a time
+    range can be extracted from a multi-GB log without parsing it. A partial
+    record at the end of the file (e.g. after a crash) is ignored.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            raw = f.read(HEADER.size)
+        if len(raw) < HEADER.size:
+            raise ValueError(f"{path}: file too short for a log header")
+        magic, header_size, record_size, start_time = HEADER.unpack(raw)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not a binary temperature log (magic {magic!r})")
+        if record_size != LOG_DTYPE.itemsize:
+            raise ValueError(f"{path}: unsupported record size {record_size}")
+        self.start_time = start_time
+
+        n_records = (os.path.getsize(path) - header_size) // record_size
+        if n_records > 0:
+            self.records = np.memmap(path, dtype=LOG_DTYPE, mode='r',
+                                     offset=header_size, shape=(n_records,))
+        else:
+            self.records = np.zeros(0, dtype=LOG_DTYPE)
+
+    def __len__(self):
+        return len(self.records)
+
+    def index_range(self, t_start=None, t_end=None):
+        """Returns (i0, i1) such that records[i0:i1] covers t_start <= time < t_end."""
+        times = self.records['time']
+        i0 = 0 if t_start is None else int(np.searchsorted(times, t_start, side='left'))
+        i1 = len(times) if t_end is None else int(np.searchsorted(times, t_end, side='left'))
+        return i0, max(i0, i1)
+
+    def read(self, t_start=None, t_end=None):
+        """
+        Returns the columns for t_start <= time < t_end as a dict of NumPy arrays
+        ('time', 'temperature', 'setpoint', 'pwm').
+        """
+        i0, i1 = self.index_range(t_start, t_end)
+        chunk = self.records[i0:i1]
+        return {name: np.array(chunk[name]) for name in LOG_DTYPE.names}
+
+    def export_csv(self, csv_path, t_start=None, t_end=None, chunk_records=100000):
+        """Writes the log (or a time range of it) in the original CSV layout."""
+        i0, i1 = self.index_range(t_start, t_end)
+        with open(csv_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_HEADER)
+            for start in range(i0, i1, chunk_records):
+                chunk = self.records[start:min(start + chunk_records, i1)]
+                writer.writerows(zip(np.round(chunk['time'], 2).tolist(),
+                                     np.round(chunk['temperature'].astype(np.float64), 2).tolist(),
+                                     chunk['pwm'].tolist()))
+        return i1 - i0
+
+
+def open_reader(path):
+    """BinaryLogReader, or compressed_log.CompressedLogReader for a compressed log (by its magic)."""
+    from .compressed_log import MAGIC as COMPRESSED_MAGIC, CompressedLogReader
+
+    with open(path, 'rb') as f:
+        magic = f.read(len(COMPRESSED_MAGIC))
+    if magic == COMPRESSED_MAGIC:
+        return CompressedLogReader(path)
+    return BinaryLogReader(path)
+
+
+def export_csv(log_path, csv_path, t_start=None, t_end=None):
+    """Converts a binary or compressed log to CSV. Returns the number of rows written."""
+    return open_reader(log_path).export_csv(csv_path, t_start, t_end)
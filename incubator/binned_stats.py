@@ -0,0 +1,117 @@
+import numpy as np
+
+
+class StreamingBinner:
+    """
+    Online per-bin count / mean / variance for one or more channels.
+
+    Samples are assigned to fixed-width time bins relative to the first
+    sample (bin k covers [t0 + k*w, t0 + (k+1)*w)). Each block is reduced
+    with bincount and merged into the running per-bin statistics with the
+    parallel form of Welford's algorithm (Chan et al.), so the mean/std
+    series is available at any time during acquisition.
+    """
+
+    def __init__(self, bin_width=1.0, channels=('temperature', 'voltage'), t0=None):
+        self.bin_width = float(bin_width)
+        self.channels = tuple(channels)
+        self.t0 = t0
+        self.n_bins = 0
+        self._count = np.zeros(64)
+        self._mean = {name: np.zeros(64) for name in self.channels}
+        self._m2 = {name: np.zeros(64) for name in self.channels}
+
+    def _ensure_capacity(self, n):
+        capacity = len(self._count)
+        if n <= capacity:
+            return
+        while capacity < n:
+            capacity *= 2
+        self._count = np.resize(self._count, capacity)
+        self._count[self.n_bins:] = 0
+        for stats in (self._mean, self._m2):
+            for name in self.channels:
+                grown = np.zeros(capacity)
+                grown[:self.n_bins] = stats[name][:self.n_bins]
+                stats[name] = grown
+
+    def update(self, times, **values):
+        """
+        Adds a block of samples. `values` holds one array per channel,
+        e.g. update(t, temperature=temps, voltage=volts).
+        """
+        times = np.asarray(times, dtype=np.float64)
+        if len(times) == 0:
+            return
+        if self.t0 is None:
+            self.t0 = float(times[0])
+
+        idx = np.floor((times - self.t0) / self.bin_width).astype(np.intp)
+        np.maximum(idx, 0, out=idx)
+        lo = int(idx.min())
+        hi = int(idx.max()) + 1
+        self._ensure_capacity(hi)
+        self.n_bins = max(self.n_bins, hi)
+
+        local = idx - lo
+        n_b = np.bincount(local, minlength=hi - lo).astype(np.float64)
+        has_b = n_b > 0
+        n_a = self._count[lo:hi]
+        n = n_a + n_b
+
+        for name in self.channels:
+            v = np.asarray(values[name], dtype=np.float64)
+            mean_b = np.zeros(hi - lo)
+            np.divide(np.bincount(local, weights=v, minlength=hi - lo), n_b, out=mean_b, where=has_b)
+            m2_b = np.bincount(local, weights=(v - mean_b[local]) ** 2, minlength=hi - lo)
+
+            mean_a = self._mean[name][lo:hi]
+            m2_a = self._m2[name][lo:hi]
+            delta = mean_b - mean_a
+            frac_b = np.zeros(hi - lo)
+            np.divide(n_b, n, out=frac_b, where=has_b)
+            mean_a += delta * frac_b
+            m2_a += m2_b + delta ** 2 * n_a * frac_b
+
+        self._count[lo:hi] = n
+
+    def series(self, channel):
+        """
+        Returns (bin_centers, means, stds) for all non-empty bins.
+        Times are relative to t0; std is the population std (like np.std).
+        """
+        count = self._count[:self.n_bins]
+        filled = count > 0
+        centers = (np.arange(self.n_bins) + 0.5) * self.bin_width
+        means = self._mean[channel][:self.n_bins]
+        variances = self._m2[channel][:self.n_bins][filled] / count[filled]
+        return centers[filled], means[filled].copy(), np.sqrt(variances)
+
+    def counts(self):
+        return self._count[:self.n_bins].copy()
+
+
+def binned_stats(times, values, bin_width=1.0, t0=None):
+    """
+    Vectorized post-hoc equivalent of StreamingBinner for complete arrays.
+    Returns (bin_centers, counts, means, stds) for all non-empty bins.
+    """
+    times = np.asarray(times, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    if len(times) == 0:
+        empty = np.zeros(0)
+        return empty, empty, empty, empty
+    if t0 is None:
+        t0 = times[0]
+
+    idx = np.floor((times - t0) / bin_width).astype(np.intp)
+    np.maximum(idx, 0, out=idx)
+    counts = np.bincount(idx).astype(np.float64)
+    filled = counts > 0
+    means = np.zeros(len(counts))
+    np.divide(np.bincount(idx, weights=values), counts, out=means, where=filled)
+    m2 = np.bincount(idx, weights=(values - means[idx]) ** 2, minlength=len(counts))
+
+    centers = (np.arange(len(counts)) + 0.5) * bin_width
+    stds = np.sqrt(m2[filled] / counts[filled])
+    return centers[filled], counts[filled], means[filled], stds
@@ -0,0 +1,189 @@
+"""
+Content-addressed on-disk cache for analysis results.
+
+An entry is a set of NumPy arrays stored as one uncompressed .npz file,
+named by the hash of
+
+    product name + data digest + parameters (JSON, sorted keys)
+
+where the data digest is a BLAKE2b hash of the input arrays (dtype, shape
+and bytes, read in chunks so memmaps are never loaded whole) or of a file.
+Unchanged data with unchanged parameters therefore always finds its entry,
+and any change of samples, fs, nperseg, tau grid, BETA/R_FIXED, ... misses.
+
+Concurrency: entries are written to a temporary file and renamed into
+place, so readers see either nothing or a complete entry; a reader that
+loses a race against eviction just gets a miss. Reads touch the file's
+mtime, and put() evicts the least recently used entries once the cache
+exceeds `max_bytes`. No locks are needed, so several processes (e.g. the
+batch workers) can share one directory.
+
+Usage:
+    python -m incubator analyze run.npz --cache
+    python -m incubator.batch runs/ --cache ~/.cache/incubator
+    python -m incubator.cache --clear
+"""
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import time
+import zipfile
+
+import numpy as np
+
+DEFAULT_DIR = os.environ.get('INCUBATOR_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'incubator'))
+DEFAULT_MAX_BYTES = 1 << 30
+HASH_CHUNK_BYTES = 1 << 24
+
+
+def data_digest(*arrays):
+    """Hex digest of the arrays' dtype, shape and contents (None entries allowed)."""
+    h = hashlib.blake2b(digest_size=20)
+    for a in arrays:
+        if a is None:
+            h.update(b'none;')
+            continue
+        a = np.asarray(a)
+        h.update(f"{a.dtype.str}{a.shape};".encode())
+        flat = a.reshape(-1)
+        step = max(1, HASH_CHUNK_BYTES // max(a.itemsize, 1))
+        for start in range(0, len(flat), step):
+            h.update(np.ascontiguousarray(flat[start:start + step]).data)
+    return h.hexdigest()
+
+
+def file_digest(path):
+    """Hex digest of a file's contents."""
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+class AnalysisCache:
+    """Size-bounded LRU cache of array dicts, keyed by (product, data digest, parameters)."""
+
+    def __init__(self, directory=DEFAULT_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = int(max_bytes)
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, product, digest, params=None):
+        text = json.dumps([product, digest, params or {}], sort_keys=True, default=float)
+        return hashlib.blake2b(text.encode(), digest_size=20).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.npz')
+
+    def get(self, key):
+        """Returns the stored dict of arrays, or None."""
+        path = self._path(key)
+        try:
+            with np.load(path) as f:
+                entry = {name: f[name] for name in f.files}
+            os.utime(path)
+        except (OSError, ValueError, zipfile.BadZipFile):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def put(self, key, arrays):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-', suffix='.npz')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        self.evict()
+
+    def cached(self, product, digest, params, compute):
+        """
+        Returns the entry for (product, digest, params), calling
+        compute() -> dict of arrays and storing its result on a miss.
+        """
+        key = self.key(product, digest, params)
+        entry = self.get(key)
+        if entry is None:
+            entry = {name: np.asarray(value) for name, value in compute().items()}
+            self.put(key, entry)
+        return entry
+
+    def _entries(self):
+        entries = []
+        with os.scandir(self.directory) as it:
+            for e in it:
+                if not e.name.endswith('.npz') or e.name.startswith('.tmp-'):
+                    continue
+                try:
+                    st = e.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, e.path))
+        return entries
+
+    def size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self, max_bytes=None):
+        """Deletes least recently used entries until the cache fits. Returns the number deleted."""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        deleted = 0
+        for _, size, path in sorted(entries):
+            if total <= max_bytes:
+                break
+            try:
+                os.unlink(path)
+                deleted += 1
+            except OSError:
+                pass  # evicted by another process
+            total -= size
+        self._remove_stale_temporaries()
+        return deleted
+
+    def _remove_stale_temporaries(self, max_age_s=3600.0):
+        """Leftovers of writers that were killed mid-put()."""
+        now = time.time()
+        with os.scandir(self.directory) as it:
+            for e in it:
+                if e.name.startswith('.tmp-'):
+                    try:
+                        if now - e.stat().st_mtime > max_age_s:
+                            os.unlink(e.path)
+                    except OSError:
+                        pass
+
+    def clear(self):
+        return self.evict(0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or clear the analysis cache.")
+    parser.add_argument('--dir', default=DEFAULT_DIR, help=f"cache directory (default: {DEFAULT_DIR})")
+    parser.add_argument('--clear', action='store_true', help="delete all entries")
+    parser.add_argument('--max-mb', type=float, default=None, help="evict down to this size")
+    args = parser.parse_args()
+
+    cache = AnalysisCache(args.dir)
+    if args.clear:
+        print(f"{cache.clear()} entries deleted.")
+    elif args.max_mb is not None:
+        print(f"{cache.evict(int(args.max_mb * 1e6))} entries evicted.")
+    entries = cache._entries()
+    print(f"{args.dir}: {len(entries)} entries, {sum(s for _, s, _ in entries) / 1e6:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,293 @@
+"""
+Raw serial capture and replay.
+
+A capture file holds the exact bytes received from the port, one record
+per read() with the host receive time:
+
+    header   CAPTURE_MAGIC, header_size u2, start_time f8 (unix epoch),
+             baud u4, port 32s                     (padded to 64 bytes)
+    chunk    t f8 (s since start_time), length u4, `length` raw bytes
+
+TeeSerial wraps an open pyserial port and records everything read through
+it. ReplaySerial is a pyserial stand-in that plays a capture back through
+a memory map at real time (speed=1), N times faster (speed=N) or as fast
+as possible (speed=0). Every read returns bytes of one recorded chunk
+only, and clock() returns that chunk's original receive time, so the
+parsing and timestamping code sees the same reads as during the run.
+
+Usage:
+    python -m incubator monitor --port COM6 --capture run.cap
+    python -m incubator monitor --replay run.cap --speed 0 --no-plot
+    python -m incubator characterize --replay ntc.cap --speed 0
+    python -m incubator.capture run.cap          # summary of a capture
+"""
+import argparse
+import mmap
+import struct
+import time
+
+import numpy as np
+
+CAPTURE_MAGIC = b'INCCAP01'
+HEADER = struct.Struct('<8sHdI32s')
+HEADER_SIZE = 64
+CHUNK = struct.Struct('<dI')
+
+
+class CaptureWriter:
+    """Appends (receive time, bytes) records to a capture file."""
+
+    def __init__(self, path, start_time=None, port='', baud=0, buffer_size=1 << 20):
+        self.path = path
+        self.start_time = time.time() if start_time is None else float(start_time)
+        self.bytes_written = 0
+        self.chunks_written = 0
+        self._file = open(path, 'wb', buffering=buffer_size)
+        header = HEADER.pack(CAPTURE_MAGIC, HEADER_SIZE, self.start_time, int(baud or 0),
+                             str(port or '').encode('utf-8')[:32])
+        self._file.write(header.ljust(HEADER_SIZE, b'\0'))
+
+    def write(self, data, receive_time=None):
+        if not data:
+            return
+        t = (time.time() if receive_time is None else receive_time) - self.start_time
+        self._file.write(CHUNK.pack(t, len(data)))
+        self._file.write(data)
+        self.bytes_written += len(data)
+        self.chunks_written += 1
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TeeSerial:
+    """
+    Wraps an open pyserial port; every byte read through read(),
+    readinto() or readline() is also written to a CaptureWriter. All other
+    attributes (timeout, in_waiting, write, ...) go to the wrapped port.
+    """
+
+    def __init__(self, ser, writer, clock=time.time):
+        object.__setattr__(self, '_ser', ser)
+        object.__setattr__(self, 'writer', writer)
+        object.__setattr__(self, '_clock', clock)
+
+    def __getattr__(self, name):
+        return getattr(self._ser, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._ser, name, value)
+
+    def read(self, size=1):
+        data = self._ser.read(size)
+        self.writer.write(data, self._clock())
+        return data
+
+    def readinto(self, buffer):
+        n = self._ser.readinto(buffer)
+        if n:
+            self.writer.write(memoryview(buffer)[:n], self._clock())
+        return n
+
+    def readline(self, *args):
+        data = self._ser.readline(*args)
+        self.writer.write(data, self._clock())
+        return data
+
+    def close(self):
+        self._ser.close()
+        self.writer.close()
+
+
+def tee(ser, path):
+    """Returns `ser` wrapped so that all received bytes are captured to `path`."""
+    return TeeSerial(ser, CaptureWriter(path, port=getattr(ser, 'port', ''), baud=getattr(ser, 'baudrate', 0)))
+
+
+class CaptureReader:
+    """
+    Memory-mapped capture file. `times`, `offsets` and `lengths` index the
+    chunks (built with one pass over the chunk headers); chunk(i) returns a
+    memoryview without copying.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            header = f.read(HEADER_SIZE)
+            if len(header) < HEADER.size:
+                raise ValueError(f"{path}: not a capture file")
+            magic, header_size, self.start_time, self.baud, port = HEADER.unpack_from(header)
+            if magic != CAPTURE_MAGIC:
+                raise ValueError(f"{path}: not a capture file (magic {magic!r})")
+            self.port = port.rstrip(b'\0').decode('utf-8', errors='replace')
+            f.seek(0, 2)
+            size = f.tell()
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        self._view = memoryview(self._mmap)
+
+        times, offsets, lengths = [], [], []
+        pos = header_size
+        unpack = CHUNK.unpack_from
+        while pos + CHUNK.size <= size:
+            t, n = unpack(self._mmap, pos)
+            if pos + CHUNK.size + n > size:
+                break  # truncated last chunk (capture still being written / crash)
+            times.append(t)
+            offsets.append(pos + CHUNK.size)
+            lengths.append(n)
+            pos += CHUNK.size + n
+        self.times = np.array(times, dtype=np.float64)
+        self.offsets = np.array(offsets, dtype=np.int64)
+        self.lengths = np.array(lengths, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.times)
+
+    @property
+    def total_bytes(self):
+        return int(self.lengths.sum())
+
+    def chunk(self, i):
+        start = int(self.offsets[i])
+        return self._view[start:start + int(self.lengths[i])]
+
+    def close(self):
+        self._view.release()
+        if isinstance(self._mmap, mmap.mmap):
+            self._mmap.close()
+
+
+class ReplaySerial:
+    """
+    pyserial-like read side over a capture (see module docstring).
+    `at_eof` becomes True once all chunks have been read; writes are
+    ignored.
+    """
+
+    def __init__(self, path, speed=1.0, timeout=1.0):
+        self.capture = CaptureReader(path)
+        self.speed = float(speed)
+        self.timeout = timeout
+        self.port = f"replay:{path}"
+        self.baudrate = self.capture.baud
+        self.start_time = self.capture.start_time
+        self.is_open = True
+        self.at_eof = len(self.capture) == 0
+        self._ends = np.cumsum(self.capture.lengths)
+        self._i = 0
+        self._pos = 0
+        self._wall0 = None
+        self._t0 = self.capture.times[0] if len(self.capture) else 0.0
+        self._t_last = self._t0
+
+    def clock(self):
+        """Original receive time (unix epoch) of the chunk last read from."""
+        return self.start_time + self._t_last
+
+    def _capture_now(self):
+        """Capture time that has been 'reached' by wall-clock pacing."""
+        if self._wall0 is None:
+            self._wall0 = time.monotonic()
+        if self.speed <= 0:
+            return np.inf
+        return self._t0 + (time.monotonic() - self._wall0) * self.speed
+
+    def _wait(self, timeout):
+        """Waits until the current chunk is due. Returns False on timeout or EOF."""
+        if self._i >= len(self.capture):
+            self.at_eof = True
+            return False
+        delay = (self.capture.times[self._i] - self._capture_now()) / self.speed if self.speed > 0 else 0.0
+        if delay > 0:
+            if timeout is not None and delay > timeout:
+                time.sleep(timeout)
+                return False
+            time.sleep(delay)
+        return True
+
+    def _take(self, size):
+        data = self.capture.chunk(self._i)[self._pos:self._pos + size]
+        self._t_last = self.capture.times[self._i]
+        self._pos += len(data)
+        if self._pos >= self.capture.lengths[self._i]:
+            self._i += 1
+            self._pos = 0
+        return data
+
+    @property
+    def in_waiting(self):
+        if self._i >= len(self.capture):
+            return 0
+        due = np.searchsorted(self.capture.times, self._capture_now(), side='right')
+        if due <= self._i:
+            return 0
+        return int(self._ends[due - 1] - self._ends[self._i] + self.capture.lengths[self._i] - self._pos)
+
+    def read(self, size=1):
+        if not self._wait(self.timeout):
+            return b''
+        return bytes(self._take(size))
+
+    def readinto(self, buffer):
+        if not self._wait(self.timeout):
+            return 0
+        data = self._take(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def readline(self, size=-1):
+        line = bytearray()
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while size < 0 or len(line) < size:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not self._wait(remaining):
+                break
+            chunk = self.capture.chunk(self._i)[self._pos:]
+            idx = bytes(chunk).find(b'\n')
+            want = len(chunk) if idx < 0 else idx + 1
+            if size >= 0:
+                want = min(want, size - len(line))
+            line += self._take(want)
+            if line.endswith(b'\n'):
+                break
+        return bytes(line)
+
+    def reset_input_buffer(self):
+        pass
+
+    def write(self, data):
+        return len(data)
+
+    def close(self):
+        self.is_open = False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summary of a raw serial capture.")
+    parser.add_argument('path')
+    args = parser.parse_args()
+
+    cap = CaptureReader(args.path)
+    duration = cap.times[-1] - cap.times[0] if len(cap) else 0.0
+    print(f"{args.path}: port {cap.port or '?'} @ {cap.baud} Bd, started "
+          f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(cap.start_time))}")
+    print(f"{len(cap)} reads, {cap.total_bytes} bytes over {duration:.1f} s "
+          f"({cap.total_bytes / duration if duration > 0 else 0:.0f} B/s)")
+    if len(cap) > 1:
+        gaps = np.diff(cap.times)
+        print(f"read interval: median {np.median(gaps) * 1e3:.2f} ms, max {gaps.max() * 1e3:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,466 @@
+"""
+NTC sensor characterization (NTC Sensor Characterization.ino).
+
+`characterize` acquires 'S'...'E' ADC blocks for a fixed duration, converts
+them with the lookup table and accumulates binned statistics and the Welch
+PSD while the data arrives. Sample times come from the device clock mapped
+onto the host clock (clock_sync.BlockClock), so transfer latency does not
+jitter the time axis and fs is corrected for the oscillator's drift. The
+raw series can be saved (--save run.npz) and analyzed again later with
+`analyze`, which also accepts PID logs (.bin / .zlog / .csv). With
+--no-plot only the numbers are printed and matplotlib is never imported.
+
+--capture keeps the raw serial bytes (see capture.py); `analyze` and
+`characterize --replay` run a capture through the same parser and
+conversion again, e.g. with a corrected --beta / --r-fixed.
+
+Usage:
+    python -m incubator characterize --port COM6 --duration 60 --save run.npz
+    python -m incubator characterize --port COM6 --duration 3600 --capture run.cap
+    python -m incubator analyze run.npz --no-plot
+    python -m incubator analyze run.cap --beta 3380 --no-plot
+"""
+import time
+
+import numpy as np
+
+from . import metrics
+from .binned_stats import StreamingBinner, binned_stats
+from .clock_sync import BlockClock
+from .frame_parser import BlockFrameParser
+from .ntc_lookup import BetaModel, NTCLookupTable
+from .streaming_welch import StreamingWelch
+from .timeseries import TimeSeriesStore
+
+SERIAL_PORT = 'COM6'
+BAUD_RATE = 115200
+MEASUREMENT_DURATION_S = 60
+BIN_WIDTH_S = 1.0
+WELCH_NPERSEG = 2048
+WELCH_MIN_NPERSEG = 64  # shorter runs: segment = whole run, down to this length
+ADEV_TAU_GRID = 'log'  # 'log' (ADEV_TAU_POINTS values) or 'octave'
+ADEV_TAU_POINTS = 50
+
+BETA = 3435.0
+R_FIXED = 10000.0
+R0_NTC = 10000.0
+T0_K = 273.15 + 25.0
+ADC_MAX = 1023.0
+VCC = 5.0
+
+NTC_MODEL = BetaModel(beta=BETA, r0=R0_NTC, t0_k=T0_K)
+# Steinhart-Hart alternative, if calibrated coefficients are available:
+# NTC_MODEL = SteinhartHartModel(a=..., b=..., c=...)
+ADC_LUT = NTCLookupTable(NTC_MODEL, r_fixed=R_FIXED, adc_max=int(ADC_MAX), vcc=VCC)
+
+
+def make_lut(beta=None, r_fixed=None):
+    """ADC_LUT, or a new table with a different BETA and/or R_FIXED (reprocessing captures)."""
+    if beta is None and r_fixed is None:
+        return ADC_LUT
+    model = BetaModel(beta=BETA if beta is None else beta, r0=R0_NTC, t0_k=T0_K)
+    return NTCLookupTable(model, r_fixed=R_FIXED if r_fixed is None else r_fixed, adc_max=int(ADC_MAX), vcc=VCC)
+
+
+def wait_for_ready(ser, timeout=10.0, banner="Arduino ready"):
+    """
+    Reads lines until the firmware banner arrives (replaces the fixed reset
+    delay: returns as soon as the sketch is running). Returns True if found.
+    """
+    deadline = time.monotonic() + timeout
+    ser.timeout = 0.5
+    while time.monotonic() < deadline:
+        line = ser.readline().decode('utf-8', errors='ignore').strip()
+        if line:
+            print(f"Arduino: {line}")
+        if banner in line:
+            return True
+    return False
+
+
+def acquire(ser, duration_s=MEASUREMENT_DURATION_S, lut=ADC_LUT, bin_width=BIN_WIDTH_S,
+            nperseg=WELCH_NPERSEG, verbose=True, clock=time.monotonic):
+    """
+    Reads blocks for duration_s seconds (None: until a replayed capture
+    ends). Returns a dict with the valid 'timestamps', 'temperatures',
+    'voltages' (arrays), the average sample rate 'fs' (samples per host
+    second), the online 'binner', 'welch', 'parser_stats' and the
+    'clock' stats (drift, gaps; see clock_sync.py). For a ReplaySerial pass
+    clock=ser.clock, so blocks keep their original receive times.
+    The sample arrays are views into a TimeSeriesStore (no final copy).
+    """
+    store = TimeSeriesStore((('time', np.float64), ('temperature', np.float64), ('voltage', np.float64)),
+                            capacity=1 << 16)
+    block_clock = BlockClock()
+
+    if duration_s is None:
+        print("Starting data acquisition until the end of the capture...")
+    else:
+        print(f"Starting data acquisition for {duration_s} seconds...")
+    script_start_time = clock()
+    last_receive_time = script_start_time
+
+    ser.timeout = 0.05  # read_from() blocks at most this long when no data is waiting
+    parser = BlockFrameParser()
+    binner = StreamingBinner(bin_width, channels=('temperature', 'voltage'))
+    welch = StreamingWelch(nperseg=nperseg, noverlap=nperseg // 2, detrend='linear')
+    m = metrics.get()
+
+    while duration_s is None or (clock() - script_start_time) < duration_s:
+        blocks = parser.read_from(ser)
+        block_times = []
+        if blocks:
+            last_receive_time = clock()
+            t0 = m.clock()
+            block_times = block_clock.timestamps(last_receive_time,
+                                                 [(b.num_samples, b.duration_micros) for b in blocks])
+            m.stage('timestamps', t0)
+            if m.enabled:
+                m.gauge('sample_rate_hz', block_clock.sample_rate)
+                m.gauge('clock_drift_ppm', block_clock.sync.drift_ppm)
+
+        for (num_samples, duration_micros, adc_values), sample_times in zip(blocks, block_times):
+            if verbose:
+                print(f"Block received: {num_samples} samples, duration: {duration_micros} us "
+                      f"({duration_micros / 1000.0:.2f} ms), {block_clock.sample_rate:.2f} Hz")
+
+            t0 = m.clock()
+            temps_c, volts_r_fixed, valid = lut.convert(adc_values)
+            m.stage('convert', t0)
+
+            t0 = m.clock()
+            store.extend(sample_times[valid], temps_c[valid], volts_r_fixed[valid])
+            m.stage('store', t0)
+            t0 = m.clock()
+            binner.update(sample_times[valid], temperature=temps_c[valid], voltage=volts_r_fixed[valid])
+            m.stage('binning', t0)
+            t0 = m.clock()
+            welch.update(temps_c[valid])
+            m.stage('welch', t0)
+            if m.enabled:
+                n_valid = int(np.count_nonzero(valid))
+                m.count('samples', n_valid)
+                m.count('samples_invalid', num_samples - n_valid)
+
+        if getattr(ser, 'at_eof', False):
+            break
+        if (clock() - last_receive_time) > 5.0:
+            print("Timeout: No data received from Arduino for 5 seconds. Aborting.")
+            break
+
+    print("Data acquisition finished.")
+    parser_stats = parser.stats()
+    print(f"Frames: {parser_stats['frames_received']} ok, {parser_stats['frames_corrupt']} corrupt, "
+          f"{parser_stats['bytes_discarded']} of {parser_stats['bytes_received']} bytes discarded.")
+
+    clock_stats = block_clock.stats()
+    fs = block_clock.mean_sample_rate
+    print(f"Clock: drift {clock_stats['drift_ppm']:+.1f} ppm, latency jitter "
+          f"{clock_stats['latency_scale_s'] * 1e3:.2f} ms, {clock_stats['gaps']} gaps "
+          f"({clock_stats['gap_time_s']:.3f} s), fs {fs:.3f} Hz.")
+    return {
+        'timestamps': store['time'],
+        'temperatures': store['temperature'],
+        'voltages': store['voltage'],
+        'fs': fs,
+        'binner': binner,
+        'welch': welch,
+        'parser_stats': parser_stats,
+        'clock': clock_stats,
+    }
+
+
+def save(path, data):
+    np.savez(path, timestamps=data['timestamps'], temperatures=data['temperatures'],
+             voltages=data['voltages'], fs=data['fs'])
+
+
+def load(path, lut=ADC_LUT):
+    """
+    Loads a run saved with `characterize --save` (.npz) or a PID log
+    (.bin / .zlog / .csv, no voltage channel). Returns the same keys as acquire()
+    without the online accumulators. A raw capture (.cap) is replayed
+    through acquire() as fast as possible and converted with `lut`.
+    """
+    if path.endswith('.cap'):
+        from .capture import ReplaySerial
+
+        ser = ReplaySerial(path, speed=0)
+        data = acquire(ser, None, lut=lut, verbose=False, clock=ser.clock)
+        del data['binner'], data['welch']
+        return data
+    if path.endswith('.npz'):
+        with np.load(path) as f:
+            return {'timestamps': f['timestamps'], 'temperatures': f['temperatures'],
+                    'voltages': f['voltages'], 'fs': float(f['fs'])}
+    if path.endswith('.csv'):
+        table = np.loadtxt(path, delimiter=',', skiprows=1, usecols=(0, 1), ndmin=2)
+        timestamps, temperatures = table[:, 0], table[:, 1]
+    else:
+        from .binary_log import open_reader
+
+        columns = open_reader(path).read()
+        timestamps, temperatures = columns['time'], columns['temperature'].astype(np.float64)
+    fs = 1.0 / float(np.median(np.diff(timestamps))) if len(timestamps) > 1 else 0
+    return {'timestamps': timestamps, 'temperatures': temperatures, 'voltages': None, 'fs': fs}
+
+
+def _binned_product(binner):
+    out = {'bin_width': binner.bin_width}
+    for channel in binner.channels:
+        out['times'], out[f'{channel}_mean'], out[f'{channel}_std'] = binner.series(channel)
+    return out
+
+
+def _psd_product(welch, fs):
+    out = {'n_segments': welch.n_segments, 'n_samples': welch.n_samples}
+    if welch.n_segments:
+        out['frequencies'], out['psd'] = welch.psd(fs)
+    return out
+
+
+def analyze(data, duration_label=None, bin_width=BIN_WIDTH_S, nperseg=WELCH_NPERSEG, plot=True, r_fixed=R_FIXED,
+            cache=None):
+    """
+    Prints the sample rate, mean NETD and best Allan deviation of a run and,
+    with plot=True, shows the binned time series, PSD/ASD and ADEV plots.
+    Reuses data['binner'] / data['welch'] when they were filled online.
+    With a cache.AnalysisCache, the binned statistics, PSD and ADEV curve
+    are looked up by a hash of the samples and the analysis parameters.
+    """
+    timestamps_np = data['timestamps']
+    temperatures_np = data['temperatures']
+    voltages_np = data['voltages']
+    fs = data['fs']
+    if not len(timestamps_np):
+        print("No valid data received.")
+        return
+
+    print("\nProcessing collected data...")
+    if fs > 0:
+        print(f"Average sampling rate (fs): {fs:.2f} Hz")
+    else:
+        print("Warning: No block information available, sampling rate cannot be determined.")
+
+    time_relative_s = timestamps_np - timestamps_np[0]
+    measurement_end_time_s = time_relative_s[-1]
+    if duration_label is None:
+        duration_label = f"{measurement_end_time_s:.0f}"
+
+    digest = None
+    if cache is not None:
+        from .cache import data_digest
+
+        digest = data_digest(timestamps_np, temperatures_np, voltages_np)
+
+    def lookup(product, params, compute):
+        if digest is None:
+            return compute()
+        return cache.cached(product, digest, params, compute)
+
+    def compute_binned():
+        values = {'temperature': temperatures_np}
+        if voltages_np is not None:
+            values['voltage'] = voltages_np
+        out = {'bin_width': bin_width}
+        for channel, series in values.items():
+            out['times'], _, out[f'{channel}_mean'], out[f'{channel}_std'] = binned_stats(
+                timestamps_np, series, bin_width)
+        return out
+
+    def compute_psd():
+        welch = StreamingWelch(nperseg=psd_nperseg, noverlap=psd_nperseg // 2, detrend='linear')
+        welch.update(temperatures_np)
+        return _psd_product(welch, fs)
+
+    if data.get('binner') is not None:
+        binned = _binned_product(data['binner'])
+    else:
+        binned = lookup('binned', {'bin_width': bin_width}, compute_binned)
+    bin_width = float(binned['bin_width'])
+
+    plt = None
+    if plot:
+        import matplotlib.pyplot as plt
+
+    # Per-bin mean/std
+    plot_times, plot_temp_means, plot_temp_stds = binned['times'], binned['temperature_mean'], binned['temperature_std']
+    if plt is not None and len(plot_times):
+        print("Creating temperature time series plot...")
+        plt.figure(figsize=(12, 6))
+        plt.errorbar(plot_times, plot_temp_means, yerr=plot_temp_stds, fmt='-o', capsize=5, label='Temp (°C) ± Std. Dev.')
+        plt.xlabel("Time since measurement start (s)")
+        plt.ylabel("Temperature (°C)")
+        plt.title(f"NTC Temperature Measurement ({duration_label}s) - {bin_width:g}s Intervals")
+        plt.legend()
+        plt.grid(True)
+
+        min_val_t = np.min(plot_temp_means - plot_temp_stds)
+        max_val_t = np.max(plot_temp_means + plot_temp_stds)
+        padding_t = max((max_val_t - min_val_t) * 0.1, 0.1)
+        plt.ylim(min_val_t - padding_t, max_val_t + padding_t)
+        plt.tight_layout()
+
+    if plt is not None and len(plot_times) and voltages_np is not None:
+        plot_volt_means, plot_volt_stds = binned['voltage_mean'], binned['voltage_std']
+        print("Creating voltage time series plot...")
+        plt.figure(figsize=(12, 6))
+        plt.errorbar(plot_times, plot_volt_means, yerr=plot_volt_stds, fmt='-o', capsize=5, color='green', label=f'Voltage across R_fixed ({r_fixed:.0f}Ω) ± Std. Dev.')
+        plt.xlabel("Time since measurement start (s)")
+        plt.ylabel("Voltage (V)")
+        plt.title(f"Voltage Measurement across Fixed Resistor ({duration_label}s) - {bin_width:g}s Intervals (VCC={VCC}V)")
+        plt.legend()
+        plt.grid(True)
+
+        min_val_v = np.min(plot_volt_means - plot_volt_stds)
+        max_val_v = np.max(plot_volt_means + plot_volt_stds)
+        padding_v = max((max_val_v - min_val_v) * 0.1, 0.05)
+        plt.ylim(min_val_v - padding_v, max_val_v + padding_v)
+        plt.tight_layout()
+
+    print("\nPerforming frequency analysis of temperature...")
+    if fs > 0 and len(temperatures_np) > 1:
+        online = data.get('welch')
+        psd_nperseg = min(nperseg, len(temperatures_np))
+        if online is not None and online.n_segments > 0:
+            spectrum = _psd_product(online, fs)
+            psd_nperseg = online.nperseg
+        elif psd_nperseg >= WELCH_MIN_NPERSEG:
+            # post hoc (also for online runs shorter than one segment): the segment shrinks to the run
+            spectrum = lookup('psd', {'fs': fs, 'nperseg': psd_nperseg, 'noverlap': psd_nperseg // 2,
+                                      'window': 'hann', 'detrend': 'linear'}, compute_psd)
+        else:
+            spectrum = None
+        if spectrum is None or spectrum['n_segments'] == 0:
+            print(f"Warning: Not enough data points ({len(temperatures_np)}) for robust PSD analysis with Welch "
+                  f"(min segment length {WELCH_MIN_NPERSEG}).")
+        else:
+            print(f"Welch PSD averaged over {int(spectrum['n_segments'])} segments of {psd_nperseg} samples.")
+            frequencies, psd = spectrum['frequencies'], spectrum['psd']
+
+            valid_indices = frequencies > 0
+            frequencies = frequencies[valid_indices]
+            psd = psd[valid_indices]
+
+            if len(frequencies) > 0:
+                asd = np.sqrt(psd)
+
+                if plt is not None:
+                    plt.figure(figsize=(10, 6))
+                    plt.loglog(frequencies, psd)
+                    plt.title('Power Spectral Density (PSD) of Temperature')
+                    plt.xlabel('Frequency (Hz)')
+                    plt.ylabel('PSD (°C$^2$/Hz)')
+                    plt.grid(True, which='both', linestyle='--', linewidth=0.5)
+                    plt.tight_layout()
+
+                    plt.figure(figsize=(10, 6))
+                    plt.loglog(frequencies, asd)
+                    plt.title('Amplitude Spectral Density (ASD / NETD) of Temperature')
+                    plt.xlabel('Frequency (Hz)')
+                    plt.ylabel('ASD / NETD (°C/$\\sqrt{\\mathrm{Hz}}$)')
+                    plt.grid(True, which='both', linestyle='--', linewidth=0.5)
+                    plt.tight_layout()
+
+                low_freq_cutoff = max(1.0, frequencies[0] * 1.1)
+                high_freq_cutoff = min(fs / 2.1, 1000)
+                if low_freq_cutoff < high_freq_cutoff:
+                    relevant_indices = (frequencies >= low_freq_cutoff) & (frequencies <= high_freq_cutoff)
+                    if np.any(relevant_indices):
+                        mean_netd = np.mean(asd[relevant_indices])
+                        print(f"Mean NETD ({low_freq_cutoff:.1f}-{high_freq_cutoff:.1f} Hz): {mean_netd:.4e} °C/sqrt(Hz)")
+                    else:
+                        print(f"No data in the frequency range {low_freq_cutoff:.1f}-{high_freq_cutoff:.1f} Hz for mean NETD.")
+                else:
+                    print("Frequency range for mean NETD is invalid.")
+            else:
+                print("No valid frequencies > 0 found after Welch method.")
+    elif fs <= 0:
+        print("Sampling rate could not be determined, frequency analysis skipped.")
+    else:
+        print("Too few data points for frequency analysis.")
+
+    print("\nCalculating Allan Deviation of temperature...")
+    if fs > 0 and len(temperatures_np) > 100:
+        from .allan import oadev
+
+        tau0 = 1.0 / fs
+        max_tau = measurement_end_time_s / 3.0
+        if max_tau > tau0:
+            allan = lookup('adev', {'fs': fs, 'kind': ADEV_TAU_GRID, 'points': ADEV_TAU_POINTS},
+                           lambda: oadev(temperatures_np, rate=fs, kind=ADEV_TAU_GRID, points=ADEV_TAU_POINTS)._asdict())
+            tau_out, adev, adev_low, adev_high = allan['taus'], allan['adev'], allan['adev_low'], allan['adev_high']
+            min_adev_idx = np.argmin(adev)
+            min_tau = tau_out[min_adev_idx]
+            min_adev = adev[min_adev_idx]
+            print(f"Best stability (min ADEV): {min_adev:.4e} °C at τ = {min_tau:.2f} s")
+
+            if plt is not None:
+                plt.figure(figsize=(10, 6))
+                plt.loglog(tau_out, adev, '-o', markersize=4)
+                plt.fill_between(tau_out, adev_low, adev_high, alpha=0.3, label='68% confidence (white FM)')
+                plt.title('Allan Deviation of Temperature')
+                plt.xlabel('Averaging time τ (s)')
+                plt.ylabel('Allan Deviation σ(τ) (°C)')
+                plt.grid(True, which='both', linestyle='--', linewidth=0.5)
+                plt.loglog(min_tau, min_adev, 'rs', markersize=8, label=f'Min ADEV @ {min_tau:.2f}s')
+                plt.legend()
+                plt.tight_layout()
+        else:
+            print("Total measurement duration too short for meaningful tau values.")
+    elif fs <= 0:
+        print("Allan Deviation skipped as sampling rate is unknown.")
+    else:
+        print(f"Too few data points ({len(temperatures_np)}) for Allan Deviation analysis.")
+
+    if plt is not None:
+        print("\nShowing all plots...")
+        plt.show()
+
+
+def run(port=SERIAL_PORT, baud=BAUD_RATE, duration_s=MEASUREMENT_DURATION_S, save_path=None,
+        plot=True, verbose=True, capture=None, replay=None, speed=1.0, beta=None, r_fixed=None):
+    """
+    `characterize`: acquisition followed by analyze(). capture=PATH tees
+    the raw bytes into a capture file; replay=PATH reads a capture instead
+    of the port (at `speed` x real time, 0 = as fast as possible).
+    """
+    import serial
+
+    from . import capture as capture_mod
+
+    lut = make_lut(beta, r_fixed)
+    ser = None
+    try:
+        if replay:
+            print(f"Replaying '{replay}' at {'max' if speed <= 0 else f'{speed:g}x'} speed...")
+            ser = capture_mod.ReplaySerial(replay, speed=speed)
+            clock = ser.clock
+        else:
+            print(f"Connecting to Arduino on {port} at {baud} Baud...")
+            ser = serial.Serial(port, baud, timeout=2)
+            clock = time.monotonic
+            if capture:
+                ser = capture_mod.tee(ser, capture)
+                print(f"Capturing raw serial data to '{capture}'.")
+        print("Waiting for start message from Arduino...")
+        if not wait_for_ready(ser):
+            print("Expected start message not received. Script will exit.")
+            return 1
+
+        data = acquire(ser, duration_s, lut=lut, verbose=verbose, clock=clock)
+        if save_path and len(data['timestamps']):
+            save(save_path, data)
+            print(f"Raw data saved to '{save_path}'.")
+        analyze(data, duration_label=None if duration_s is None else f"{duration_s:g}", plot=plot,
+                r_fixed=lut.r_fixed)
+    except serial.SerialException as e:
+        print(f"Error with serial connection: {e}")
+        return 1
+    except KeyboardInterrupt:
+        print("\nMeasurement aborted by user.")
+    finally:
+        if ser and ser.is_open:
+            ser.close()
+            print("Serial connection closed.")
+    return 0
@@ -0,0 +1,154 @@
+"""
+Command line entry point: `python -m incubator <command>` (or `incubator`
+once installed).
+
+    monitor       live PID monitor (PIDcontrol.ino) or NTC readout
+    characterize  NTC block acquisition + noise analysis
+    analyze       noise analysis of a saved run or PID log
+
+The command modules are imported only after the arguments are parsed, and
+matplotlib only when plotting, so `--help` and `--no-plot` start quickly.
+"""
+import argparse
+import sys
+
+
+def _monitor(args):
+    from . import monitor
+
+    if args.firmware == 'ntc':
+        return monitor.run_ntc(args.port, args.baud or monitor.BAUD_RATE, plot=not args.no_plot,
+                               reset=not args.no_reset, capture=args.capture, replay=args.replay, speed=args.speed)
+    return monitor.run(args.port, args.baud or monitor.BAUD_RATE, log_file=args.log, csv_file=args.csv,
+                       plot=not args.no_plot, reset=not args.no_reset, pid_on=args.pid_on,
+                       keyboard=not args.no_keyboard, publish=args.publish, publish_policy=args.slow_subscriber,
+                       capture=args.capture, replay=args.replay, speed=args.speed, telemetry=args.telemetry,
+                       compress=args.compress, tolerance=args.tolerance, alarms=args.alarms,
+                       rollup=not args.no_rollup)
+
+
+def _characterize(args):
+    from . import characterize
+
+    duration = args.duration
+    if duration is None and not args.replay:
+        duration = characterize.MEASUREMENT_DURATION_S
+    return characterize.run(args.port, args.baud, duration, save_path=args.save,
+                            plot=not args.no_plot, verbose=not args.quiet, capture=args.capture,
+                            replay=args.replay, speed=args.speed, beta=args.beta, r_fixed=args.r_fixed)
+
+
+def _analyze(args):
+    from . import characterize
+
+    cache = None
+    if args.cache is not None:
+        from .cache import DEFAULT_DIR, DEFAULT_MAX_BYTES, AnalysisCache
+
+        cache = AnalysisCache(args.cache or DEFAULT_DIR, int(args.cache_mb * 1e6) if args.cache_mb else DEFAULT_MAX_BYTES)
+    lut = characterize.make_lut(args.beta, args.r_fixed)
+    data = characterize.load(args.path, lut=lut)
+    characterize.analyze(data, bin_width=args.bin_width, nperseg=args.nperseg, plot=not args.no_plot,
+                         r_fixed=lut.r_fixed, cache=cache)
+    if cache is not None:
+        print(f"Analysis cache: {cache.hits} hits, {cache.misses} misses ({cache.directory}).")
+    return 0
+
+
+def _add_capture_arguments(p):
+    p.add_argument('--capture', help="also record the raw serial bytes to this file (see incubator/capture.py)")
+    p.add_argument('--replay', help="read a capture file instead of the serial port")
+    p.add_argument('--speed', type=float, default=1.0, help="replay speed (x real time, 0 = as fast as possible)")
+
+
+def _add_conversion_arguments(p):
+    p.add_argument('--beta', type=float, default=None, help="NTC beta (default: characterize.BETA)")
+    p.add_argument('--r-fixed', type=float, default=None, help="divider resistor in ohm (default: characterize.R_FIXED)")
+
+
+def _add_metrics_arguments(p):
+    p.add_argument('--metrics', action='store_true',
+                   help="instrument the hot path; report at exit and on SIGUSR1 (see incubator/metrics.py)")
+    p.add_argument('--metrics-interval', type=float, default=None, help="also dump every N seconds")
+    p.add_argument('--metrics-file', help="append the periodic dumps as JSON lines (default: stderr)")
+
+
+def _run(args):
+    if not getattr(args, 'metrics', False) and not getattr(args, 'metrics_interval', None) \
+            and not getattr(args, 'metrics_file', None):
+        return args.func(args)
+    from . import metrics
+
+    registry = metrics.enable()
+    metrics.install_signal_handler()
+    dumper = None
+    if args.metrics_interval or args.metrics_file:
+        dumper = metrics.start_periodic(args.metrics_interval or 10.0, args.metrics_file)
+    try:
+        return args.func(args)
+    finally:
+        if dumper is not None:
+            dumper.stop()  # final dump
+        if dumper is None or dumper.path is not None:
+            print(registry.report(), file=sys.stderr)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='incubator', description="Incubator host tools.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    p = commands.add_parser('monitor', help="live monitor for PIDcontrol.ino / Arduino_NTC_Resistor.ino")
+    p.add_argument('--port', help="serial port (default: first port found)")
+    p.add_argument('--baud', type=int, default=None, help="default 9600")
+    p.add_argument('--firmware', choices=('pid', 'ntc'), default='pid')
+    p.add_argument('--log', default="temperature_data_dual_axis.bin", help="binary log file")
+    p.add_argument('--compress', choices=('lossless', 'deadband', 'swinging_door'),
+                   help="write a compressed log instead (e.g. --log run.zlog, see incubator/compressed_log.py)")
+    p.add_argument('--tolerance', type=float, default=0.01, help="°C, for --compress deadband/swinging_door")
+    p.add_argument('--no-rollup', action='store_true',
+                   help="do not maintain the <log>.rollup/ overview index (see incubator/rollup.py)")
+    p.add_argument('--csv', default="temperature_data_dual_axis.csv", help="CSV export at exit ('' to skip)")
+    p.add_argument('--no-plot', action='store_true', help="print status lines, never import matplotlib")
+    p.add_argument('--no-reset', action='store_true', help="keep DTR low on open (no Arduino reset)")
+    p.add_argument('--pid-on', action='store_true', help="send '1' (PID ON) after connecting")
+    p.add_argument('--telemetry', choices=('ascii', 'binary'), default='ascii',
+                   help="binary: switch PIDcontrol.ino to 100 Hz framed telemetry (see incubator/telemetry.py)")
+    p.add_argument('--no-keyboard', action='store_true', help="do not read 0/1 commands from stdin")
+    p.add_argument('--alarms', nargs='?', const='default', metavar='RULES',
+                   help="watch the stream with alarm rules: built-in set, or a JSON file (see incubator/alarms.py)")
+    p.add_argument('--publish', help="publish samples on unix:PATH or [tcp:]HOST:PORT (see incubator/pubsub.py)")
+    p.add_argument('--slow-subscriber', choices=('drop', 'disconnect'), default='drop',
+                   help="drop the oldest queued samples or disconnect a subscriber that falls behind")
+    _add_capture_arguments(p)
+    _add_metrics_arguments(p)
+    p.set_defaults(func=_monitor)
+
+    p = commands.add_parser('characterize', help="NTC Sensor Characterization.ino acquisition + analysis")
+    p.add_argument('--port', default='COM6')
+    p.add_argument('--baud', type=int, default=115200)
+    p.add_argument('--duration', type=float, default=None,
+                   help="acquisition time (s, default 60; with --replay: whole capture)")
+    p.add_argument('--save', help="save the raw series to this .npz file")
+    p.add_argument('--no-plot', action='store_true', help="print results only, never import matplotlib")
+    p.add_argument('--quiet', action='store_true', help="no per-block output")
+    _add_capture_arguments(p)
+    _add_conversion_arguments(p)
+    _add_metrics_arguments(p)
+    p.set_defaults(func=_characterize)
+
+    p = commands.add_parser('analyze', help="analyze a saved run (.npz), raw capture (.cap) or PID log (.bin/.csv)")
+    p.add_argument('path')
+    _add_conversion_arguments(p)
+    p.add_argument('--bin-width', type=float, default=1.0, help="time bin (s)")
+    p.add_argument('--nperseg', type=int, default=2048, help="Welch segment length")
+    p.add_argument('--no-plot', action='store_true', help="print results only, never import matplotlib")
+    p.add_argument('--cache', nargs='?', const='', default=None, metavar='DIR',
+                   help="reuse binned stats, PSD and ADEV of identical data (see incubator/cache.py)")
+    p.add_argument('--cache-mb', type=float, default=None, help="cache size bound (default 1024 MB)")
+    p.set_defaults(func=_analyze)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    sys.exit(_run(args))
@@ -0,0 +1,197 @@
+"""
+Device clock -> host clock mapping for timestamping streamed samples.
+
+The host only sees when a read() returned, which is the device's send time
+plus USB/driver/scheduler latency. Subtracting a block duration from that
+receive time (the old approach) copies every latency spike into the time
+axis, and fs computed from device durations ignores the device oscillator's
+frequency error (up to ~0.5 % with a ceramic resonator).
+
+ClockSync fits
+
+    host_time = host0 + offset + (1 + drift) * (device_time - device0)
+
+online to (device_time, receive_time) pairs: exponentially forgetting
+weighted least squares (time constant `memory_s`) with Huber weights, so
+late deliveries get little influence, and drift shrunk towards 0 until the
+points span more than `prior_span_s` (two points 0.1 s apart must not set
+the slope). Each update and each to_host() is O(1) / one vectorized
+expression.
+
+BlockClock applies this to the 'S'...'E' ADC blocks, which carry only
+their duration: device time is the sum of the block durations received so
+far. A block that is lost (dropped or corrupt frame) or a pause of the
+sampling makes all later blocks arrive later than predicted by the same
+amount; after `confirm` consecutive reads show such a step it is recorded
+as a gap (rounded to whole blocks when it matches lost frames within the
+jitter) and added to the device time. Latency spikes revert before that
+and never enter the fit. The blocks read while a step is unconfirmed keep
+the fitted mapping, so the time axis never runs backwards.
+"""
+import math
+
+import numpy as np
+
+
+class ClockSync:
+    """Online robust linear fit of host time against device time (both in seconds)."""
+
+    def __init__(self, memory_s=600.0, prior_span_s=0.5, huber_k=3.0, min_scale_s=1e-4):
+        self.memory_s = float(memory_s)
+        self.prior_span_s = float(prior_span_s)
+        self.huber_k = float(huber_k)
+        self.min_scale_s = float(min_scale_s)
+        self.updates = 0
+        self.offset = 0.0
+        self.drift = 0.0
+        self.scale = None  # robust residual scale (s, EW mean |r| -> sigma), ~ latency jitter
+        self._origin = None  # (device0, host0)
+        self._last_x = 0.0
+        self._sw = self._sx = self._sy = self._sxx = self._sxy = 0.0
+
+    @property
+    def drift_ppm(self):
+        return self.drift * 1e6
+
+    @property
+    def synchronized(self):
+        return self.updates >= 2
+
+    def residual(self, device_time, host_time):
+        """Observed minus predicted host time (positive: arrived late)."""
+        return host_time - self.to_host(device_time)
+
+    def to_host(self, device_time):
+        """Host time of device_time (scalar or array)."""
+        if self._origin is None:
+            raise ValueError("ClockSync has no data yet")
+        device0, host0 = self._origin
+        return host0 + self.offset + (1.0 + self.drift) * (np.asarray(device_time, dtype=np.float64) - device0)
+
+    def update(self, device_time, host_time):
+        """Adds one (device_time, host_time) pair. Returns its residual before the update."""
+        if self._origin is None:
+            self._origin = (float(device_time), float(host_time))
+        x = float(device_time) - self._origin[0]
+        y = float(host_time) - self._origin[1] - x  # fit offset + drift * x
+
+        r = y - (self.offset + self.drift * x) if self.updates else 0.0
+        scale = max(self.scale if self.scale is not None else abs(r), self.min_scale_s)
+        w = 1.0 if abs(r) <= self.huber_k * scale else self.huber_k * scale / abs(r)
+        if self.updates:
+            self.scale = 0.95 * scale + 0.05 * 1.2533 * min(abs(r), self.huber_k * scale)
+
+        decay = math.exp(-max(x - self._last_x, 0.0) / self.memory_s)
+        self._last_x = max(x, self._last_x)
+        self._sw = decay * self._sw + w
+        self._sx = decay * self._sx + w * x
+        self._sy = decay * self._sy + w * y
+        self._sxx = decay * self._sxx + w * x * x
+        self._sxy = decay * self._sxy + w * x * y
+        self.updates += 1
+
+        var_x = self._sw * self._sxx - self._sx * self._sx
+        cov_xy = self._sw * self._sxy - self._sx * self._sy
+        self.drift = cov_xy / (var_x + (self._sw * self.prior_span_s) ** 2)
+        self.offset = (self._sy - self.drift * self._sx) / self._sw
+        return r
+
+
+class BlockClock:
+    """
+    Sample timestamps for duration-only ADC blocks (see module docstring).
+    Call timestamps() once per read with all blocks of that read.
+    """
+
+    def __init__(self, sync=None, confirm=3, gap_threshold_s=None, rate_alpha=0.05):
+        self.sync = sync or ClockSync()
+        self.confirm = int(confirm)
+        self.gap_threshold_s = gap_threshold_s
+        self.rate_alpha = float(rate_alpha)
+        self.device_time = 0.0  # end of the last block, device seconds
+        self.samples = 0
+        self.sampled_time = 0.0  # sum of block durations, device seconds
+        self.gaps = []  # (host time, gap in seconds)
+        self.gap_time = 0.0
+        self._device_rate = None
+        self._late = []  # residuals of consecutive late reads
+
+    @property
+    def sample_rate(self):
+        """Current effective sample rate in samples per host second."""
+        if self._device_rate is None:
+            return 0.0
+        return self._device_rate / (1.0 + self.sync.drift)
+
+    @property
+    def mean_sample_rate(self):
+        """Average sample rate over all blocks, in samples per host second."""
+        if self.sampled_time <= 0:
+            return 0.0
+        return self.samples / (self.sampled_time * (1.0 + self.sync.drift))
+
+    def _threshold(self, block_s):
+        if self.gap_threshold_s is not None:
+            return self.gap_threshold_s
+        return max(6.0 * (self.sync.scale or 0.0), 0.5 * block_s)
+
+    def timestamps(self, receive_time, blocks):
+        """
+        blocks: [(num_samples, duration_micros), ...] received in one read.
+        Returns one array of host sample times per block.
+        """
+        if not blocks:
+            return []
+        start = self.device_time
+        durations = [d / 1e6 for _, d in blocks]
+        end = start + sum(durations)
+        for (n, _), d in zip(blocks, durations):
+            if d > 0 and n:
+                rate = n / d
+                self._device_rate = rate if self._device_rate is None else \
+                    self._device_rate + self.rate_alpha * (rate - self._device_rate)
+            self.samples += n
+        self.sampled_time += end - start
+
+        sync = self.sync
+        if sync.updates >= max(self.confirm, 2):
+            r = sync.residual(end, receive_time)
+            if r > self._threshold(durations[-1]):
+                self._late.append(r)
+                if len(self._late) < self.confirm:
+                    self.device_time = end
+                    return self._block_times(start, blocks, durations)
+                device_gap = float(np.median(self._late)) / (1.0 + sync.drift)
+                self._late = []
+                # lost frames: a whole number of blocks, exact unlike the latency-blurred step
+                lost = round(device_gap / durations[-1])
+                if lost >= 1 and abs(device_gap - lost * durations[-1]) <= 3.0 * (sync.scale or 0.0):
+                    device_gap = lost * durations[-1]
+                gap = device_gap * (1.0 + sync.drift)
+                self.gaps.append((receive_time - gap, gap))
+                self.gap_time += gap
+                start += device_gap
+                end += device_gap
+            else:
+                self._late = []
+        sync.update(end, receive_time)
+        self.device_time = end
+        return self._block_times(start, blocks, durations)
+
+    def _block_times(self, start, blocks, durations):
+        out = []
+        for (n, _), d in zip(blocks, durations):
+            out.append(self.sync.to_host(start + np.arange(n) * (d / n if n else 0.0)))
+            start += d
+        return out
+
+    def stats(self):
+        sync = self.sync
+        return {
+            'sample_rate_hz': self.sample_rate,
+            'mean_sample_rate_hz': self.mean_sample_rate,
+            'drift_ppm': sync.drift_ppm,
+            'latency_scale_s': sync.scale or 0.0,
+            'gaps': len(self.gaps),
+            'gap_time_s': self.gap_time,
+        }
@@ -0,0 +1,516 @@
+"""
+Compressed temperature log for long (multi-week) runs.
+
+Same samples and writer interface as binary_log.BinaryLogWriter, but the
+records are collected into blocks and each block is stored column by
+column:
+
+    time          delta-of-delta of integer microseconds (lossless; a block
+                  whose times are not exact microseconds stores the XOR of
+                  consecutive float64 bit patterns instead)
+    temperature   XOR of consecutive float32 bit patterns
+    setpoint      XOR of consecutive float32 bit patterns
+    pwm           delta
+
+Every column is then zigzag/varint coded and the block is deflated (zlib).
+A chamber held at 37 °C yields mostly zero deltas and XORs, which cost a
+few bits per sample after deflate instead of 17 bytes (binary log) or
+~20 bytes (CSV).
+
+Optionally a lossy filter runs before the blocks (mode):
+
+    lossless        every sample is kept
+    deadband        a sample is kept when temperature or PWM moved more than
+                    the tolerance from the last kept sample (step-hold
+                    reconstruction is within the tolerance)
+    swinging_door   a sample is kept when the straight line from the last
+                    kept sample can no longer pass within the tolerance of
+                    every sample since (linear interpolation between kept
+                    samples is within the tolerance)
+
+Setpoint changes are always kept exactly. Both filters are O(1) per sample.
+
+File layout: header (magic, mode, tolerances, start time), then blocks of
+    BLOCK header (sync, flags, records, sizes, first/last time, CRC32)
+    zlib(4 section lengths + 4 column sections)
+Blocks are written when full or `flush_interval` seconds after the first
+record, so a crash loses at most that much. A truncated or corrupt block
+is skipped by the reader.
+
+CompressedLogReader indexes the block headers only; iter_chunks() decodes
+one block at a time (streaming, bounded memory), read() and export_csv()
+accept a time range like BinaryLogReader. binary_log.open_reader() picks
+the right reader by the file's magic.
+
+Usage:
+    python -m incubator monitor --log run.zlog --compress swinging_door --tolerance 0.01
+    python -m incubator.compressed_log compress run.bin run.zlog --mode deadband --tolerance 0.01
+    python -m incubator.compressed_log info run.zlog
+    python -m incubator.compressed_log export run.zlog run.csv
+"""
+import argparse
+import math
+import os
+import struct
+import time
+import zlib
+
+import numpy as np
+
+from .binary_log import CSV_HEADER, LOG_DTYPE
+
+MAGIC = b'INCZLG01'
+HEADER = struct.Struct('<8sHHBxdddI')  # magic, header_size, record_size, mode, tolerance, pwm_tolerance, start_time, block_records
+HEADER_SIZE = 64
+BLOCK = struct.Struct('<2sBxIIIddI')  # sync, flags, records, raw size, compressed size, t_first, t_last, crc32
+BLOCK_SYNC = b'ZB'
+SECTIONS = struct.Struct('<4I')
+MODES = ('lossless', 'deadband', 'swinging_door')
+FLAG_TIME_XOR = 1
+TIME_RESOLUTION = 1e6  # ticks per second
+
+
+def _zigzag(x):
+    x = x.astype(np.int64)
+    return ((x << 1) ^ (x >> 63)).view(np.uint64)
+
+
+def _unzigzag(u):
+    return (u >> np.uint64(1)).view(np.int64) ^ -(u & np.uint64(1)).view(np.int64)
+
+
+def _varint_encode(u):
+    """LEB128 of a uint64 array, vectorized."""
+    u = np.asarray(u, dtype=np.uint64)
+    if not len(u):
+        return b''
+    nbytes = np.ones(len(u), dtype=np.int64)
+    for k in range(1, 10):
+        nbytes += u >= np.uint64(1 << (7 * k))
+    ends = np.cumsum(nbytes)
+    starts = ends - nbytes
+    out = np.empty(int(ends[-1]), dtype=np.uint8)
+    for k in range(int(nbytes.max())):
+        has = nbytes > k
+        byte = ((u[has] >> np.uint64(7 * k)) & np.uint64(0x7F)).astype(np.uint8)
+        byte[nbytes[has] > k + 1] |= 0x80
+        out[starts[has] + k] = byte
+    return out.tobytes()
+
+
+def _varint_decode(data, n):
+    b = np.frombuffer(data, dtype=np.uint8)
+    if n == 0:
+        return np.zeros(0, dtype=np.uint64)
+    last = (b & 0x80) == 0
+    ends = np.flatnonzero(last)
+    if len(ends) != n:
+        raise ValueError(f"varint stream holds {len(ends)} values, expected {n}")
+    starts = np.empty(n, dtype=np.int64)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    group = np.repeat(np.arange(n), ends - starts + 1)
+    shift = ((np.arange(len(b)) - starts[group]) * 7).astype(np.uint64)
+    return np.add.reduceat((b & 0x7F).astype(np.uint64) << shift, starts)
+
+
+def _xor_encode(bits):
+    bits = bits.astype(np.uint64)
+    prev = np.empty_like(bits)
+    prev[:1] = 0
+    prev[1:] = bits[:-1]
+    return _varint_encode(bits ^ prev)
+
+
+def _xor_decode(data, n):
+    return np.bitwise_xor.accumulate(_varint_decode(data, n)) if n else np.zeros(0, dtype=np.uint64)
+
+
+def encode_block(records):
+    """Returns (flags, raw payload) for a LOG_DTYPE record array."""
+    t = records['time'].astype(np.float64)
+    ticks = np.round(t * TIME_RESOLUTION).astype(np.int64)
+    flags = 0
+    if np.array_equal(ticks / TIME_RESOLUTION, t):
+        delta = np.diff(ticks, prepend=0)
+        time_section = _varint_encode(_zigzag(np.diff(delta, prepend=0)))
+    else:
+        flags |= FLAG_TIME_XOR
+        time_section = _xor_encode(t.view(np.uint64))
+    sections = [
+        time_section,
+        _xor_encode(records['temperature'].astype('<f4').view(np.uint32)),
+        _xor_encode(records['setpoint'].astype('<f4').view(np.uint32)),
+        _varint_encode(_zigzag(np.diff(records['pwm'].astype(np.int64), prepend=0))),
+    ]
+    return flags, SECTIONS.pack(*map(len, sections)) + b''.join(sections)
+
+
+def decode_block(flags, payload, n):
+    sizes = SECTIONS.unpack_from(payload)
+    pos = SECTIONS.size
+    parts = []
+    for size in sizes:
+        parts.append(payload[pos:pos + size])
+        pos += size
+    records = np.empty(n, dtype=LOG_DTYPE)
+    if flags & FLAG_TIME_XOR:
+        records['time'] = _xor_decode(parts[0], n).view(np.float64)
+    else:
+        ticks = np.cumsum(np.cumsum(_unzigzag(_varint_decode(parts[0], n))))
+        records['time'] = ticks / TIME_RESOLUTION
+    records['temperature'] = _xor_decode(parts[1], n).astype(np.uint32).view('<f4')
+    records['setpoint'] = _xor_decode(parts[2], n).astype(np.uint32).view('<f4')
+    records['pwm'] = np.cumsum(_unzigzag(_varint_decode(parts[3], n)))
+    return records
+
+
+def _setpoint_changed(a, b):
+    """NaN-safe: a log without setpoint (CSV import, NaN throughout) never changes it."""
+    return a != b and not (math.isnan(a) and math.isnan(b))
+
+
+class _Deadband:
+    """Keeps a sample when temperature or PWM left the band around the last kept sample."""
+
+    def __init__(self, tolerance, pwm_tolerance):
+        self.tolerance = tolerance
+        self.pwm_tolerance = pwm_tolerance
+        self._kept = None
+        self._last = None
+
+    def push(self, sample):
+        """Returns the samples to store (0 or 1) for a new (t, temperature, setpoint, pwm)."""
+        kept = self._kept
+        if (kept is None or abs(sample[1] - kept[1]) > self.tolerance or _setpoint_changed(sample[2], kept[2])
+                or abs(sample[3] - kept[3]) > self.pwm_tolerance):
+            self._kept = sample
+            self._last = None
+            return (sample,)
+        self._last = sample
+        return ()
+
+    def finish(self):
+        last, self._last = self._last, None
+        return (last,) if last is not None else ()
+
+
+class _SwingingDoor:
+    """
+    Swinging door trending on temperature and PWM. Per channel the door is
+    the range of slopes from the last archived sample that pass within the
+    tolerance of every sample since; a new sample whose own slope leaves
+    the door (in any channel) archives the previous sample, so the line
+    between two archived samples never misses a dropped one by more than
+    the tolerance.
+    """
+
+    CHANNELS = (1, 3)  # temperature, pwm
+
+    def __init__(self, tolerance, pwm_tolerance):
+        self.tolerances = (tolerance, pwm_tolerance)
+        self._archived = None
+        self._previous = None
+        self._upper = None
+        self._lower = None
+
+    def _restart(self, archived):
+        self._archived = archived
+        self._previous = None
+        self._upper = [math.inf] * len(self.CHANNELS)
+        self._lower = [-math.inf] * len(self.CHANNELS)
+
+    def push(self, sample):
+        """Returns the samples to store (0 to 2) for a new (t, temperature, setpoint, pwm)."""
+        if self._archived is None:
+            self._restart(sample)
+            return (sample,)
+        previous = self._previous
+        if _setpoint_changed(sample[2], (previous or self._archived)[2]):
+            # setpoint step: keep both sides exactly
+            out = (previous,) if previous is not None else ()
+            self._restart(sample)
+            return out + (sample,)
+        a = self._archived
+        dt = sample[0] - a[0]
+        if dt <= 0:
+            return ()
+        out = ()
+        inside = all(lower <= (sample[c] - a[c]) / dt <= upper
+                     for c, lower, upper in zip(self.CHANNELS, self._lower, self._upper))
+        if not inside and previous is not None:
+            self._restart(previous)
+            out = (previous,)
+            a = previous
+            dt = sample[0] - a[0]
+        for i, (c, tol) in enumerate(zip(self.CHANNELS, self.tolerances)):
+            self._upper[i] = min(self._upper[i], (sample[c] + tol - a[c]) / dt)
+            self._lower[i] = max(self._lower[i], (sample[c] - tol - a[c]) / dt)
+        self._previous = sample
+        return out
+
+    def finish(self):
+        previous, self._previous = self._previous, None
+        return (previous,) if previous is not None else ()
+
+
+class CompressedLogWriter:
+    """
+    Drop-in replacement for BinaryLogWriter writing the compressed format
+    (see module docstring). `records_written` counts stored samples,
+    `samples_in` all appended ones.
+    """
+
+    def __init__(self, path, start_time=None, mode='lossless', tolerance=0.01, pwm_tolerance=0.0,
+                 block_records=4096, flush_interval=60.0, fsync_interval=10.0, level=6):
+        if mode not in MODES:
+            raise ValueError(f"unknown mode {mode!r} (expected one of {', '.join(MODES)})")
+        self.path = path
+        self.start_time = time.time() if start_time is None else float(start_time)
+        self.mode = mode
+        self.tolerance = float(tolerance)
+        self.pwm_tolerance = float(pwm_tolerance)
+        self.flush_interval = float(flush_interval)
+        self.fsync_interval = float(fsync_interval)
+        self.level = int(level)
+        self._block = np.zeros(int(block_records), dtype=LOG_DTYPE)
+        self._count = 0
+        self._block_started = None
+        self._last_fsync = time.monotonic()
+        self._filter = None
+        if mode == 'deadband':
+            self._filter = _Deadband(self.tolerance, self.pwm_tolerance)
+        elif mode == 'swinging_door':
+            self._filter = _SwingingDoor(self.tolerance, self.pwm_tolerance)
+        self.samples_in = 0
+        self.records_written = 0
+        self.bytes_written = HEADER_SIZE
+
+        self._file = open(path, 'wb')
+        header = HEADER.pack(MAGIC, HEADER_SIZE, LOG_DTYPE.itemsize, MODES.index(mode), self.tolerance,
+                             self.pwm_tolerance, self.start_time, len(self._block))
+        self._file.write(header.ljust(HEADER_SIZE, b'\0'))
+
+    def append(self, t, temperature, setpoint, pwm):
+        self.samples_in += 1
+        if self._filter is None:
+            self._store(t, temperature, setpoint, pwm)
+        else:
+            # the filters see the stored (float32) values, so .bin and CSV input compress alike
+            sample = (float(t), float(np.float32(temperature)), float(np.float32(setpoint)), int(pwm))
+            for sample in self._filter.push(sample):
+                self._store(*sample)
+        if self._block_started is not None and time.monotonic() - self._block_started >= self.flush_interval:
+            self.flush()
+
+    def _store(self, t, temperature, setpoint, pwm):
+        if self._count == 0:
+            self._block_started = time.monotonic()
+        self._block[self._count] = (t, temperature, setpoint, pwm)
+        self._count += 1
+        if self._count == len(self._block):
+            self._write_block()
+
+    def _write_block(self):
+        if not self._count:
+            return
+        records = self._block[:self._count]
+        flags, payload = encode_block(records)
+        compressed = zlib.compress(payload, self.level)
+        self._file.write(BLOCK.pack(BLOCK_SYNC, flags, self._count, len(payload), len(compressed),
+                                    float(records['time'][0]), float(records['time'][-1]),
+                                    zlib.crc32(compressed)))
+        self._file.write(compressed)
+        self.bytes_written += BLOCK.size + len(compressed)
+        self.records_written += self._count
+        self._count = 0
+        self._block_started = None
+
+    def flush(self, sync=False):
+        """Writes the current (partial) block. Lossy modes may still hold back the last sample."""
+        self._write_block()
+        self._file.flush()
+        now = time.monotonic()
+        if sync or now - self._last_fsync >= self.fsync_interval:
+            os.fsync(self._file.fileno())
+            self._last_fsync = now
+
+    def close(self):
+        if not self._file.closed:
+            if self._filter is not None:
+                for sample in self._filter.finish():
+                    self._store(*sample)
+            self.flush(sync=True)
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class CompressedLogReader:
+    """
+    Reader for CompressedLogWriter files. Only the block headers are read
+    on open; blocks are decoded on demand.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            raw = f.read(HEADER_SIZE)
+            if len(raw) < HEADER.size:
+                raise ValueError(f"{path}: file too short for a log header")
+            (magic, header_size, record_size, mode, self.tolerance, self.pwm_tolerance,
+             self.start_time, self.block_records) = HEADER.unpack_from(raw)
+            if magic != MAGIC:
+                raise ValueError(f"{path}: not a compressed temperature log (magic {magic!r})")
+            if record_size != LOG_DTYPE.itemsize:
+                raise ValueError(f"{path}: unsupported record size {record_size}")
+            self.mode = MODES[mode]
+
+            offsets, counts, t_first, t_last = [], [], [], []
+            self.truncated = False
+            pos = header_size
+            size = os.fstat(f.fileno()).st_size
+            while pos + BLOCK.size <= size:
+                f.seek(pos)
+                sync, flags, n, raw_size, comp_size, t0, t1, crc = BLOCK.unpack(f.read(BLOCK.size))
+                if sync != BLOCK_SYNC or pos + BLOCK.size + comp_size > size:
+                    self.truncated = True
+                    break
+                offsets.append(pos)
+                counts.append(n)
+                t_first.append(t0)
+                t_last.append(t1)
+                pos += BLOCK.size + comp_size
+        self.offsets = np.array(offsets, dtype=np.int64)
+        self.counts = np.array(counts, dtype=np.int64)
+        self.t_first = np.array(t_first, dtype=np.float64)
+        self.t_last = np.array(t_last, dtype=np.float64)
+        self.corrupt_blocks = 0
+
+    def __len__(self):
+        return int(self.counts.sum())
+
+    @property
+    def size_bytes(self):
+        return os.path.getsize(self.path)
+
+    def _decode(self, f, i):
+        f.seek(int(self.offsets[i]))
+        sync, flags, n, raw_size, comp_size, t0, t1, crc = BLOCK.unpack(f.read(BLOCK.size))
+        compressed = f.read(comp_size)
+        if zlib.crc32(compressed) != crc:
+            self.corrupt_blocks += 1
+            return None
+        return decode_block(flags, zlib.decompress(compressed), n)
+
+    def iter_blocks(self, t_start=None, t_end=None):
+        """Yields the record arrays of t_start <= time < t_end, one decoded block at a time."""
+        first = 0 if t_start is None else int(np.searchsorted(self.t_last, t_start, side='left'))
+        last = len(self.offsets) if t_end is None else int(np.searchsorted(self.t_first, t_end, side='left'))
+        with open(self.path, 'rb') as f:
+            for i in range(first, last):
+                records = self._decode(f, i)
+                if records is None:
+                    continue
+                if t_start is not None or t_end is not None:
+                    times = records['time']
+                    i0 = 0 if t_start is None else int(np.searchsorted(times, t_start, side='left'))
+                    i1 = len(times) if t_end is None else int(np.searchsorted(times, t_end, side='left'))
+                    records = records[i0:max(i0, i1)]
+                if len(records):
+                    yield records
+
+    def iter_chunks(self, t_start=None, t_end=None):
+        """Like iter_blocks(), as dicts of columns ('time', 'temperature', 'setpoint', 'pwm')."""
+        for records in self.iter_blocks(t_start, t_end):
+            yield {name: records[name] for name in LOG_DTYPE.names}
+
+    def read(self, t_start=None, t_end=None):
+        """Returns the columns for t_start <= time < t_end as a dict of NumPy arrays."""
+        blocks = list(self.iter_blocks(t_start, t_end))
+        records = np.concatenate(blocks) if blocks else np.zeros(0, dtype=LOG_DTYPE)
+        return {name: records[name] for name in LOG_DTYPE.names}
+
+    def export_csv(self, csv_path, t_start=None, t_end=None):
+        """Writes the log (or a time range of it) in the original CSV layout."""
+        import csv
+
+        rows = 0
+        with open(csv_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_HEADER)
+            for chunk in self.iter_blocks(t_start, t_end):
+                writer.writerows(zip(np.round(chunk['time'], 2).tolist(),
+                                     np.round(chunk['temperature'].astype(np.float64), 2).tolist(),
+                                     chunk['pwm'].tolist()))
+                rows += len(chunk)
+        return rows
+
+
+def compress_log(src, dst, mode='lossless', tolerance=0.01, pwm_tolerance=0.0, chunk_records=1 << 16):
+    """Converts a binary log (.bin) or CSV export into a compressed log. Returns the writer."""
+    from .binary_log import BinaryLogReader
+
+    if src.endswith('.csv'):
+        table = np.loadtxt(src, delimiter=',', skiprows=1, ndmin=2)
+        columns = {'time': table[:, 0], 'temperature': table[:, 1],
+                   'setpoint': np.full(len(table), np.nan), 'pwm': table[:, 2]}
+        start_time, chunks = 0.0, [columns]
+    else:
+        reader = BinaryLogReader(src)
+        start_time = reader.start_time
+        chunks = ({name: reader.records[name][i:i + chunk_records] for name in LOG_DTYPE.names}
+                  for i in range(0, len(reader), chunk_records))
+    writer = CompressedLogWriter(dst, start_time=start_time, mode=mode, tolerance=tolerance,
+                                 pwm_tolerance=pwm_tolerance, flush_interval=float('inf'))
+    with writer:
+        for chunk in chunks:
+            for row in zip(chunk['time'].tolist(), chunk['temperature'].tolist(),
+                           chunk['setpoint'].tolist(), chunk['pwm'].tolist()):
+                writer.append(*row)
+    return writer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compressed temperature logs.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    p = commands.add_parser('compress', help="convert a .bin log or CSV export")
+    p.add_argument('src')
+    p.add_argument('dst')
+    p.add_argument('--mode', choices=MODES, default='lossless')
+    p.add_argument('--tolerance', type=float, default=0.01, help="°C, lossy modes")
+    p.add_argument('--pwm-tolerance', type=float, default=0.0, help="PWM counts, lossy modes")
+    p = commands.add_parser('info', help="print mode, size and compression of a log")
+    p.add_argument('path')
+    p = commands.add_parser('export', help="write the CSV layout of monitor")
+    p.add_argument('path')
+    p.add_argument('csv')
+    args = parser.parse_args()
+
+    if args.command == 'compress':
+        started = time.perf_counter()
+        writer = compress_log(args.src, args.dst, args.mode, args.tolerance, args.pwm_tolerance)
+        src_size = os.path.getsize(args.src)
+        print(f"{writer.samples_in} samples -> {writer.records_written} records, {src_size} -> "
+              f"{writer.bytes_written} bytes ({src_size / max(writer.bytes_written, 1):.1f}x) "
+              f"in {time.perf_counter() - started:.1f} s.")
+    elif args.command == 'info':
+        reader = CompressedLogReader(args.path)
+        n = len(reader)
+        duration = reader.t_last[-1] - reader.t_first[0] if n else 0.0
+        print(f"{args.path}: {reader.mode}"
+              + (f" (tolerance {reader.tolerance:g} °C, PWM {reader.pwm_tolerance:g})" if reader.mode != 'lossless' else '')
+              + f", {n} records in {len(reader.offsets)} blocks over {duration:.1f} s")
+        print(f"{reader.size_bytes} bytes, {reader.size_bytes / max(n, 1):.2f} bytes/record "
+              f"({n * LOG_DTYPE.itemsize / max(reader.size_bytes, 1):.1f}x vs. binary log)"
+              + (", truncated tail ignored" if reader.truncated else ''))
+    else:
+        print(f"{CompressedLogReader(args.path).export_csv(args.csv)} rows written to '{args.csv}'.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+import struct
+from collections import namedtuple
+
+import numpy as np
+
+from . import metrics
+
+START_BYTE = b'S'
+END_BYTE = b'E'
+HEADER = struct.Struct('<HL')  # num_samples (uint16), duration_micros (uint32)
+FRAME_OVERHEAD = 1 + HEADER.size + 1
+
+Block = namedtuple('Block', ['num_samples', 'duration_micros', 'samples'])
+
+
+class BlockFrameParser:
+    """
+    Incremental parser for the ADC block protocol:
+    'S' + <uint16 num_samples> + <uint32 duration_micros> + num_samples * <uint16> + 'E'
+
+    Incoming bytes are collected in one preallocated bytearray. Frames are
+    located by scanning for the start byte and checking the end byte at the
+    offset given by the header. On a malformed frame the parser skips the
+    bad start byte and searches again, so good frames that are already
+    buffered are never thrown away.
+
+    The `samples` of a returned Block are uint16 views into the internal
+    buffer (no copy). They stay valid until the next call to feed() or
+    read_from(); copy them if they need to live longer.
+    """
+
+    def __init__(self, max_samples=4096, buffer_size=1 << 20):
+        self.max_samples = int(max_samples)
+        min_size = 2 * (FRAME_OVERHEAD + 2 * self.max_samples)
+        self._buf = bytearray(max(int(buffer_size), min_size))
+        self._view = memoryview(self._buf)
+        self._array = np.frombuffer(self._buf, dtype=np.uint8)
+        self._start = 0
+        self._end = 0
+
+        self.bytes_received = 0
+        self.bytes_discarded = 0
+        self.frames_received = 0
+        self.frames_corrupt = 0
+        self._metrics = metrics.get()
+
+    @property
+    def buffered(self):
+        """Number of received bytes not yet consumed by a complete frame."""
+        return self._end - self._start
+
+    def reset(self):
+        """Drops all buffered bytes. Counters are kept."""
+        self._start = 0
+        self._end = 0
+
+    def stats(self):
+        return {
+            'bytes_received': self.bytes_received,
+            'bytes_discarded': self.bytes_discarded,
+            'frames_received': self.frames_received,
+            'frames_corrupt': self.frames_corrupt,
+            'bytes_buffered': self.buffered,
+        }
+
+    def feed(self, data):
+        """
+        Appends received bytes and returns the list of complete Blocks.
+        """
+        data = memoryview(data).cast('B')
+        blocks = []
+        detached = 0
+        offset = 0
+        while offset < len(data):
+            if self._start > 0 and detached < len(blocks):
+                # Compacting would overwrite the sample views of this call.
+                for i in range(detached, len(blocks)):
+                    blocks[i] = blocks[i]._replace(samples=blocks[i].samples.copy())
+                detached = len(blocks)
+            self._make_room()
+            n = min(len(data) - offset, len(self._buf) - self._end)
+            self._view[self._end:self._end + n] = data[offset:offset + n]
+            self._end += n
+            self.bytes_received += n
+            offset += n
+            blocks.extend(self._parse())
+        return blocks
+
+    def read_from(self, ser):
+        """
+        Reads everything currently waiting on a pyserial port (at least one
+        byte, blocking up to ser.timeout) directly into the parse buffer.
+        Returns the list of complete Blocks.
+        """
+        m = self._metrics
+        t0 = m.clock()
+        self._make_room()
+        free = len(self._buf) - self._end
+        waiting = ser.in_waiting
+        n = min(max(waiting, 1), free)
+        got = ser.readinto(self._view[self._end:self._end + n])
+        m.stage('serial_read', t0)
+        if not got:
+            return []
+        self._end += got
+        self.bytes_received += got
+        corrupt, discarded = self.frames_corrupt, self.bytes_discarded
+        t0 = m.clock()
+        blocks = self._parse()
+        m.stage('frame_parse', t0)
+        if m.enabled:
+            m.gauge('serial_in_waiting', waiting)
+            m.gauge('parser_buffered', self.buffered)
+            m.count('bytes_received', got)
+            m.count('frames', len(blocks))
+            m.count('frames_corrupt', self.frames_corrupt - corrupt)
+            m.count('bytes_discarded', self.bytes_discarded - discarded)
+        return blocks
+
+    def _make_room(self):
+        if self._start == self._end:
+            self._start = self._end = 0
+        elif self._start > 0:
+            pending = self._end - self._start
+            self._buf[:pending] = self._buf[self._start:self._end]
+            self._start = 0
+            self._end = pending
+
+    def _parse(self):
+        buf = self._buf
+        blocks = []
+        pos = self._start
+        end = self._end
+        while True:
+            idx = buf.find(START_BYTE, pos, end)
+            if idx < 0:
+                self.bytes_discarded += end - pos
+                pos = end
+                break
+            self.bytes_discarded += idx - pos
+            pos = idx
+
+            if end - pos < 1 + HEADER.size:
+                break
+            num_samples, duration_micros = HEADER.unpack_from(buf, pos + 1)
+            if num_samples == 0 or num_samples > self.max_samples:
+                self.frames_corrupt += 1
+                self.bytes_discarded += 1
+                pos += 1
+                continue
+
+            data_start = pos + 1 + HEADER.size
+            data_end = data_start + 2 * num_samples
+            if end - data_end < 1:
+                break
+            if buf[data_end] != END_BYTE[0]:
+                self.frames_corrupt += 1
+                self.bytes_discarded += 1
+                pos += 1
+                continue
+
+            samples = self._array[data_start:data_end].view('<u2')
+            blocks.append(Block(num_samples, duration_micros, samples))
+            self.frames_received += 1
+            pos = data_end + 1
+
+        self._start = pos
+        return blocks
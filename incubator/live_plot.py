@@ -0,0 +1,127 @@
+import numpy as np
+
+from .timeseries import TimeSeriesStore
+
+
+class RunningMinMax:
+    """Keeps the minimum and maximum of all values seen so far in O(1) per value."""
+
+    def __init__(self):
+        self.min = None
+        self.max = None
+
+    def update(self, value):
+        if self.min is None:
+            self.min = self.max = value
+        elif value < self.min:
+            self.min = value
+        elif value > self.max:
+            self.max = value
+
+    def __bool__(self):
+        return self.min is not None
+
+
+class MinMaxDecimator:
+    """
+    Incremental min-max decimation of an unbounded (x, y) stream.
+
+    Samples are grouped into buckets of `bucket_size` consecutive samples and
+    only the minimum and maximum of each bucket are kept. When the number of
+    buckets reaches 2 * target_buckets, neighbouring buckets are merged and
+    the bucket size doubles. Appending is O(1) amortized and view() is
+    O(target_buckets), independent of how many samples have been seen.
+    """
+
+    def __init__(self, target_buckets=1000):
+        self.target_buckets = max(int(target_buckets), 1)
+        capacity = 2 * self.target_buckets
+        self.bucket_size = 1
+        self._n = 0
+        self._x_lo = np.empty(capacity)
+        self._y_lo = np.empty(capacity)
+        self._x_hi = np.empty(capacity)
+        self._y_hi = np.empty(capacity)
+        self._partial = None  # [count, x_lo, y_lo, x_hi, y_hi]
+        self.count = 0
+
+    def append(self, x, y):
+        self.count += 1
+        p = self._partial
+        if p is None:
+            p = self._partial = [0, x, y, x, y]
+        elif y < p[2]:
+            p[1], p[2] = x, y
+        elif y > p[4]:
+            p[3], p[4] = x, y
+        p[0] += 1
+        if p[0] >= self.bucket_size:
+            self._close_bucket()
+
+    def _close_bucket(self):
+        _, x_lo, y_lo, x_hi, y_hi = self._partial
+        i = self._n
+        self._x_lo[i], self._y_lo[i] = x_lo, y_lo
+        self._x_hi[i], self._y_hi[i] = x_hi, y_hi
+        self._n += 1
+        self._partial = None
+        if self._n == len(self._x_lo):
+            self._merge_pairs()
+
+    def _merge_pairs(self):
+        half = self._n // 2
+        for xs, ys, pick_lower in ((self._x_lo, self._y_lo, True), (self._x_hi, self._y_hi, False)):
+            ya, yb = ys[0:2 * half:2], ys[1:2 * half:2]
+            xa, xb = xs[0:2 * half:2], xs[1:2 * half:2]
+            take_b = (yb < ya) if pick_lower else (yb > ya)
+            ys[:half] = np.where(take_b, yb, ya)
+            xs[:half] = np.where(take_b, xb, xa)
+        self._n = half
+        self.bucket_size *= 2
+
+    def view(self):
+        """Returns (x, y) with two points per bucket, ordered by x."""
+        n = self._n
+        x_lo, y_lo = self._x_lo[:n], self._y_lo[:n]
+        x_hi, y_hi = self._x_hi[:n], self._y_hi[:n]
+        if self._partial is not None:
+            _, px_lo, py_lo, px_hi, py_hi = self._partial
+            x_lo, y_lo = np.append(x_lo, px_lo), np.append(y_lo, py_lo)
+            x_hi, y_hi = np.append(x_hi, px_hi), np.append(y_hi, py_hi)
+        lo_first = x_lo <= x_hi
+        x = np.empty(2 * len(x_lo))
+        y = np.empty(2 * len(x_lo))
+        x[0::2] = np.where(lo_first, x_lo, x_hi)
+        y[0::2] = np.where(lo_first, y_lo, y_hi)
+        x[1::2] = np.where(lo_first, x_hi, x_lo)
+        y[1::2] = np.where(lo_first, y_hi, y_lo)
+        return x, y
+
+
+class LiveSeries:
+    """
+    Plot data for one live line: the last `recent_window_s` seconds at full
+    resolution, everything older min-max decimated to about
+    `target_points` points. Also tracks the overall min/max for axis limits.
+    """
+
+    def __init__(self, recent_window_s=600.0, target_points=1000):
+        self.recent_window_s = float(recent_window_s)
+        self.history = MinMaxDecimator(max(int(target_points) // 2, 1))
+        self.recent = TimeSeriesStore((('x', np.float64), ('y', np.float64)))
+        self.range = RunningMinMax()
+
+    def append(self, x, y):
+        self.recent.append(x, y)
+        self.range.update(y)
+        cutoff = x - self.recent_window_s
+        recent_x = self.recent['x']
+        if recent_x[0] < cutoff:
+            n = self.recent.index_range(None, cutoff)[1]
+            for old_x, old_y in zip(recent_x[:n].tolist(), self.recent['y'][:n].tolist()):
+                self.history.append(old_x, old_y)
+            self.recent.discard(n)
+
+    def xy(self):
+        hx, hy = self.history.view()
+        return np.concatenate((hx, self.recent['x'])), np.concatenate((hy, self.recent['y']))
@@ -0,0 +1,241 @@
+"""
+Low-overhead instrumentation for the acquisition hot paths.
+
+Instrumented code fetches the active registry once (`m = metrics.get()`)
+and then calls
+
+    t0 = m.clock()
+    ...
+    m.stage('parse', t0)          # stage timer -> histogram + total time
+    m.count('frames', n)          # counter
+    m.gauge('queue_depth', d)     # last value + maximum
+    m.observe('latency', ns)      # any value (ns) into a histogram
+
+Until enable() is called, get() returns a NullMetrics whose methods do
+nothing, so the cost of disabled instrumentation is one empty method call
+per site. Histograms are HDR-style (log-linear, 32 sub-buckets per power
+of two, ~3 % relative error) over integer nanoseconds.
+
+Dumps: Metrics.report() (text), snapshot() (dict), a periodic JSON-lines
+writer (start_periodic) and, on POSIX, SIGUSR1 for an on-demand dump.
+"""
+import json
+import signal
+import sys
+import threading
+import time
+
+SUB_BITS = 5
+SUB_COUNT = 1 << SUB_BITS
+N_BUCKETS = 64 * SUB_COUNT
+
+
+def bucket_index(value):
+    """Log-linear bucket of a non-negative integer (exact below 2*SUB_COUNT)."""
+    if value < 2 * SUB_COUNT:
+        return max(value, 0)
+    shift = value.bit_length() - SUB_BITS - 1
+    return min(shift * SUB_COUNT + (value >> shift), N_BUCKETS - 1)
+
+
+def bucket_bounds(index):
+    """Returns [low, high) of a bucket."""
+    if index < 2 * SUB_COUNT:
+        return index, index + 1
+    shift = index // SUB_COUNT - 1
+    mantissa = index - shift * SUB_COUNT
+    return mantissa << shift, (mantissa + 1) << shift
+
+
+class Histogram:
+    """HDR-style histogram of non-negative integers (typically ns)."""
+
+    def __init__(self):
+        self.counts = [0] * N_BUCKETS
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def record(self, value):
+        value = int(value)
+        self.counts[bucket_index(value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        for i, c in enumerate(other.counts):
+            if c:
+                self.counts[i] += c
+        self.count += other.count
+        self.total += other.total
+        for v in (other.min, other.max):
+            if v is not None:
+                self.min = v if self.min is None else min(self.min, v)
+                self.max = v if self.max is None else max(self.max, v)
+
+    def percentile(self, q):
+        """Value at percentile q (0..100), bucket midpoint clamped to [min, max]."""
+        if not self.count:
+            return None
+        rank = max(1, int(round(q / 100.0 * self.count)))
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                low, high = bucket_bounds(i)
+                return min(max((low + high - 1) / 2.0, self.min), self.max)
+        return self.max
+
+    def summary(self, percentiles=(50, 90, 99, 99.9)):
+        out = {'count': self.count, 'min': self.min, 'max': self.max,
+               'mean': self.total / self.count if self.count else None}
+        for q in percentiles:
+            out[f'p{q:g}'] = self.percentile(q)
+        return out
+
+
+class NullMetrics:
+    """Disabled instrumentation: every call is a no-op."""
+
+    enabled = False
+
+    def clock(self):
+        return 0
+
+    def stage(self, name, start):
+        pass
+
+    def count(self, name, n=1):
+        pass
+
+    def gauge(self, name, value):
+        pass
+
+    def observe(self, name, value):
+        pass
+
+
+class Metrics:
+    """Counters, gauges and histograms keyed by name. Thread-safe for dumps, not for concurrent writers of one name."""
+
+    enabled = True
+    clock = staticmethod(time.perf_counter_ns)
+
+    def __init__(self):
+        self.created = time.time()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.stage_ns = {}
+
+    def stage(self, name, start):
+        elapsed = time.perf_counter_ns() - start
+        hist = self.histograms.get(name)
+        if hist is None:
+            hist = self.histograms[name] = Histogram()
+            self.stage_ns[name] = 0
+        hist.record(elapsed)
+        self.stage_ns[name] += elapsed
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def gauge(self, name, value):
+        last_max = self.gauges.get(name, (value, value))[1]
+        self.gauges[name] = (value, max(last_max, value))
+
+    def observe(self, name, value):
+        hist = self.histograms.get(name)
+        if hist is None:
+            hist = self.histograms[name] = Histogram()
+        hist.record(value)
+
+    def snapshot(self):
+        return {
+            'time': time.time(),
+            'uptime_s': time.time() - self.created,
+            'counters': dict(self.counters),
+            'gauges': {k: {'last': v[0], 'max': v[1]} for k, v in list(self.gauges.items())},
+            'stages_s': {k: v / 1e9 for k, v in list(self.stage_ns.items())},
+            'histograms_ns': {k: h.summary() for k, h in list(self.histograms.items())},
+        }
+
+    def report(self):
+        """Human-readable table of the current values."""
+        snap = self.snapshot()
+        lines = [f"--- metrics after {snap['uptime_s']:.1f} s ---"]
+        for name, value in sorted(snap['counters'].items()):
+            lines.append(f"{name:<24} {value:>12}")
+        for name, value in sorted(snap['gauges'].items()):
+            lines.append(f"{name:<24} {value['last']:>12} (max {value['max']})")
+        if snap['histograms_ns']:
+            lines.append(f"{'histogram (us)':<24} {'count':>9} {'total s':>9} {'p50':>9} {'p99':>9} {'p99.9':>9} {'max':>9}")
+            for name, h in sorted(snap['histograms_ns'].items()):
+                total = snap['stages_s'].get(name)
+                total = f"{total:9.3f}" if total is not None else f"{'':9}"
+                lines.append(f"{name:<24} {h['count']:>9} {total} {h['p50'] / 1e3:9.1f} {h['p99'] / 1e3:9.1f} "
+                             f"{h['p99.9'] / 1e3:9.1f} {h['max'] / 1e3:9.1f}")
+        return "\n".join(lines)
+
+
+class PeriodicDump(threading.Thread):
+    """Appends a JSON snapshot every `interval` seconds to `path` (or prints report() if path is None)."""
+
+    def __init__(self, registry, interval=10.0, path=None):
+        super().__init__(daemon=True, name="PeriodicDump")
+        self.registry = registry
+        self.interval = float(interval)
+        self.path = path
+        self._stop_event = threading.Event()
+
+    def dump(self):
+        if self.path is None:
+            print(self.registry.report(), file=sys.stderr)
+        else:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(self.registry.snapshot()) + "\n")
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.dump()
+
+    def stop(self, timeout=1.0):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+        self.dump()
+
+
+_registry = NullMetrics()
+
+
+def get():
+    return _registry
+
+
+def enable():
+    """Switches instrumentation on (call before building the instrumented objects)."""
+    global _registry
+    if not _registry.enabled:
+        _registry = Metrics()
+    return _registry
+
+
+def install_signal_handler(sig=None):
+    """On POSIX, dump report() to stderr on SIGUSR1. Returns False where unsupported."""
+    sig = sig if sig is not None else getattr(signal, 'SIGUSR1', None)
+    if sig is None or threading.current_thread() is not threading.main_thread():
+        return False
+    signal.signal(sig, lambda signum, frame: print(get().report(), file=sys.stderr))
+    return True
+
+
+def start_periodic(interval=10.0, path=None):
+    dumper = PeriodicDump(enable(), interval, path)
+    dumper.start()
+    return dumper
@@ -0,0 +1,561 @@
+"""
+Live-Monitor für PIDcontrol.ino (und Arduino_NTC_Resistor.ino).
+
+Der Lese-Thread startet direkt nach dem Öffnen des Ports; matplotlib wird
+erst danach (und mit --no-plot gar nicht) importiert, der Arduino-Reset
+läuft also parallel zum Import. Messwerte gehen in ein binäres Log, das am
+Ende als CSV exportiert wird.
+
+Usage:
+    python -m incubator monitor [--port COM6] [--no-plot] [--no-reset]
+    python -m incubator monitor --firmware ntc
+    python -m incubator monitor --no-plot --publish unix:/tmp/incubator.sock
+    python -m incubator monitor --capture lauf.cap            # Rohdaten mitschneiden
+    python -m incubator monitor --replay lauf.cap --speed 0 --no-plot
+    python -m incubator monitor --telemetry binary            # 100 Hz Frames, siehe telemetry.py
+"""
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import serial
+import serial.tools.list_ports
+
+from . import metrics
+from .binary_log import BinaryLogWriter, export_csv
+from .live_plot import LiveSeries
+from .serial_reader import SerialLineReader, parse_pid_line
+
+TARGET_TEMP = 37.0  # Soll-Temperatur (wird im Plot angezeigt)
+BAUD_RATE = 9600
+CSV_FILE = "temperature_data_dual_axis.csv"    # Export am Ende (kompatibel zum alten Format)
+LOG_FILE = "temperature_data_dual_axis.bin"    # Binäres Log, siehe binary_log.py
+PLOT_FILE = "temperature_pwm_plot_final.png"
+FULL_RES_WINDOW_S = 600  # Letzte 10 min in voller Auflösung, älteres min-max dezimiert
+PLOT_POINTS = 1000       # ~ Pixelbreite der Achse
+XLIM_GROWTH = 1.25       # X-Achse wächst in Sprüngen -> seltene Neuzeichnungen beim Blitting
+STATUS_PREFIXES = ("PID", "Setpoint", "Kp", "Ki", "Kd", "Max PWM", "MODE")
+
+
+def find_serial_port():
+    ports = serial.tools.list_ports.comports()
+    print("Verfügbare serielle Ports:")
+    if not ports:
+        print(" -> Keine Ports gefunden.")
+        return None
+    for port in ports:
+        print(f" -> {port.device} - {port.description}")
+    print(f"Verwende Port: {ports[0].device}")
+    return ports[0].device
+
+
+def open_port(port, baud=BAUD_RATE, reset=True, capture=None):
+    """
+    Öffnet den Port. Mit reset=False bleibt DTR aus, sodass (je nach
+    Board/Treiber) kein Arduino-Reset ausgelöst wird. Mit capture=PFAD
+    werden alle empfangenen Bytes mitgeschnitten (siehe capture.py).
+    """
+    ser = serial.Serial()
+    ser.port = port
+    ser.baudrate = baud
+    ser.timeout = 1
+    if not reset:
+        ser.dtr = False
+    ser.open()
+    if capture:
+        from .capture import tee
+
+        ser = tee(ser, capture)
+    return ser
+
+
+class PIDSession:
+    """Serieller Port -> Lese-Thread -> binäres Log + Plot-Daten."""
+
+    def __init__(self, ser, log_file=LOG_FILE, plot_points=PLOT_POINTS, publish=None, publish_policy='drop',
+                 clock=time.time, start_time=None, telemetry='ascii', compress=None, tolerance=0.01, alarms=None,
+                 rollup=True):
+        self.ser = ser
+        self.log_file = log_file
+        if compress:
+            from .compressed_log import CompressedLogWriter
+
+            self.log_writer = CompressedLogWriter(log_file, start_time=start_time, mode=compress, tolerance=tolerance)
+        else:
+            self.log_writer = BinaryLogWriter(log_file, start_time=start_time)
+        self.start_time = self.log_writer.start_time
+        self.rollup = None
+        if rollup:
+            from .rollup import RollupWriter
+
+            self.rollup = RollupWriter(log_file, start_time=self.start_time)
+        self.publisher = None
+        if publish:
+            from .pubsub import SamplePublisher
+
+            self.publisher = SamplePublisher(publish, start_time=self.start_time, policy=publish_policy)
+        self.binary = telemetry == 'binary'
+        buffer = None
+        if self.binary:
+            from .telemetry import TelemetryBuffer
+
+            buffer = TelemetryBuffer()
+        self.reader = SerialLineReader(ser, clock=clock, buffer=buffer)
+        self._live = clock is time.time  # Replay: Empfangszeiten aus der Aufzeichnung
+        self.clock_sync = None
+        if self.binary:
+            from .clock_sync import ClockSync
+
+            self.clock_sync = ClockSync()
+        self.temp_series = LiveSeries(FULL_RES_WINDOW_S, plot_points)
+        self.pwm_series = LiveSeries(FULL_RES_WINDOW_S, plot_points)
+        self.samples = 0
+        self.last = None  # (timestamp, temp, pwm)
+        self._last_timestamp_written = -1
+        self._metrics = metrics.get()
+        self.alarms = None
+        if alarms:
+            from .alarms import AlarmEngine
+
+            self.alarms = AlarmEngine(alarms, on_event=self._on_alarm, command=lambda source, command: self.send(command))
+
+    def start(self):
+        self.reader.start()
+        if self.alarms is not None:
+            self.alarms.start()
+        if self.publisher is not None:
+            self.publisher.start()
+
+    def switch_to_binary(self):
+        """Schaltet die Firmware auf binäre Telemetrie (und den Port auf deren Baudrate)."""
+        from .telemetry import BINARY_BAUD, CMD_BINARY
+
+        self.send(CMD_BINARY)
+        self.ser.flush()
+        time.sleep(0.05)  # Firmware wechselt erst nach dem Senden ausstehender Zeichen
+        self.ser.baudrate = BINARY_BAUD
+
+    def process(self):
+        """Übernimmt alle seit dem letzten Aufruf empfangenen Zeilen. Gibt die Anzahl Messwerte zurück."""
+        m = self._metrics
+        if m.enabled:
+            m.gauge('line_queue_depth', self.reader.pending)
+            m.gauge('lines_dropped', self.reader.dropped)
+        count = self._process_frames(m) if self.binary else self._process_lines(m)
+        if self.reader.error is not None and not self.reader.is_alive():
+            print(f"❌ Serieller Lesefehler: {self.reader.error}")
+            self.reader.error = None
+        self.samples += count
+        m.count('samples', count)
+        return count
+
+    def _process_lines(self, m):
+        count = 0
+        for receive_time, line_bytes in self.reader.drain():
+            t0 = m.clock()
+            try:
+                parsed = parse_pid_line(line_bytes)
+            except UnicodeDecodeError as e:
+                m.count('parse_errors')
+                print(f"❌ Dekodierfehler: {line_bytes} -> {e}")
+                continue
+            except ValueError as e:
+                m.count('parse_errors')
+                print(f"⚠️ Konvertierungsfehler: '{line_bytes.decode('utf-8').strip()}' -> {e}.")
+                continue
+            m.stage('parse_line', t0)
+            if parsed is None:
+                line = line_bytes.decode("utf-8", errors="replace").strip()
+                if line and not line.startswith(STATUS_PREFIXES):
+                    print(f"⚠️ Unerwartetes Format: '{line}'.")
+                continue
+
+            temp, setpoint, pwm = parsed
+            timestamp = receive_time - self.start_time
+            self._record(timestamp, round(timestamp, 2), temp, setpoint, pwm)
+            count += 1
+            if m.enabled and self._live:
+                # Empfang im Lese-Thread -> verarbeitet (ns)
+                m.observe('line_latency', (time.time() - receive_time) * 1e9)
+
+        return count
+
+    def _record(self, timestamp, log_time, temp, setpoint, pwm, adc=None):
+        m = self._metrics
+        if self.alarms is not None:
+            self.alarms.push(timestamp, temperature=temp, setpoint=setpoint, pwm=pwm, adc=adc)
+        t0 = m.clock()
+        if log_time > self._last_timestamp_written:
+            try:
+                self.log_writer.append(log_time, temp, setpoint, pwm)
+                if self.rollup is not None:
+                    self.rollup.append(log_time, temp, setpoint, pwm)
+                self._last_timestamp_written = log_time
+            except IOError as e:
+                m.count('log_errors')
+                print(f"❌ Fehler beim Schreiben in die Log-Datei: {e}")
+        m.stage('log_append', t0)
+        if self.publisher is not None:
+            self.publisher.publish(timestamp, temp, setpoint, pwm)
+        t0 = m.clock()
+        self.temp_series.append(timestamp, temp)
+        self.pwm_series.append(timestamp, pwm)
+        m.stage('plot_append', t0)
+        self.last = (timestamp, temp, pwm)
+
+    def _process_frames(self, m):
+        """
+        Binäre Telemetrie: ein Block Frames pro Lesevorgang. Die Zeitstempel
+        kommen aus der Gerätezeit (micros), per ClockSync robust auf die
+        Host-Uhr abgebildet (Drift und Latenz-Jitter herausgerechnet).
+        """
+        count = 0
+        for receive_time, frames in self.reader.drain():
+            t0 = m.clock()
+            device_time = frames['device_time']
+            self.clock_sync.update(device_time[-1], receive_time)
+            times = self.clock_sync.to_host(device_time) - self.start_time
+            # Empfangs-Jitter darf die Zeitachse nicht zurücklaufen lassen
+            times = np.maximum.accumulate(np.maximum(times, self._last_timestamp_written + 1e-6))
+            m.stage('decode_frames', t0)
+            for timestamp, temp, setpoint, pwm, adc in zip(times.tolist(), frames['temperature'].tolist(),
+                                                           frames['setpoint'].tolist(), frames['pwm'].tolist(),
+                                                           frames['adc'].tolist()):
+                self._record(timestamp, timestamp, temp, setpoint, pwm, adc)
+            count += len(times)
+            if m.enabled and self._live:
+                m.observe('line_latency', (time.time() - receive_time) * 1e9)
+        if m.enabled:
+            decoder = self.reader.buffer.decoder
+            m.gauge('frames_lost', decoder.frames_lost)
+            m.gauge('checksum_errors', decoder.checksum_errors)
+            m.gauge('clock_drift_ppm', self.clock_sync.drift_ppm)
+        return count
+
+    def send(self, command):
+        if self.ser.is_open:
+            self.ser.write(command)
+
+    def _on_alarm(self, event):
+        """Meldung aus dem Alarm-Thread (alarms.AlarmEngine)."""
+        rule = event.rule
+        if event.raised:
+            when = f" bei {event.time:.1f}s" if event.time is not None else ""
+            shown = {k: round(v, 2) for k, v in event.values.items() if v is not None and k != 'setpoint'}
+            print(f"🚨 Alarm '{rule.name}'{when}: {rule} {shown}"
+                  + (" -> PID AUS gesendet." if rule.action == 'off' else ""))
+        else:
+            print(f"✅ Alarm '{rule.name}' aufgehoben.")
+
+    def close(self, csv_file=CSV_FILE):
+        self.reader.stop()
+        self.process()  # Restliche Zeilen aus dem Puffer noch in Log, Übersicht und an Abonnenten
+        if self.alarms is not None:
+            self.alarms.stop()
+            raised = sum(1 for e in self.alarms.events if e.raised)
+            print(f"🚨 {raised} Alarme ausgelöst, Auswertung max. {self.alarms.latency_max * 1e3:.1f} ms "
+                  f"nach Übernahme ({self.alarms.samples} Messwerte).")
+        if self.reader.dropped:
+            print(f"⚠️ {self.reader.dropped} {'Frames' if self.binary else 'Zeilen'} verworfen (Puffer voll).")
+        if self.binary:
+            stats = self.reader.buffer.decoder.stats()
+            print(f"📦 {stats['frames']} Telemetrie-Frames, {stats['frames_lost']} verloren (Sequenzlücken), "
+                  f"{stats['checksum_errors']} Prüfsummenfehler.")
+        if self.publisher is not None:
+            self.publisher.stop()
+            stats = self.publisher.stats()
+            print(f"📡 {stats['published']} Messwerte veröffentlicht, "
+                  f"{stats['disconnected_slow']} langsame Abonnenten getrennt.")
+        if self.ser.is_open:
+            try:
+                self.ser.write(b'0a' if self.binary else b'0')  # 'a': zurück auf ASCII für den Serial Plotter
+                time.sleep(0.1)
+                self.ser.close()
+                print(f"✅ Serielle Verbindung {self.ser.port} geschlossen.")
+            except serial.SerialException as e:
+                print(f"⚠️ Fehler beim Schließen der seriellen Verbindung: {e}")
+        try:
+            self.log_writer.close()
+            if self.rollup is not None:
+                self.rollup.close()
+            if csv_file:
+                rows = export_csv(self.log_file, csv_file)
+                print(f"💾 {rows} Messwerte nach '{csv_file}' exportiert.")
+        except (IOError, ValueError) as e:
+            print(f"❌ Fehler beim Schließen/Exportieren der Log-Datei: {e}")
+
+
+def pid_control(session):
+    """Tastatursteuerung: '1' PID EIN, '0' PID AUS, 'q' beendet den Thread."""
+    while True:
+        try:
+            user_input = input("➡️ Drücke '1' für PID EIN, '0' für PID AUS (oder 'q' zum Beenden): ").strip().lower()
+            if user_input in ["0", "1"]:
+                if session.ser.is_open:
+                    session.send(user_input.encode())
+                    print(f"🔄 PID {'aktiviert' if user_input == '1' else 'deaktiviert'} gesendet.")
+                else:
+                    print("⚠️ Serielle Verbindung nicht offen.")
+            elif user_input == 'q':
+                print("Beende Tastatureingabe-Thread...")
+                break
+            else:
+                print("⚠️ Ungültige Eingabe. Bitte '1', '0' oder 'q' eingeben.")
+        except EOFError:
+            print("Keine Eingabe möglich (EOF). Beende Tastatur-Thread.")
+            break
+        except Exception as e:
+            print(f"Fehler im Eingabe-Thread: {e}")
+            break
+
+
+def run_headless(session, interval=1.0, poll_interval=0.05):
+    """
+    Übernimmt die Daten alle poll_interval Sekunden (kurze Latenz für
+    Abonnenten) und gibt einmal pro Intervall eine Statuszeile aus, bis
+    Ctrl+C oder bis das Ende einer abgespielten Aufzeichnung erreicht ist.
+    """
+    next_status = time.monotonic() + interval
+    new_samples = 0
+    while True:
+        time.sleep(poll_interval)
+        reader_done = not session.reader.is_alive()
+        new_samples += session.process()
+        if reader_done and getattr(session.ser, 'at_eof', False):
+            print(f"⏹️ Ende der Aufzeichnung ({session.samples} Messwerte).")
+            return
+        if time.monotonic() >= next_status:
+            next_status += interval
+            if new_samples and session.last is not None:
+                timestamp, temp, pwm = session.last
+                print(f"{timestamp:9.1f}s  {temp:6.2f}°C  PWM {pwm:3d}  ({session.samples} Messwerte)")
+            new_samples = 0
+
+
+def run_plot(session, interval_ms=200, plot_file=PLOT_FILE):
+    """Live-Plot mit Temperatur (links) und PWM (rechts), blockiert bis das Fenster geschlossen wird."""
+    import matplotlib.pyplot as plt
+    import matplotlib.animation as animation
+
+    fig, ax1 = plt.subplots(figsize=(12, 6))
+    fig.suptitle("Live-Temperatur & PWM Daten (PID-Regelung)")
+    ax1.set_xlabel("Zeit seit Start (s)")
+
+    ax1.set_ylabel("Temperatur (°C)", color="blue")
+    ax1.tick_params(axis='y', labelcolor="blue")
+    ax1.grid(True, axis='y', linestyle=':', color='blue', alpha=0.5)
+    (line_temp,) = ax1.plot([], [], label="Temperatur", color="blue", marker='.', markersize=2, linestyle='-')
+    line_target = ax1.axhline(TARGET_TEMP, color="red", linestyle="--", linewidth=1.5,
+                              label=f"Sollwert ({TARGET_TEMP}°C)")
+
+    ax2 = ax1.twinx()
+    ax2.set_ylabel("PWM (0-255)", color="green")
+    ax2.tick_params(axis='y', labelcolor="green")
+    (line_pwm,) = ax2.plot([], [], label="PWM", color="green", linestyle=':', linewidth=1.5)
+
+    lines = [line_temp, line_pwm, line_target]
+    ax1.legend(lines, [l.get_label() for l in lines], loc='upper left')
+
+    ax1.set_xlim(0, 10)
+    ax1.set_ylim(TARGET_TEMP - 2, TARGET_TEMP + 2)
+    ax2.set_ylim(-5, 260)  # Fester PWM-Bereich
+
+    m = metrics.get()
+
+    def update(frame):
+        session.process()
+        t0 = m.clock()
+        if session.last is not None:
+            line_temp.set_data(*session.temp_series.xy())
+            line_pwm.set_data(*session.pwm_series.xy())
+
+            # Achsen nur ändern, wenn die Daten den sichtbaren Bereich verlassen.
+            # Beim Blitting erzwingt jede Änderung ein komplettes Neuzeichnen.
+            limits_changed = False
+            last_timestamp = session.last[0]
+            _, x_max = ax1.get_xlim()
+            if last_timestamp > x_max:
+                ax1.set_xlim(0, max(last_timestamp * XLIM_GROWTH, 10))
+                limits_changed = True
+
+            min_temp = session.temp_series.range.min
+            max_temp = session.temp_series.range.max
+            y_min, y_max = ax1.get_ylim()
+            if min_temp < y_min or max_temp > y_max:
+                padding_temp = max((max_temp - min_temp) * 0.1, 1.0)
+                # Stelle sicher, dass die Soll-Linie immer sichtbar ist
+                ax1.set_ylim(min(min_temp - padding_temp, TARGET_TEMP - 2),
+                             max(max_temp + padding_temp, TARGET_TEMP + 2))
+                limits_changed = True
+
+            if limits_changed:
+                fig.canvas.draw()
+                m.count('full_redraws')
+        m.stage('plot_update', t0)
+        return line_temp, line_pwm
+
+    ani = animation.FuncAnimation(fig, update, interval=interval_ms, blit=True, cache_frame_data=False)
+    try:
+        plt.show()
+    finally:
+        if plot_file:
+            try:
+                fig.savefig(plot_file)
+                print(f"🖼️ Finaler Plot gespeichert als '{plot_file}'")
+            except Exception as e:
+                print(f"❌ Fehler beim Speichern des Plots: {e}")
+    return ani
+
+
+def run(port=None, baud=BAUD_RATE, log_file=LOG_FILE, csv_file=CSV_FILE, plot=True, reset=True,
+        pid_on=False, keyboard=True, publish=None, publish_policy='drop', capture=None, replay=None, speed=1.0,
+        telemetry='ascii', compress=None, tolerance=0.01, alarms=None, rollup=True):
+    """
+    `monitor` für PIDcontrol.ino. capture=PFAD schneidet die Rohdaten mit,
+    replay=PFAD spielt eine Aufzeichnung statt des Ports ab (speed-fach,
+    0 = so schnell wie möglich); Log und CSV erhalten dann die Zeitstempel
+    der Aufzeichnung. telemetry='binary' schaltet die Firmware auf binäre
+    Frames um (auch beim Abspielen einer solchen Aufzeichnung angeben).
+    compress='lossless'/'deadband'/'swinging_door' schreibt das Log
+    komprimiert (compressed_log.py, verlustbehaftet mit `tolerance` °C).
+    alarms='default' oder eine JSON-Datei überwacht den Datenstrom mit
+    Alarmregeln (alarms.py), die bei Bedarf '0' (PID AUS) senden.
+    rollup=True pflegt neben dem Log den Übersichtsindex <log>.rollup/
+    (rollup.py) für schnelle Abfragen über lange Läufe.
+    """
+    clock, start_time = time.time, None
+    if replay:
+        from .capture import ReplaySerial
+
+        ser = ReplaySerial(replay, speed=speed)
+        clock, start_time = ser.clock, ser.start_time
+        pid_on = keyboard = False
+        print(f"▶️ Spiele '{replay}' ab ({'max.' if speed <= 0 else f'{speed:g}x'} Geschwindigkeit).")
+    else:
+        port = port or find_serial_port()
+        if not port:
+            print("❌ Kein serieller Port zum Verbinden gefunden. Skript wird beendet.")
+            return 1
+        try:
+            ser = open_port(port, baud, reset, capture)
+        except serial.SerialException as e:
+            print(f"❌ Fehler beim Öffnen des seriellen Ports {port}: {e}")
+            return 1
+        print(f"✅ Verbindung zu {port} hergestellt.")
+        if capture:
+            print(f"📼 Rohdaten werden nach '{capture}' mitgeschnitten.")
+
+    rules = None
+    if alarms:
+        from .alarms import load_rules
+
+        try:
+            rules = load_rules(alarms)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"❌ Alarmregeln '{alarms}' ungültig: {e}")
+            return 1
+    session = PIDSession(ser, log_file, publish=publish, publish_policy=publish_policy,
+                         clock=clock, start_time=start_time, telemetry=telemetry, compress=compress,
+                         tolerance=tolerance, alarms=rules, rollup=rollup)
+    print(f"💾 Log-Datei '{log_file}' initialisiert" + (f" (komprimiert: {compress})." if compress else "."))
+    if publish:
+        print(f"📡 Messwerte werden auf {publish} veröffentlicht.")
+    if rules:
+        print(f"🚨 {len(rules)} Alarmregeln aktiv.")
+    # Lese-Thread sofort starten; Meldungen aus dem Bootloader landen als
+    # unerwartetes Format im Log und stören nicht
+    session.start()
+    try:
+        switch_to_binary = session.binary and not replay
+        if (pid_on or switch_to_binary) and reset:
+            time.sleep(2)  # Befehle während des Bootloaders gehen verloren
+        if switch_to_binary:
+            session.switch_to_binary()
+            print("📦 Binäre Telemetrie aktiviert.")
+        if pid_on:
+            session.send(b'1')
+        if keyboard:
+            print("Drücke '1' oder '0' im Terminal, um PID zu steuern.")
+            threading.Thread(target=pid_control, args=(session,), daemon=True).start()
+        if plot:
+            print("Starte Live-Plot...")
+            run_plot(session)
+        else:
+            run_headless(session)
+    except KeyboardInterrupt:
+        print("\nKeyboardInterrupt empfangen.")
+    finally:
+        print("Beende Programm und schließe Ressourcen...")
+        session.close(csv_file)
+        print("Programm beendet.")
+    return 0
+
+
+def run_ntc(port=None, baud=BAUD_RATE, plot=True, reset=True, points=100, capture=None, replay=None, speed=1.0):
+    """`monitor --firmware ntc` für Arduino_NTC_Resistor.ino (eine Temperatur pro Zeile)."""
+    if replay:
+        from .capture import ReplaySerial
+
+        ser = ReplaySerial(replay, speed=speed)
+        print(f"▶️ Replaying '{replay}'.")
+    else:
+        port = port or find_serial_port() or "COM6"
+        try:
+            ser = open_port(port, baud, reset, capture)
+        except serial.SerialException as e:
+            print(f"❌ Error: {e}")
+            return 1
+        print(f"✅ Connection to {port} established.")
+    reader = SerialLineReader(ser)
+    reader.start()
+    data = deque(maxlen=points)
+
+    def poll():
+        received = 0
+        for _, line_bytes in reader.drain():
+            try:
+                line = line_bytes.decode("utf-8").strip()
+                if line:
+                    data.append(float(line))
+                    received += 1
+            except (ValueError, UnicodeDecodeError):
+                pass
+        return received
+
+    try:
+        if plot:
+            import matplotlib.pyplot as plt
+            import matplotlib.animation as animation
+
+            fig, ax = plt.subplots()
+            ax.set_title("Live Temperature Data")
+            ax.set_xlabel("Measurement Point")
+            ax.set_ylabel("Temperature (°C)")
+            line, = ax.plot([], [], label="Temperature")
+            ax.legend()
+            ax.grid()
+
+            def update(frame):
+                poll()
+                line.set_data(range(len(data)), list(data))
+                ax.set_xlim(0, len(data))
+                ax.set_ylim(min(data, default=20) - 1, max(data, default=30) + 1)
+                return line,
+
+            ani = animation.FuncAnimation(fig, update, interval=500, cache_frame_data=False)
+            plt.show()
+            del ani
+        else:
+            while True:
+                time.sleep(0.5)
+                if poll():
+                    print(f"{data[-1]:.2f} °C")
+                elif getattr(ser, 'at_eof', False) and not reader.is_alive():
+                    break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reader.stop()
+        ser.close()
+    return 0
@@ -0,0 +1,267 @@
+"""
+Monitor several incubators (PIDcontrol.ino) from one process.
+
+Every chamber gets its own serial port, line buffer, binary log and plot
+panel. All ports are read by a single selector thread (POSIX) or one reader
+thread per port (Windows).
+
+Devices are selected explicitly:
+    --device COM6                     port name / path
+    --device usb:2341:0043            first port with this USB VID:PID
+    --device usb:2341:0043:SER123     ... and this USB serial number
+    --device sn:SER123                port with this USB serial number
+A name can be prefixed: --device left=/dev/ttyACM0
+
+Usage:
+    python -m incubator.multi_monitor --device left=COM6 --device right=COM7
+    python -m incubator.multi_monitor --device sn:A1B2C3 --no-plot
+    python -m incubator.multi_monitor --device left=COM6 --device right=COM7 --alarms rules.json
+
+--alarms watches every chamber with alarm rules (alarms.py); a rule with
+"action": "off" sends '0' to the chamber that triggered it.
+"""
+import argparse
+import os
+import time
+
+import serial
+import serial.tools.list_ports
+
+from .binary_log import BinaryLogWriter
+from .live_plot import LiveSeries
+from .serial_reader import MultiplexReader, SerialLineReader, parse_pid_line
+
+BAUD_RATE = 9600
+TARGET_TEMP = 37.0
+FULL_RES_WINDOW_S = 600
+
+
+def resolve_device(spec, ports=None):
+    """Returns the port device for one --device spec (see module docstring)."""
+    if ports is None:
+        ports = serial.tools.list_ports.comports()
+    kind, _, rest = spec.partition(':')
+    if kind == 'usb':
+        fields = rest.split(':')
+        vid, pid = int(fields[0], 16), int(fields[1], 16)
+        serial_number = fields[2] if len(fields) > 2 else None
+        for port in ports:
+            if port.vid == vid and port.pid == pid and serial_number in (None, port.serial_number):
+                return port.device
+        raise LookupError(f"No serial port with USB id {spec!r}")
+    if kind == 'sn':
+        for port in ports:
+            if port.serial_number == rest:
+                return port.device
+        raise LookupError(f"No serial port with USB serial number {rest!r}")
+    return spec
+
+
+class Chamber:
+    """State of one incubator: port, parsed series and log."""
+
+    def __init__(self, name, device, log_path, start_time, alarms=None):
+        self.name = name
+        self.device = device
+        self.ser = serial.Serial(device, BAUD_RATE, timeout=0.1)
+        self.log = BinaryLogWriter(log_path, start_time=start_time)
+        self.start_time = start_time
+        self.alarms = alarms
+        self.temp_series = LiveSeries(FULL_RES_WINDOW_S, 1000)
+        self.pwm_series = LiveSeries(FULL_RES_WINDOW_S, 1000)
+        self.samples = 0
+        self.parse_errors = 0
+        self.last_temp = None
+        self.last_pwm = None
+
+    def process(self, lines):
+        for receive_time, line_bytes in lines:
+            try:
+                parsed = parse_pid_line(line_bytes)
+            except (ValueError, UnicodeDecodeError):
+                self.parse_errors += 1
+                continue
+            if parsed is None:
+                continue
+            temp, setpoint, pwm = parsed
+            t = receive_time - self.start_time
+            self.log.append(t, temp, setpoint, pwm)
+            if self.alarms is not None:
+                self.alarms.push(t, self.name, temperature=temp, setpoint=setpoint, pwm=pwm)
+            self.temp_series.append(t, temp)
+            self.pwm_series.append(t, pwm)
+            self.samples += 1
+            self.last_temp, self.last_pwm = temp, pwm
+
+    def close(self):
+        self.log.close()
+        if self.ser.is_open:
+            self.ser.close()
+
+
+class MultiMonitor:
+    """Owns the chambers and the reader thread(s)."""
+
+    def __init__(self, devices, log_dir='.', alarms=None):
+        self.start_time = time.time()
+        self.chambers = {}
+        self.alarms = None
+        if alarms:
+            from .alarms import AlarmEngine
+
+            self.alarms = AlarmEngine(alarms, on_event=self._on_alarm, command=self.send)
+        try:
+            for i, spec in enumerate(devices):
+                name, sep, device_spec = spec.partition('=')
+                if not sep:
+                    name, device_spec = f"chamber{i + 1}", spec
+                device = resolve_device(device_spec)
+                log_path = os.path.join(log_dir, f"temperature_{name}.bin")
+                self.chambers[name] = Chamber(name, device, log_path, self.start_time, self.alarms)
+                if self.alarms is not None:
+                    self.alarms.add_source(name)
+                print(f"✅ {name}: {device} -> {log_path}")
+        except Exception:
+            self.close()
+            raise
+
+        ports = {name: ch.ser for name, ch in self.chambers.items()}
+        if os.name == 'posix':
+            self._mux = MultiplexReader(ports)
+            self._readers = [self._mux]
+            self._drain = self._mux.drain
+        else:
+            self._mux = None
+            readers = {name: SerialLineReader(ser) for name, ser in ports.items()}
+            self._readers = list(readers.values())
+            self._drain = lambda name: readers[name].drain()
+
+    def start(self):
+        for reader in self._readers:
+            reader.start()
+        if self.alarms is not None:
+            self.alarms.start()
+
+    @staticmethod
+    def _on_alarm(event):
+        if event.raised:
+            action = " -> PID OFF sent" if event.rule.action == 'off' else ""
+            print(f"🚨 {event.source}: alarm '{event.rule.name}' ({event.rule}){action}")
+        else:
+            print(f"✅ {event.source}: alarm '{event.rule.name}' cleared")
+
+    def poll(self):
+        """Moves everything received so far into the chambers."""
+        for name, chamber in self.chambers.items():
+            chamber.process(self._drain(name))
+
+    def status(self):
+        parts = []
+        for name, ch in self.chambers.items():
+            temp = f"{ch.last_temp:.2f}°C" if ch.last_temp is not None else "--"
+            parts.append(f"{name}: {temp} PWM {ch.last_pwm if ch.last_pwm is not None else '--'} "
+                         f"({ch.samples} samples, {ch.parse_errors} errors)")
+        return " | ".join(parts)
+
+    def send(self, name, command):
+        self.chambers[name].ser.write(command)
+
+    def close(self):
+        if self.alarms is not None:
+            self.alarms.stop()
+        for reader in getattr(self, '_readers', []):
+            reader.stop()
+        for chamber in self.chambers.values():
+            try:
+                if chamber.ser.is_open:
+                    chamber.ser.write(b'0')
+            except serial.SerialException:
+                pass
+            chamber.close()
+
+
+def run_plot(monitor, interval_ms=500):
+    import math
+
+    import matplotlib.pyplot as plt
+    import matplotlib.animation as animation
+
+    n = len(monitor.chambers)
+    cols = min(n, 2)
+    rows = math.ceil(n / cols)
+    fig, axes = plt.subplots(rows, cols, figsize=(7 * cols, 4 * rows), squeeze=False)
+    fig.suptitle("Live-Temperatur & PWM (mehrere Inkubatoren)")
+    panels = {}
+    for ax, (name, chamber) in zip(axes.flat, monitor.chambers.items()):
+        ax.set_title(f"{name} ({chamber.device})")
+        ax.set_xlabel("Zeit seit Start (s)")
+        ax.set_ylabel("Temperatur (°C)", color="blue")
+        ax.axhline(TARGET_TEMP, color="red", linestyle="--", linewidth=1.0)
+        (line_temp,) = ax.plot([], [], color="blue", linewidth=1.0)
+        ax_pwm = ax.twinx()
+        ax_pwm.set_ylim(-5, 260)
+        ax_pwm.set_ylabel("PWM", color="green")
+        (line_pwm,) = ax_pwm.plot([], [], color="green", linestyle=':', linewidth=1.0)
+        panels[name] = (ax, line_temp, line_pwm)
+    for ax in list(axes.flat)[n:]:
+        ax.set_visible(False)
+    fig.tight_layout()
+
+    def update(frame):
+        monitor.poll()
+        for name, (ax, line_temp, line_pwm) in panels.items():
+            chamber = monitor.chambers[name]
+            if not chamber.samples:
+                continue
+            x, y = chamber.temp_series.xy()
+            line_temp.set_data(x, y)
+            line_pwm.set_data(*chamber.pwm_series.xy())
+            ax.set_xlim(0, max(x[-1] * 1.05, 10))
+            rng = chamber.temp_series.range
+            padding = max((rng.max - rng.min) * 0.1, 1.0)
+            ax.set_ylim(min(rng.min - padding, TARGET_TEMP - 2), max(rng.max + padding, TARGET_TEMP + 2))
+        return []
+
+    ani = animation.FuncAnimation(fig, update, interval=interval_ms, cache_frame_data=False)
+    plt.show()
+    return ani
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monitor several incubators from one process.")
+    parser.add_argument('--device', action='append', required=True, help="see module docstring")
+    parser.add_argument('--log-dir', default='.')
+    parser.add_argument('--no-plot', action='store_true', help="print status lines instead of plotting")
+    parser.add_argument('--pid-on', action='store_true', help="send '1' (PID ON) to every chamber at start")
+    parser.add_argument('--alarms', nargs='?', const='default', metavar='RULES',
+                        help="alarm rules: built-in set, or a JSON file (see incubator/alarms.py)")
+    args = parser.parse_args()
+
+    rules = None
+    if args.alarms:
+        from .alarms import load_rules
+
+        rules = load_rules(args.alarms)
+    monitor = MultiMonitor(args.device, args.log_dir, alarms=rules)
+    try:
+        time.sleep(2)  # Arduino reset after opening the port
+        monitor.start()
+        if args.pid_on:
+            for name in monitor.chambers:
+                monitor.send(name, b'1')
+        if args.no_plot:
+            while True:
+                time.sleep(1.0)
+                monitor.poll()
+                print(monitor.status())
+        else:
+            run_plot(monitor)
+    except KeyboardInterrupt:
+        print("\nKeyboardInterrupt empfangen.")
+    finally:
+        monitor.close()
+        print("Programm beendet.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+import numpy as np
+
+ADC_MAX = 1023
+KELVIN_OFFSET = 273.15
+
+# Sentinel temperatures for the two rail codes of the voltage divider.
+# ADC = 0    -> no current through the NTC (open circuit / broken wire)
+# ADC = 1023 -> NTC resistance ~0 (short circuit)
+TEMP_OPEN_CIRCUIT = -999.0
+TEMP_SHORT_CIRCUIT = 999.0
+
+
+class BetaModel:
+    """
+    Beta approximation of the NTC characteristic:
+    1/T = 1/T0 + 1/BETA * ln(R/R0)
+    """
+
+    def __init__(self, beta=3435.0, r0=10000.0, t0_k=KELVIN_OFFSET + 25.0):
+        self.beta = float(beta)
+        self.r0 = float(r0)
+        self.t0_k = float(t0_k)
+
+    def resistance_to_kelvin(self, r_ntc):
+        inv_t = (1.0 / self.t0_k) + (1.0 / self.beta) * np.log(r_ntc / self.r0)
+        return 1.0 / inv_t
+
+    def __repr__(self):
+        return f"BetaModel(beta={self.beta}, r0={self.r0}, t0_k={self.t0_k})"
+
+
+class SteinhartHartModel:
+    """
+    Full Steinhart-Hart equation:
+    1/T = A + B * ln(R) + C * ln(R)^3
+    """
+
+    def __init__(self, a, b, c):
+        self.a = float(a)
+        self.b = float(b)
+        self.c = float(c)
+
+    def resistance_to_kelvin(self, r_ntc):
+        ln_r = np.log(r_ntc)
+        inv_t = self.a + self.b * ln_r + self.c * ln_r ** 3
+        return 1.0 / inv_t
+
+    def __repr__(self):
+        return f"SteinhartHartModel(a={self.a}, b={self.b}, c={self.c})"
+
+
+class NTCLookupTable:
+    """
+    Precomputed ADC -> temperature / voltage tables for one NTC model.
+    Circuit: 5V --- NTC --- A0 --- R_fixed --- GND
+
+    Every possible ADC code is converted once at construction, so a block
+    of samples is converted with a single array gather. Codes above
+    adc_max are clipped to adc_max (short-circuit sentinel).
+    """
+
+    def __init__(self, model, r_fixed=10000.0, adc_max=ADC_MAX, vcc=5.0,
+                 open_value=TEMP_OPEN_CIRCUIT, short_value=TEMP_SHORT_CIRCUIT):
+        self.model = model
+        self.r_fixed = float(r_fixed)
+        self.adc_max = int(adc_max)
+        self.vcc = float(vcc)
+        self.open_value = float(open_value)
+        self.short_value = float(short_value)
+
+        codes = np.arange(self.adc_max + 1, dtype=np.float64)
+        temperatures = np.empty(self.adc_max + 1, dtype=np.float64)
+        inner = codes[1:-1]
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            r_ntc = self.r_fixed * (self.adc_max / inner - 1.0)
+            temperatures[1:-1] = model.resistance_to_kelvin(r_ntc) - KELVIN_OFFSET
+        temperatures[0] = self.open_value
+        temperatures[-1] = self.short_value
+
+        valid = np.isfinite(temperatures)
+        valid[0] = False
+        valid[-1] = False
+        temperatures[~np.isfinite(temperatures)] = np.nan
+
+        self.temperature_table = temperatures
+        self.voltage_table = codes / self.adc_max * self.vcc
+        self.valid_table = valid
+        for table in (self.temperature_table, self.voltage_table, self.valid_table):
+            table.setflags(write=False)
+
+    def temperatures(self, adc_codes):
+        """Converts ADC codes to temperature (Celsius)."""
+        return np.take(self.temperature_table, adc_codes, mode='clip')
+
+    def voltages(self, adc_codes):
+        """Converts ADC codes to the voltage across R_fixed."""
+        return np.take(self.voltage_table, adc_codes, mode='clip')
+
+    def valid(self, adc_codes):
+        """Boolean mask of codes that map to a real temperature (no rail, no NaN)."""
+        return np.take(self.valid_table, adc_codes, mode='clip')
+
+    def convert(self, adc_codes):
+        """
+        Converts a block of ADC codes in one pass.
+        Returns (temperatures, voltages, valid_mask).
+        """
+        adc_codes = np.asarray(adc_codes)
+        return self.temperatures(adc_codes), self.voltages(adc_codes), self.valid(adc_codes)
+
+    def __repr__(self):
+        return (f"NTCLookupTable({self.model!r}, r_fixed={self.r_fixed}, "
+                f"adc_max={self.adc_max}, vcc={self.vcc})")
@@ -0,0 +1,172 @@
+"""
+Vectorized PID + heater simulation for gain sweeps.
+
+Reproduces the discrete PID_v1 controller of PIDcontrol.ino (DIRECT,
+proportional on error, derivative on measurement, integral and output
+clamped to 0..255, output truncated to int for analogWrite) driving a
+first-order-plus-dead-time heater model. Thousands of gain combinations
+are stepped together as NumPy arrays; large grids are split across a
+process pool.
+
+Usage:
+    python -m incubator.pid_sim --kp 2:40:20 --ki 0:0.5:21 --kd 0:50:11 --tau 300 --gain 40 --dead-time 5
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+METRICS = ('overshoot', 'settling_time', 'ripple', 'pwm_effort', 'final_error')
+
+
+def simulate(kp, ki, kd, setpoint=37.0, ambient=22.0, gain=40.0, tau=300.0, dead_time=0.0,
+             duration=3600.0, sample_time=0.1, out_min=0.0, out_max=255.0, initial=None,
+             settle_band=0.2, ripple_window=0.2, adc_noise=0.0, seed=None):
+    """
+    Simulates len(kp) controllers in parallel (kp, ki, kd and the plant
+    parameters broadcast against each other).
+
+    Returns a dict of per-candidate arrays:
+      overshoot      max(T) - setpoint, >= 0 (°C)
+      settling_time  last time |T - setpoint| > settle_band (s), inf if never settled
+      ripple         peak-to-peak T over the last `ripple_window` fraction of the run (°C)
+      pwm_effort     mean PWM / 255 over the run
+      final_error    mean(T) - setpoint over the ripple window (°C)
+    """
+    kp, ki, kd, ambient, gain, tau = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(v, dtype=np.float64)) for v in (kp, ki, kd, ambient, gain, tau)))
+    n = kp.shape[0]
+    steps = int(round(duration / sample_time))
+    delay_steps = int(round(dead_time / sample_time))
+    ripple_start = int(steps * (1.0 - ripple_window))
+    rng = np.random.default_rng(seed) if adc_noise > 0 else None
+
+    # PID_v1 scales the gains by the sample time once (SetTunings)
+    ki_s = ki * sample_time
+    kd_s = kd / sample_time
+    decay = np.exp(-sample_time / tau)
+
+    temp = ambient.copy() if initial is None else np.full(n, float(initial))
+    output_sum = np.zeros(n)
+    last_input = temp.copy()
+    pwm = np.zeros(n)
+    pwm_history = np.zeros((max(delay_steps, 1), n))
+
+    t_max = temp.copy()
+    last_outside = np.zeros(n)
+    pwm_total = np.zeros(n)
+    win_min = np.full(n, np.inf)
+    win_max = np.full(n, -np.inf)
+    win_sum = np.zeros(n)
+
+    for step in range(steps):
+        measured = temp if rng is None else temp + rng.normal(0.0, adc_noise, n)
+        error = setpoint - measured
+        output_sum = np.clip(output_sum + ki_s * error, out_min, out_max)
+        output = np.clip(kp * error + output_sum - kd_s * (measured - last_input), out_min, out_max)
+        last_input = measured
+        pwm = np.floor(output)
+
+        if delay_steps:
+            slot = step % delay_steps
+            applied = pwm_history[slot].copy()
+            pwm_history[slot] = pwm
+        else:
+            applied = pwm
+        target = ambient + gain * applied / 255.0
+        temp = target + (temp - target) * decay
+
+        t = (step + 1) * sample_time
+        np.maximum(t_max, temp, out=t_max)
+        last_outside[np.abs(temp - setpoint) > settle_band] = t
+        pwm_total += pwm
+        if step >= ripple_start:
+            np.minimum(win_min, temp, out=win_min)
+            np.maximum(win_max, temp, out=win_max)
+            win_sum += temp
+
+    settled = last_outside < steps * sample_time
+    return {
+        'overshoot': np.maximum(t_max - setpoint, 0.0),
+        'settling_time': np.where(settled, last_outside, np.inf),
+        'ripple': win_max - win_min,
+        'pwm_effort': pwm_total / (steps * out_max),
+        'final_error': win_sum / max(steps - ripple_start, 1) - setpoint,
+    }
+
+
+def _simulate_chunk(args):
+    kp, ki, kd, kwargs = args
+    return simulate(kp, ki, kd, **kwargs)
+
+
+def sweep(kp_values, ki_values, kd_values, workers=None, chunk_size=4096, **kwargs):
+    """
+    Simulates the full grid kp x ki x kd. Grids larger than one chunk are
+    spread across a process pool (workers=1 keeps everything in-process).
+    Returns a dict with 'kp', 'ki', 'kd' and the METRICS arrays.
+    """
+    kp, ki, kd = (g.ravel() for g in np.meshgrid(np.atleast_1d(kp_values), np.atleast_1d(ki_values),
+                                                 np.atleast_1d(kd_values), indexing='ij'))
+    chunks = [(kp[i:i + chunk_size], ki[i:i + chunk_size], kd[i:i + chunk_size], kwargs)
+              for i in range(0, len(kp), chunk_size)]
+    if workers is None:
+        workers = min(len(chunks), os.cpu_count() or 1)
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_simulate_chunk, chunks))
+    else:
+        results = [_simulate_chunk(c) for c in chunks]
+
+    out = {'kp': kp, 'ki': ki, 'kd': kd}
+    for name in METRICS:
+        out[name] = np.concatenate([r[name] for r in results])
+    return out
+
+
+def _grid(spec):
+    """'start:stop:num' -> linspace, or a single number."""
+    parts = spec.split(':')
+    if len(parts) == 1:
+        return np.array([float(parts[0])])
+    start, stop, num = float(parts[0]), float(parts[1]), int(parts[2])
+    return np.linspace(start, stop, num)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized PID gain sweep on a heater model.")
+    parser.add_argument('--kp', default='10', help="value or start:stop:num")
+    parser.add_argument('--ki', default='0.15')
+    parser.add_argument('--kd', default='25')
+    parser.add_argument('--setpoint', type=float, default=37.0)
+    parser.add_argument('--ambient', type=float, default=22.0)
+    parser.add_argument('--gain', type=float, default=40.0, help="steady-state rise at PWM 255 (°C)")
+    parser.add_argument('--tau', type=float, default=300.0, help="plant time constant (s)")
+    parser.add_argument('--dead-time', type=float, default=0.0, help="plant dead time (s)")
+    parser.add_argument('--duration', type=float, default=3600.0, help="simulated time (s)")
+    parser.add_argument('--settle-band', type=float, default=0.2, help="±°C band for settling time")
+    parser.add_argument('--max-overshoot', type=float, default=None, help="drop candidates above this (°C)")
+    parser.add_argument('--sort', choices=METRICS, default='settling_time')
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    result = sweep(_grid(args.kp), _grid(args.ki), _grid(args.kd), workers=args.workers,
+                   setpoint=args.setpoint, ambient=args.ambient, gain=args.gain, tau=args.tau,
+                   dead_time=args.dead_time, duration=args.duration, settle_band=args.settle_band)
+    keep = np.ones(len(result['kp']), dtype=bool)
+    if args.max_overshoot is not None:
+        keep &= result['overshoot'] <= args.max_overshoot
+    order = np.flatnonzero(keep)[np.argsort(result[args.sort][keep], kind='stable')][:args.top]
+
+    print(f"{len(result['kp'])} candidates simulated, {int(keep.sum())} kept, sorted by {args.sort}:")
+    print(f"{'Kp':>8} {'Ki':>8} {'Kd':>8} {'overshoot':>10} {'settling':>10} {'ripple':>8} {'effort':>7}")
+    for i in order:
+        print(f"{result['kp'][i]:8.3f} {result['ki'][i]:8.4f} {result['kd'][i]:8.3f} "
+              f"{result['overshoot'][i]:10.3f} {result['settling_time'][i]:10.1f} "
+              f"{result['ripple'][i]:8.3f} {result['pwm_effort'][i]:7.3f}")
+
+
+if __name__ == '__main__':
+    main()
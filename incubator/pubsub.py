@@ -0,0 +1,399 @@
+"""
+Local publish/subscribe of live samples.
+
+The process that owns the serial port publishes decoded samples on a Unix
+domain socket or a localhost TCP port; any number of plotters, loggers or
+alarm tools subscribe independently.
+
+Wire format (little endian), one frame = FRAME header + payload:
+    FRAME     kind u1, payload_length u4
+    HELLO     PUB_MAGIC, record_size u2, start_time f8   (first frame)
+    SAMPLES   n packed binary_log.LOG_DTYPE records (17 bytes each)
+    DROPPED   number of records dropped for this subscriber u8
+
+publish() only appends to a list under a lock and never blocks. A sender
+thread batches the pending samples every `flush_interval` seconds and
+writes them with non-blocking sends. Each subscriber has its own bounded
+queue (`max_queue_bytes`). When a subscriber falls behind, either its
+oldest frames are dropped and a DROPPED frame tells it how many records
+it missed (policy 'drop'), or it is disconnected (policy 'disconnect').
+On stop() the queued frames are still sent, for at most `drain_timeout`
+seconds, before the subscribers are disconnected.
+
+Addresses: 'unix:/path/to.sock', 'tcp:127.0.0.1:5760' or '127.0.0.1:5760'.
+
+Usage:
+    python -m incubator monitor --publish unix:/tmp/incubator.sock
+    python -m incubator.pubsub unix:/tmp/incubator.sock
+    python -m incubator.pubsub unix:/tmp/incubator.sock --log copy.bin
+"""
+import argparse
+import os
+import selectors
+import socket
+import struct
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from .binary_log import LOG_DTYPE
+
+PUB_MAGIC = b'INCPUB01'
+FRAME = struct.Struct('<BI')
+HELLO = struct.Struct('<8sHd')
+DROPPED_COUNT = struct.Struct('<Q')
+
+KIND_HELLO = 0
+KIND_SAMPLES = 1
+KIND_DROPPED = 2
+
+
+def parse_address(address):
+    """Returns (family, sockaddr) for 'unix:PATH', 'tcp:HOST:PORT' or 'HOST:PORT'."""
+    if address.startswith('unix:'):
+        return socket.AF_UNIX, address[5:]
+    if address.startswith('tcp:'):
+        address = address[4:]
+    host, _, port = address.rpartition(':')
+    return socket.AF_INET, (host or '127.0.0.1', int(port))
+
+
+def encode_frame(kind, payload):
+    return FRAME.pack(kind, len(payload)) + payload
+
+
+class _Subscriber:
+    """Send queue of one connected subscriber."""
+
+    def __init__(self, sock, peer):
+        self.sock = sock
+        self.peer = peer
+        self.frames = deque()  # (frame bytes, records in frame)
+        self.queued_bytes = 0
+        self.offset = 0        # bytes of frames[0] already sent
+        self.dropped = 0       # records dropped, not yet reported
+        self.dropped_total = 0
+        self.sent_bytes = 0
+
+    def enqueue(self, frame, records, max_bytes, policy):
+        """Returns False if the subscriber has to be disconnected."""
+        self.frames.append((frame, records))
+        self.queued_bytes += len(frame)
+        if self.queued_bytes <= max_bytes:
+            return True
+        if policy == 'disconnect':
+            return False
+        # drop whole sample frames from the front; a partially sent frame
+        # and control frames (hello, drop notices) are kept
+        keep = 1 if self.offset else 0
+        while self.queued_bytes > max_bytes and len(self.frames) > keep + 1:
+            if self.frames[keep][1] == 0:
+                keep += 1
+                continue
+            old, old_records = self.frames[keep]
+            del self.frames[keep]
+            self.queued_bytes -= len(old)
+            self.dropped += old_records
+            self.dropped_total += old_records
+        return True
+
+    def write(self):
+        """Sends as much as the socket accepts. Returns False on a broken connection."""
+        while True:
+            # report drops at the next frame boundary, before newer samples
+            if self.dropped and not self.offset:
+                notice = encode_frame(KIND_DROPPED, DROPPED_COUNT.pack(self.dropped))
+                self.frames.appendleft((notice, 0))
+                self.queued_bytes += len(notice)
+                self.dropped = 0
+            if not self.frames:
+                return True
+            frame, _ = self.frames[0]
+            try:
+                sent = self.sock.send(memoryview(frame)[self.offset:])
+            except (BlockingIOError, InterruptedError):
+                return True
+            except OSError:
+                return False
+            self.sent_bytes += sent
+            self.offset += sent
+            if self.offset < len(frame):
+                return True
+            self.frames.popleft()
+            self.queued_bytes -= len(frame)
+            self.offset = 0
+
+
+class SamplePublisher(threading.Thread):
+    """
+    Publishes (t, temperature, setpoint, pwm) samples to all connected
+    subscribers. `t` is seconds since `start_time`, as in the binary log.
+    """
+
+    def __init__(self, address, start_time=None, max_queue_bytes=1 << 20, policy='drop',
+                 flush_interval=0.02, drain_timeout=2.0):
+        super().__init__(daemon=True, name=f"SamplePublisher({address})")
+        if policy not in ('drop', 'disconnect'):
+            raise ValueError("policy must be 'drop' or 'disconnect'")
+        self.address = address
+        self.start_time = time.time() if start_time is None else float(start_time)
+        self.max_queue_bytes = int(max_queue_bytes)
+        self.policy = policy
+        self.flush_interval = float(flush_interval)
+        self.drain_timeout = float(drain_timeout)
+        self.published = 0
+        self.disconnected_slow = 0
+        self._pending = []
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self._stop_event = threading.Event()
+
+        family, sockaddr = parse_address(address)
+        self._unix_path = sockaddr if family == socket.AF_UNIX else None
+        if self._unix_path and os.path.exists(self._unix_path):
+            os.unlink(self._unix_path)  # stale socket from a previous run
+        self._server = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_INET:
+            self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind(sockaddr)
+        self._server.listen()
+        self._server.setblocking(False)
+        self._hello = encode_frame(KIND_HELLO, HELLO.pack(PUB_MAGIC, LOG_DTYPE.itemsize, self.start_time))
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._server, selectors.EVENT_READ, None)
+
+    @property
+    def subscribers(self):
+        return len(self._subscribers)
+
+    def publish(self, t, temperature, setpoint, pwm):
+        """
+        Queues one sample; never blocks on subscribers. Values are converted
+        here (pwm clipped to 0..255), so a bad sample raises in the caller
+        instead of stopping the sender thread.
+        """
+        sample = (float(t), float(temperature), float(setpoint), min(max(int(pwm), 0), 255))
+        with self._lock:
+            self._pending.append(sample)
+
+    def stats(self):
+        subscribers = list(self._subscribers.values())
+        return {
+            'published': self.published,
+            'subscribers': len(subscribers),
+            'disconnected_slow': self.disconnected_slow,
+            'queued_bytes': {sub.peer: sub.queued_bytes for sub in subscribers},
+            'dropped_records': {sub.peer: sub.dropped_total for sub in subscribers},
+        }
+
+    def run(self):
+        next_flush = time.monotonic() + self.flush_interval
+        while not self._stop_event.is_set():
+            timeout = max(0.0, next_flush - time.monotonic())
+            self._poll(timeout)
+            if time.monotonic() >= next_flush:
+                self._flush()
+                next_flush = time.monotonic() + self.flush_interval
+        self._flush()
+        # send what is still queued (slow subscribers) before disconnecting
+        deadline = time.monotonic() + self.drain_timeout
+        while any(sub.frames for sub in self._subscribers.values()) and time.monotonic() < deadline:
+            self._poll(deadline - time.monotonic(), accept=False)
+        for sub in list(self._subscribers.values()):
+            self._drop(sub)
+        self._selector.close()
+        self._server.close()
+        if self._unix_path:
+            try:
+                os.unlink(self._unix_path)
+            except OSError:
+                pass
+
+    def _poll(self, timeout, accept=True):
+        for key, events in self._selector.select(timeout):
+            if key.data is None:
+                if accept:
+                    self._accept()
+                continue
+            sub = key.data
+            if events & selectors.EVENT_READ and not self._connected(sub):
+                self._drop(sub)
+            elif events & selectors.EVENT_WRITE:
+                self._write(sub)
+
+    def _accept(self):
+        try:
+            sock, peer = self._server.accept()
+        except (BlockingIOError, InterruptedError):
+            return
+        sock.setblocking(False)
+        sub = _Subscriber(sock, str(peer) if peer else f"unix#{sock.fileno()}")
+        self._subscribers[sock.fileno()] = sub
+        self._selector.register(sock, selectors.EVENT_READ, sub)
+        sub.enqueue(self._hello, 0, self.max_queue_bytes, 'drop')
+        self._write(sub)
+
+    def _connected(self, sub):
+        """Subscribers never send; readable usually means EOF. Anything else is discarded."""
+        try:
+            return bool(sub.sock.recv(4096))
+        except (BlockingIOError, InterruptedError):
+            return True
+        except OSError:
+            return False
+
+    def _flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return
+        self.published += len(pending)
+        if not self._subscribers:
+            return
+        frame = encode_frame(KIND_SAMPLES, np.array(pending, dtype=LOG_DTYPE).tobytes())
+        for sub in list(self._subscribers.values()):
+            if not sub.enqueue(frame, len(pending), self.max_queue_bytes, self.policy):
+                self.disconnected_slow += 1
+                self._drop(sub)
+            else:
+                self._write(sub)
+
+    def _write(self, sub):
+        if not sub.write():
+            self._drop(sub)
+            return
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if sub.frames else 0)
+        self._selector.modify(sub.sock, events, sub)
+
+    def _drop(self, sub):
+        self._subscribers.pop(sub.sock.fileno(), None)
+        try:
+            self._selector.unregister(sub.sock)
+        except (KeyError, ValueError):
+            pass
+        sub.sock.close()
+
+    def stop(self, timeout=None):
+        """Stops the thread after draining the queues (joins for drain_timeout + 1 s by default)."""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(self.drain_timeout + 1.0 if timeout is None else timeout)
+
+
+class SampleSubscriber:
+    """
+    Blocking client. recv() returns the next batch of samples as a LOG_DTYPE
+    record array (empty on timeout); `dropped` counts records the publisher
+    discarded because this subscriber was too slow. Received bytes are kept
+    in a buffer across calls, so a timeout in the middle of a frame does not
+    lose the framing.
+    """
+
+    def __init__(self, address, timeout=None):
+        family, sockaddr = parse_address(address)
+        self.sock = socket.create_connection(sockaddr) if family == socket.AF_INET else socket.socket(family)
+        if family == socket.AF_UNIX:
+            self.sock.connect(sockaddr)
+        self.sock.settimeout(timeout)
+        self._buffer = bytearray()
+        self.dropped = 0
+        self.received = 0
+        try:
+            self._handshake(address)
+        except BaseException:
+            self.sock.close()
+            raise
+
+    def _handshake(self, address):
+        kind, payload = self._read_frame()
+        if kind != KIND_HELLO or len(payload) != HELLO.size:
+            raise ValueError(f"Unexpected publisher handshake from {address!r}")
+        magic, record_size, self.start_time = HELLO.unpack(payload)
+        if magic != PUB_MAGIC or record_size != LOG_DTYPE.itemsize:
+            raise ValueError(f"Unexpected publisher handshake from {address!r}")
+
+    def _next_frame(self):
+        """(kind, payload) of the first complete frame in the buffer, or None."""
+        buf = self._buffer
+        if len(buf) < FRAME.size:
+            return None
+        kind, length = FRAME.unpack_from(buf)
+        end = FRAME.size + length
+        if len(buf) < end:
+            return None
+        payload = bytes(buf[FRAME.size:end])
+        del buf[:end]
+        return kind, payload
+
+    def _read_frame(self):
+        """Blocks until a whole frame is buffered; socket.timeout keeps the partial frame."""
+        while True:
+            frame = self._next_frame()
+            if frame is not None:
+                return frame
+            chunk = self.sock.recv(1 << 16)
+            if not chunk:
+                raise ConnectionError("Publisher closed the connection")
+            self._buffer += chunk
+
+    def recv(self):
+        while True:
+            try:
+                kind, payload = self._read_frame()
+            except socket.timeout:
+                return np.zeros(0, dtype=LOG_DTYPE)
+            if kind == KIND_SAMPLES:
+                records = np.frombuffer(payload, dtype=LOG_DTYPE)
+                self.received += len(records)
+                return records
+            if kind == KIND_DROPPED:
+                self.dropped += DROPPED_COUNT.unpack(payload)[0]
+
+    def __iter__(self):
+        while True:
+            try:
+                yield self.recv()
+            except ConnectionError:
+                return
+
+    def close(self):
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Subscribe to live samples published by `monitor --publish`.")
+    parser.add_argument('address', help="unix:PATH or [tcp:]HOST:PORT")
+    parser.add_argument('--log', help="write the samples to this binary log instead of printing")
+    args = parser.parse_args()
+
+    log = None
+    with SampleSubscriber(args.address) as sub:
+        if args.log:
+            from .binary_log import BinaryLogWriter
+
+            log = BinaryLogWriter(args.log, start_time=sub.start_time)
+        try:
+            for batch in sub:
+                for t, temp, setpoint, pwm in batch.tolist():
+                    if log is not None:
+                        log.append(t, temp, setpoint, pwm)
+                    else:
+                        print(f"{t:10.2f}s  {temp:6.2f}°C  soll {setpoint:5.2f}  PWM {pwm:3d}")
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if log is not None:
+                log.close()
+            print(f"{sub.received} samples received, {sub.dropped} dropped by the publisher.")
+
+
+if __name__ == '__main__':
+    main()
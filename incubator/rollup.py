@@ -0,0 +1,449 @@
+"""
+Multi-resolution rollup index next to a temperature log.
+
+RollupWriter is fed the same samples as the log writer and keeps one
+pyramid tier per bucket width (TIERS: 1 s, 10 s, 1 min, 10 min, 1 h).
+Each bucket holds count, min, max, mean and M2 (for the std) per channel;
+a closed bucket of one tier is merged into the open bucket of the next
+(parallel Welford / Chan et al.), so only the finest tier ever sees raw
+samples. Samples are collected and reduced in vectorized batches (at most
+`batch_records` samples or `flush_interval` seconds of sample time), so a
+bucket reaches its file at most that much after it closed.
+
+Each tier is one append-only file of fixed-width records in the directory
+`<log>.rollup/` (header like binary_log, then the closed buckets in time
+order; a partial record after a crash is ignored, `build` recreates the
+index from the log). Buckets are aligned to multiples of their width in
+log time.
+
+RollupReader answers range queries from the coarsest tier that is fine
+enough: series(t_start, t_end, points=1000) returns ~points buckets for a
+plot of any zoom level; below 1 s it falls back to the raw log.
+summary(t_start, t_end) covers the range with whole buckets, coarse ones
+in the middle and finer ones at the edges, so a stability report over a
+month reads a few hundred records. Time ranges not yet covered by a
+coarse tier (its bucket is still open) are answered by the finer tiers.
+
+Usage:
+    python -m incubator monitor                       # writes temperature_data_dual_axis.bin.rollup/
+    python -m incubator.rollup build run.bin          # (re)create the index of an existing log
+    python -m incubator.rollup summary run.bin --start 3600 --end 604800
+    python -m incubator.rollup plot run.bin --points 2000
+"""
+import argparse
+import bisect
+import math
+import os
+import struct
+import time
+
+import numpy as np
+
+MAGIC = b'INCRUP01'
+HEADER = struct.Struct('<8sHHdd')  # magic, header_size, record_size, bucket width (s), start_time
+HEADER_SIZE = 64
+TIERS = (1.0, 10.0, 60.0, 600.0, 3600.0)
+CHANNELS = ('temperature', 'pwm')
+
+
+def rollup_dtype(channels=CHANNELS):
+    """Bucket record: start time (s since start_time), sample count, then min/max/mean/M2 per channel."""
+    fields = [('time', '<f8'), ('count', '<u4')]
+    for name in channels:
+        fields += [(f'{name}_min', '<f4'), (f'{name}_max', '<f4'), (f'{name}_mean', '<f8'), (f'{name}_m2', '<f8')]
+    return np.dtype(fields)
+
+
+def rollup_dir(log_path):
+    return log_path + '.rollup'
+
+
+def tier_path(directory, width):
+    return os.path.join(directory, f'{width:g}s.roll')
+
+
+def merge_runs(records, keys, dtype):
+    """
+    Combines consecutive records with equal keys into one record each
+    (keys non-decreasing). Returns the merged records; 'time' is left to
+    the caller.
+    """
+    starts = np.flatnonzero(np.diff(keys, prepend=keys[0] - 1))
+    n = records['count'].astype(np.float64)
+    total = np.add.reduceat(n, starts)
+    group = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, len(records))))
+    out = np.zeros(len(starts), dtype=dtype)
+    out['count'] = total
+    for name in dtype.names[2::4]:
+        channel = name[:-len('_min')]
+        mean = records[f'{channel}_mean']
+        merged_mean = np.add.reduceat(n * mean, starts) / total
+        out[f'{channel}_min'] = np.minimum.reduceat(records[f'{channel}_min'], starts)
+        out[f'{channel}_max'] = np.maximum.reduceat(records[f'{channel}_max'], starts)
+        out[f'{channel}_mean'] = merged_mean
+        out[f'{channel}_m2'] = np.add.reduceat(records[f'{channel}_m2'] + n * (mean - merged_mean[group]) ** 2,
+                                               starts)
+    return out
+
+
+class _Tier:
+    """One bucket width: the open bucket plus the file of closed ones."""
+
+    def __init__(self, path, width, start_time, dtype):
+        self.width = float(width)
+        self.dtype = dtype
+        self.open = None  # 1-record array of the bucket still collecting
+        self.buckets_written = 0
+        self._file = open(path, 'wb')
+        header = HEADER.pack(MAGIC, HEADER_SIZE, dtype.itemsize, self.width, start_time)
+        self._file.write(header.ljust(HEADER_SIZE, b'\0'))
+
+    def add(self, records):
+        """Merges time-ordered records (samples or finer buckets). Returns the buckets closed by them."""
+        keys = np.floor(records['time'] / self.width).astype(np.int64)
+        if self.open is not None:
+            records = np.concatenate((self.open, records))
+            keys = np.concatenate(([int(self.open['time'][0] // self.width)], keys))
+        np.maximum.accumulate(keys, out=keys)  # late samples go into the open bucket
+        merged = merge_runs(records, keys, self.dtype)
+        merged['time'] = np.unique(keys) * self.width
+        self.open = merged[-1:]
+        return self._write(merged[:-1])
+
+    def finish(self):
+        """Closes the open bucket. Returns it (empty if there was none)."""
+        closed = self.open if self.open is not None else np.zeros(0, dtype=self.dtype)
+        self.open = None
+        return self._write(closed)
+
+    def _write(self, closed):
+        if len(closed):
+            self._file.write(closed.tobytes())
+            self.buckets_written += len(closed)
+        return closed
+
+    def flush(self, sync=False):
+        self._file.flush()
+        if sync:
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        if not self._file.closed:
+            self.flush(sync=True)
+            self._file.close()
+
+
+class RollupWriter:
+    """
+    Maintains the rollup tiers of one log; append() takes the arguments of
+    BinaryLogWriter.append() (setpoint is not rolled up).
+    """
+
+    def __init__(self, log_path, start_time=0.0, tiers=TIERS, batch_records=1024, flush_interval=60.0,
+                 fsync_interval=10.0):
+        self.directory = rollup_dir(log_path)
+        self.channels = CHANNELS
+        self.dtype = rollup_dtype(self.channels)
+        self.flush_interval = float(flush_interval)
+        self.fsync_interval = float(fsync_interval)
+        os.makedirs(self.directory, exist_ok=True)
+        self.tiers = [_Tier(tier_path(self.directory, w), w, start_time, self.dtype) for w in sorted(tiers)]
+        self.batch_records = int(batch_records)
+        self._pending = []  # (t, temperature, pwm)
+        self._last_fsync = time.monotonic()
+        self.samples = 0
+
+    def append(self, t, temperature, setpoint, pwm):
+        pending = self._pending
+        pending.append((t, temperature, pwm))
+        if len(pending) >= self.batch_records or t - pending[0][0] >= self.flush_interval:
+            self._reduce()
+
+    def extend(self, times, **columns):
+        """Adds a block of samples (e.g. extend(t, temperature=temps, pwm=pwm)), time-ordered."""
+        self._reduce()
+        self._add(self._samples(times, [columns[name] for name in self.channels]))
+
+    def _samples(self, times, values):
+        records = np.zeros(len(times), dtype=self.dtype)
+        records['time'] = times
+        records['count'] = 1
+        for name, v in zip(self.channels, values):
+            for stat in ('min', 'max', 'mean'):
+                records[f'{name}_{stat}'] = v
+        return records
+
+    def _reduce(self):
+        if self._pending:
+            columns = np.array(self._pending, dtype=np.float64).T
+            self._pending = []
+            self._add(self._samples(columns[0], columns[1:]))
+        now = time.monotonic()
+        if now - self._last_fsync >= self.fsync_interval:
+            self.flush(sync=True)
+
+    def _add(self, records):
+        if not len(records):
+            return
+        self.samples += int(records['count'].sum())
+        for tier in self.tiers:
+            records = tier.add(records)
+            if not len(records):
+                break
+
+    def flush(self, sync=False):
+        for tier in self.tiers:
+            tier.flush(sync)
+        if sync:
+            self._last_fsync = time.monotonic()
+
+    def close(self):
+        """Closes all open buckets (finest first, each feeding the next tier)."""
+        self._reduce()
+        closed = np.zeros(0, dtype=self.dtype)
+        for tier in self.tiers:
+            if len(closed):
+                closed = np.concatenate((tier.add(closed), tier.finish()))
+            else:
+                closed = tier.finish()
+        for tier in self.tiers:
+            tier.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _stats(records, channels):
+    """Record array -> dict of time, count and <channel>_min/max/mean/std arrays."""
+    out = {'time': np.array(records['time']), 'count': records['count'].astype(np.int64)}
+    count = np.maximum(out['count'], 1)
+    for name in channels:
+        out[f'{name}_min'] = records[f'{name}_min'].astype(np.float64)
+        out[f'{name}_max'] = records[f'{name}_max'].astype(np.float64)
+        out[f'{name}_mean'] = np.array(records[f'{name}_mean'])
+        out[f'{name}_std'] = np.sqrt(np.maximum(records[f'{name}_m2'] / count, 0.0))
+    return out
+
+
+class RollupReader:
+    """Memory-mapped reader of all tiers of one log (see module docstring)."""
+
+    def __init__(self, log_path):
+        self.log_path = log_path
+        self.directory = rollup_dir(log_path)
+        self.tiers = []  # (width, records), finest first
+        self.start_time = None
+        self.channels = None
+        for name in os.listdir(self.directory):
+            if not name.endswith('.roll'):
+                continue
+            path = os.path.join(self.directory, name)
+            with open(path, 'rb') as f:
+                raw = f.read(HEADER.size)
+            if len(raw) < HEADER.size:
+                continue
+            magic, header_size, record_size, width, start_time = HEADER.unpack(raw)
+            if magic != MAGIC:
+                raise ValueError(f"{path}: not a rollup tier (magic {magic!r})")
+            dtype = rollup_dtype(CHANNELS)
+            if record_size != dtype.itemsize:
+                raise ValueError(f"{path}: unsupported record size {record_size}")
+            self.channels, self.start_time = CHANNELS, start_time
+            n = (os.path.getsize(path) - header_size) // record_size
+            records = (np.memmap(path, dtype=dtype, mode='r', offset=header_size, shape=(n,)) if n > 0
+                       else np.zeros(0, dtype=dtype))
+            self.tiers.append((width, records))
+        if not self.tiers:
+            raise ValueError(f"{self.directory}: no rollup tiers")
+        self.tiers.sort(key=lambda tier: tier[0])
+
+    @property
+    def widths(self):
+        return [w for w, _ in self.tiers]
+
+    def extent(self):
+        """(first, last) time covered by the finest tier."""
+        width, records = self.tiers[0]
+        if not len(records):
+            return 0.0, 0.0
+        return float(records['time'][0]), float(records['time'][-1] + width)
+
+    def level_for(self, resolution):
+        """Index of the coarsest tier with width <= resolution, None if even the finest is too coarse."""
+        fine_enough = [i for i, w in enumerate(self.widths) if w <= resolution]
+        return fine_enough[-1] if fine_enough else None
+
+    def _slice(self, level, t_start, t_end):
+        """Buckets of one tier starting in [t_start, t_end), and the end of the tier's coverage."""
+        width, records = self.tiers[level]
+        times = records['time']  # strided view: bisect touches ~log2(n) records, searchsorted would copy
+        i0 = bisect.bisect_left(times, t_start)
+        i1 = bisect.bisect_left(times, t_end)
+        covered = float(times[-1]) + width if len(times) else -math.inf
+        return records[i0:max(i0, i1)], covered
+
+    def _series(self, level, t_start, t_end):
+        chunk, covered = self._slice(level, t_start, t_end)
+        parts = [chunk]
+        if covered < t_end and level > 0:
+            # the coarse bucket is still open: the rest comes from finer tiers
+            parts += self._series(level - 1, max(t_start, covered), t_end)
+        return parts
+
+    def series(self, t_start=None, t_end=None, points=1000, resolution=None):
+        """
+        Bucket statistics for a plot of [t_start, t_end): from the coarsest
+        tier giving at least `points` buckets (or with width <= resolution).
+        Returns the dict of _stats() plus 'width'; below the finest tier the
+        raw log samples are returned (std 0, count 1).
+        """
+        first, last = self.extent()
+        t_start = first if t_start is None else t_start
+        t_end = last if t_end is None else t_end
+        if resolution is None:
+            resolution = (t_end - t_start) / max(int(points), 1)
+        level = self.level_for(resolution)
+        if level is None:
+            return self._raw(t_start, t_end)
+        records = np.concatenate(self._series(level, t_start, t_end))
+        out = _stats(records, self.channels)
+        out['width'] = self.widths[level]
+        return out
+
+    def _raw(self, t_start, t_end):
+        from .binary_log import open_reader
+
+        columns = open_reader(self.log_path).read(t_start, t_end)
+        out = {'time': columns['time'], 'count': np.ones(len(columns['time']), dtype=np.int64), 'width': 0.0}
+        for name in self.channels:
+            values = columns[name].astype(np.float64)
+            out[f'{name}_min'] = out[f'{name}_max'] = out[f'{name}_mean'] = values
+            out[f'{name}_std'] = np.zeros(len(values))
+        return out
+
+    def _cover(self, level, t_start, t_end):
+        """Whole buckets covering [t_start, t_end): coarse inside, finer towards the edges."""
+        if t_end <= t_start:
+            return []
+        width = self.widths[level]
+        if level == 0:
+            return [self._slice(0, math.floor(t_start / width) * width, t_end)[0]]
+        inner_start = math.ceil(t_start / width) * width
+        inner_end = math.floor(t_end / width) * width
+        if inner_end <= inner_start:
+            return self._cover(level - 1, t_start, t_end)
+        inner, covered = self._slice(level, inner_start, inner_end)
+        inner_end = max(min(inner_end, covered), inner_start)
+        return (self._cover(level - 1, t_start, inner_start) + [inner]
+                + self._cover(level - 1, inner_end, t_end))
+
+    def summary(self, t_start=None, t_end=None):
+        """
+        Count/min/max/mean/std per channel over [t_start, t_end) (to 1 s
+        resolution at the edges). Returns {'count': n, 'buckets': k,
+        '<channel>': {'min', 'max', 'mean', 'std'}, ...}.
+        """
+        first, last = self.extent()
+        t_start = first if t_start is None else t_start
+        t_end = last if t_end is None else t_end
+        parts = [p for p in self._cover(len(self.tiers) - 1, t_start, t_end) if len(p)]
+        out = {'count': 0, 'buckets': sum(len(p) for p in parts)}
+        if not parts:
+            return out
+        records = np.concatenate(parts)
+        total = merge_runs(records, np.zeros(len(records), dtype=np.int64), records.dtype)[0]
+        out['count'] = int(total['count'])
+        for name in self.channels:
+            out[name] = {
+                'min': float(total[f'{name}_min']),
+                'max': float(total[f'{name}_max']),
+                'mean': float(total[f'{name}_mean']),
+                'std': math.sqrt(max(float(total[f'{name}_m2']) / total['count'], 0.0)),
+            }
+        return out
+
+
+def build(log_path, chunk_records=1 << 20):
+    """(Re)creates the rollup index of an existing binary or compressed log. Returns the writer."""
+    from .binary_log import BinaryLogReader, open_reader
+
+    reader = open_reader(log_path)
+    if isinstance(reader, BinaryLogReader):
+        chunks = (reader.records[i:i + chunk_records] for i in range(0, len(reader), chunk_records))
+    else:
+        chunks = reader.iter_blocks()
+    with RollupWriter(log_path, start_time=reader.start_time) as writer:
+        for chunk in chunks:
+            writer.extend(chunk['time'], temperature=chunk['temperature'], pwm=chunk['pwm'])
+    return writer
+
+
+def plot(reader, t_start=None, t_end=None, points=2000, plot_file=None):
+    import matplotlib.pyplot as plt
+
+    started = time.perf_counter()
+    s = reader.series(t_start, t_end, points=points)
+    elapsed = time.perf_counter() - started
+    fig, ax = plt.subplots(figsize=(12, 5))
+    x = s['time'] + s['width'] / 2
+    ax.fill_between(x, s['temperature_min'], s['temperature_max'], color='tab:blue', alpha=0.25, label='min/max')
+    ax.plot(x, s['temperature_mean'], color='tab:blue', linewidth=1.0, label='mean')
+    ax.set_xlabel("Time since start (s)")
+    ax.set_ylabel("Temperature (°C)")
+    ax_pwm = ax.twinx()
+    ax_pwm.plot(x, s['pwm_mean'], color='tab:green', linestyle=':', linewidth=1.0)
+    ax_pwm.set_ylabel("PWM (mean)", color='tab:green')
+    ax_pwm.set_ylim(-5, 260)
+    width = f"{s['width']:g} s buckets" if s['width'] else "raw samples"
+    ax.set_title(f"{os.path.basename(reader.log_path)}: {len(x)} points, {width} ({elapsed * 1e3:.1f} ms)")
+    ax.legend(loc='upper left')
+    fig.tight_layout()
+    if plot_file:
+        fig.savefig(plot_file)
+        print(f"Plot saved to '{plot_file}'.")
+    else:
+        plt.show()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-resolution rollup index of a temperature log.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    p = commands.add_parser('build', help="create the index of an existing .bin/.zlog log")
+    p.add_argument('log')
+    for name, help_text in (('summary', "count/min/max/mean/std over a time range"),
+                            ('plot', "overview plot of a time range")):
+        p = commands.add_parser(name, help=help_text)
+        p.add_argument('log')
+        p.add_argument('--start', type=float, help="s since the start of the log")
+        p.add_argument('--end', type=float)
+        if name == 'plot':
+            p.add_argument('--points', type=int, default=2000)
+            p.add_argument('--save', help="write the plot to this file instead of showing it")
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        started = time.perf_counter()
+        writer = build(args.log)
+        buckets = ', '.join(f"{t.width:g} s: {t.buckets_written}" for t in writer.tiers)
+        print(f"{writer.samples} samples -> {buckets} buckets in '{writer.directory}' "
+              f"({time.perf_counter() - started:.1f} s).")
+        return
+    reader = RollupReader(args.log)
+    if args.command == 'summary':
+        started = time.perf_counter()
+        s = reader.summary(args.start, args.end)
+        elapsed = time.perf_counter() - started
+        print(f"{s['count']} samples from {s['buckets']} buckets ({elapsed * 1e3:.1f} ms)")
+        for name in reader.channels:
+            if name in s:
+                c = s[name]
+                print(f"  {name:12s} mean {c['mean']:9.4f}  std {c['std']:8.4f}  min {c['min']:9.4f}  max {c['max']:9.4f}")
+    else:
+        plot(reader, args.start, args.end, args.points, args.save)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+import selectors
+import threading
+import time
+from collections import deque
+
+import serial
+
+
+class LineBuffer:
+    """
+    Splits a byte stream into lines and keeps them as (receive_time, line_bytes)
+    in a bounded FIFO. If the consumer falls behind and the FIFO is full, the
+    oldest line is dropped and counted in `dropped`.
+    """
+
+    def __init__(self, maxlen=100000):
+        self._lines = deque(maxlen=int(maxlen))
+        self._partial = b''
+        self.lines_received = 0
+        self.bytes_received = 0
+        self.dropped = 0
+
+    @property
+    def pending(self):
+        """Number of lines waiting to be drained."""
+        return len(self._lines)
+
+    def push(self, chunk, receive_time):
+        self.bytes_received += len(chunk)
+        data = self._partial + chunk if self._partial else chunk
+        lines = data.split(b'\n')
+        self._partial = lines.pop()
+        for line in lines:
+            if len(self._lines) == self._lines.maxlen:
+                self.dropped += 1
+            self._lines.append((receive_time, line.rstrip(b'\r')))
+        self.lines_received += len(lines)
+
+    def drain(self):
+        """Returns all lines received since the last call as a list of (time, bytes)."""
+        items = []
+        pop = self._lines.popleft
+        for _ in range(len(self._lines)):
+            items.append(pop())
+        return items
+
+
+class SerialLineReader(threading.Thread):
+    """
+    Background thread that drains a serial port line by line.
+
+    Every complete line goes into a LineBuffer. The consumer (e.g. a
+    matplotlib animation) calls drain() once per frame to get everything
+    that arrived since the previous frame.
+    """
+
+    def __init__(self, ser, maxlen=100000, clock=time.time, read_size=4096, buffer=None):
+        super().__init__(daemon=True, name=f"SerialLineReader({getattr(ser, 'port', '?')})")
+        self.ser = ser
+        self.clock = clock
+        self.read_size = int(read_size)
+        self.buffer = LineBuffer(maxlen) if buffer is None else buffer
+        self._stop_event = threading.Event()
+        self.error = None
+
+    @property
+    def pending(self):
+        return self.buffer.pending
+
+    @property
+    def dropped(self):
+        return self.buffer.dropped
+
+    @property
+    def lines_received(self):
+        return self.buffer.lines_received
+
+    @property
+    def bytes_received(self):
+        return self.buffer.bytes_received
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                chunk = self.ser.read(min(max(self.ser.in_waiting, 1), self.read_size))
+            except (serial.SerialException, OSError) as e:
+                self.error = e
+                break
+            if chunk:
+                self.buffer.push(chunk, self.clock())
+            elif getattr(self.ser, 'at_eof', False):
+                break  # replayed capture (capture.ReplaySerial) is exhausted
+
+    def drain(self):
+        return self.buffer.drain()
+
+    def stop(self, timeout=1.0):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+
+class MultiplexReader(threading.Thread):
+    """
+    One thread reading several serial ports through a selector.
+
+    `ports` maps a key (e.g. chamber name) to an open pyserial port; each
+    port gets its own LineBuffer in `buffers`. Only ports that are ready are
+    read, so adding devices does not slow down the others. Needs real file
+    descriptors (POSIX); on Windows use one SerialLineReader per port.
+    """
+
+    def __init__(self, ports, maxlen=100000, clock=time.time, read_size=65536, poll_timeout=0.1):
+        super().__init__(daemon=True, name="MultiplexReader")
+        self.ports = dict(ports)
+        self.clock = clock
+        self.read_size = int(read_size)
+        self.poll_timeout = float(poll_timeout)
+        self.buffers = {key: LineBuffer(maxlen) for key in self.ports}
+        self.errors = {}
+        self._selector = selectors.DefaultSelector()
+        for key, ser in self.ports.items():
+            self._selector.register(ser.fileno(), selectors.EVENT_READ, key)
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set() and self._selector.get_map():
+            for selector_key, _ in self._selector.select(self.poll_timeout):
+                key = selector_key.data
+                ser = self.ports[key]
+                try:
+                    chunk = ser.read(min(max(ser.in_waiting, 1), self.read_size))
+                except (serial.SerialException, OSError) as e:
+                    self.errors[key] = e
+                    self._selector.unregister(selector_key.fileobj)
+                    continue
+                if chunk:
+                    self.buffers[key].push(chunk, self.clock())
+        self._selector.close()
+
+    def drain(self, key):
+        return self.buffers[key].drain()
+
+    def stop(self, timeout=1.0):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+
+def parse_pid_line(line_bytes):
+    """
+    Parses one "temp,setpoint,pwm" line of the PID firmware.
+    Returns (temperature, setpoint, pwm) or None for status/other lines.
+    Raises ValueError / UnicodeDecodeError for malformed data lines.
+    """
+    line = line_bytes.decode("utf-8").strip()
+    parts = line.split(",")
+    if len(parts) != 3:
+        return None
+    return float(parts[0].strip()), float(parts[1].strip()), int(parts[2].strip())
@@ -0,0 +1,101 @@
+import numpy as np
+
+
+class StreamingWelch:
+    """
+    Incremental Welch PSD estimator with constant memory.
+
+    Samples are pushed block by block. Every complete segment of `nperseg`
+    samples (consecutive segments overlap by `noverlap`) is detrended,
+    windowed with a precomputed window and its periodogram is added to a
+    running sum. Only the unfinished tail (< nperseg samples) and the sum
+    are kept, so memory does not depend on the run length.
+
+    The sampling rate is only needed for scaling and the frequency axis, so
+    it can be given at read-out time (e.g. once it has been measured).
+    """
+
+    def __init__(self, nperseg=2048, noverlap=None, window='hann', detrend='linear', fs=None):
+        from scipy.signal import get_window
+
+        self.nperseg = int(nperseg)
+        self.noverlap = self.nperseg // 2 if noverlap is None else int(noverlap)
+        if not 0 <= self.noverlap < self.nperseg:
+            raise ValueError("noverlap must be in [0, nperseg)")
+        if detrend not in ('linear', 'constant', False, None):
+            raise ValueError(f"Unsupported detrend: {detrend!r}")
+        self.step = self.nperseg - self.noverlap
+        self.detrend = detrend
+        self.fs = fs
+
+        self.window = get_window(window, self.nperseg)
+        self._win_power = np.sum(self.window ** 2)
+        ramp = np.arange(self.nperseg, dtype=np.float64)
+        self._ramp = ramp - ramp.mean()
+        self._ramp_norm = np.dot(self._ramp, self._ramp)
+
+        self._tail = np.zeros(0)
+        self._periodogram_sum = np.zeros(self.nperseg // 2 + 1)
+        self.n_segments = 0
+        self.n_samples = 0
+
+    def update(self, samples):
+        """Adds a block of samples and processes every segment it completes."""
+        samples = np.asarray(samples, dtype=np.float64)
+        self.n_samples += len(samples)
+        data = np.concatenate((self._tail, samples)) if len(self._tail) else samples
+        if len(data) < self.nperseg:
+            self._tail = data.copy()
+            return
+
+        n_seg = (len(data) - self.nperseg) // self.step + 1
+        segments = np.lib.stride_tricks.sliding_window_view(data, self.nperseg)[::self.step][:n_seg]
+        self._add_segments(segments)
+        self._tail = data[n_seg * self.step:].copy()
+
+    def _add_segments(self, segments):
+        if self.detrend:
+            segments = segments - segments.mean(axis=1, keepdims=True)
+        if self.detrend == 'linear':
+            slopes = segments @ self._ramp / self._ramp_norm
+            segments -= slopes[:, None] * self._ramp
+        spectrum = np.fft.rfft(segments * self.window, axis=1)
+        self._periodogram_sum += np.sum(spectrum.real ** 2 + spectrum.imag ** 2, axis=0)
+        self.n_segments += len(segments)
+
+    def frequencies(self, fs=None):
+        fs = self._fs(fs)
+        return np.fft.rfftfreq(self.nperseg, 1.0 / fs)
+
+    def psd(self, fs=None):
+        """
+        Returns (frequencies, psd) of the segments processed so far, with the
+        same one-sided density scaling as scipy.signal.welch.
+        """
+        fs = self._fs(fs)
+        if self.n_segments == 0:
+            raise ValueError(f"No complete segment yet ({self.n_samples} of {self.nperseg} samples)")
+        psd = self._periodogram_sum / (self.n_segments * fs * self._win_power)
+        if self.nperseg % 2:
+            psd[1:] *= 2
+        else:
+            psd[1:-1] *= 2
+        return self.frequencies(fs), psd
+
+    def asd(self, fs=None):
+        frequencies, psd = self.psd(fs)
+        return frequencies, np.sqrt(psd)
+
+    def mean_asd(self, f_low, f_high, fs=None):
+        """Mean ASD (e.g. NETD in °C/sqrt(Hz)) in the band f_low <= f <= f_high."""
+        frequencies, asd = self.asd(fs)
+        band = (frequencies >= f_low) & (frequencies <= f_high)
+        if not np.any(band):
+            return np.nan
+        return float(np.mean(asd[band]))
+
+    def _fs(self, fs):
+        fs = self.fs if fs is None else fs
+        if not fs or fs <= 0:
+            raise ValueError("Sampling rate (fs) is unknown")
+        return float(fs)
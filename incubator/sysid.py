@@ -0,0 +1,239 @@
+"""
+Thermal model identification from logged temperature/PWM runs.
+
+Reads temperature_data_dual_axis.csv (or a binary log written by
+binary_log.py), resamples it to a uniform grid and fits discrete ARX
+models by linear least squares:
+
+  FOPDT  y[k+1] = a y[k] + b u[k-d] + c
+  SOPDT  y[k+1] = a1 y[k] + a2 y[k-1] + b1 u[k-d] + b2 u[k-d-1] + c
+
+The dead time d is found with a coarse grid followed by a fine search
+around the best coarse value. Step / relay segments (e.g. recorded in the
+firmware's manual 'm' mode) can be selected by time or detected
+automatically from PWM steps. Suggested PID gains use the SIMC rules.
+
+Usage:
+    python -m incubator.sysid temperature_data_dual_axis.csv
+    python -m incubator.sysid run.bin --start 600 --end 7200 --max-dead-time 120
+"""
+import argparse
+from collections import namedtuple
+
+import numpy as np
+
+FOPDT = namedtuple('FOPDT', ['gain', 'tau', 'dead_time', 'ambient', 'rmse', 'sim_rmse'])
+SOPDT = namedtuple('SOPDT', ['gain', 'tau1', 'tau2', 'dead_time', 'ambient', 'rmse', 'sim_rmse'])
+
+
+def load_run(path):
+    """Returns (time_s, temperature, pwm) arrays from a CSV, binary or compressed log."""
+    if path.endswith('.csv'):
+        data = np.loadtxt(path, delimiter=',', skiprows=1, usecols=(0, 1, 2), ndmin=2)
+        return data[:, 0], data[:, 1], data[:, 2]
+    from .binary_log import open_reader
+
+    columns = open_reader(path).read()
+    return columns['time'], columns['temperature'].astype(np.float64), columns['pwm'].astype(np.float64)
+
+
+def resample(t, y, u, dt=None, max_gap=None):
+    """
+    Resamples to a uniform grid (linear for temperature, zero-order hold for
+    PWM). Returns (dt, [(y_segment, u_segment), ...]); gaps longer than
+    max_gap (default 5 dt) split the record into segments.
+    """
+    order = np.argsort(t, kind='stable')
+    t, y, u = t[order], y[order], u[order]
+    if dt is None:
+        dt = float(np.median(np.diff(t)))
+    if max_gap is None:
+        max_gap = 5 * dt
+    breaks = np.flatnonzero(np.diff(t) > max_gap) + 1
+    segments = []
+    for lo, hi in zip(np.r_[0, breaks], np.r_[breaks, len(t)]):
+        if hi - lo < 3:
+            continue
+        grid = np.arange(t[lo], t[hi - 1], dt)
+        ys = np.interp(grid, t[lo:hi], y[lo:hi])
+        us = u[lo:hi][np.searchsorted(t[lo:hi], grid, side='right') - 1]
+        segments.append((ys, us))
+    return dt, segments
+
+
+def step_segments(y, u, min_len, threshold=20):
+    """Splits one uniform segment at PWM steps larger than `threshold`."""
+    steps = np.flatnonzero(np.abs(np.diff(u)) >= threshold) + 1
+    edges = np.r_[0, steps, len(u)]
+    out = []
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        # keep some history before the step for the regressors
+        lo = max(lo - min_len // 4, 0)
+        if hi - lo >= min_len:
+            out.append((y[lo:hi], u[lo:hi]))
+    return out
+
+
+def _regression(segments, d, order, stride=1):
+    """Stacks the ARX regressors of all segments for dead time d (every stride-th row)."""
+    lag = d + order
+    sizes = [-(-(len(y) - lag) // stride) for y, _ in segments if len(y) > lag]
+    if not sizes:
+        return None, None
+    X = np.empty((sum(sizes), 2 * order + 1))
+    target = np.empty(sum(sizes))
+    row = 0
+    for y, u in segments:
+        if len(y) <= lag:
+            continue
+        n = -(-(len(y) - lag) // stride)
+        rows = slice(row, row + n)
+        # row j predicts y[k + 1] with k = lag - 1 + j
+        for i in range(order):
+            X[rows, i] = y[lag - 1 - i:len(y) - 1 - i:stride]
+            X[rows, order + i] = u[order - 1 - i:len(u) - 1 - d - i:stride]
+        X[rows, -1] = 1.0
+        target[rows] = y[lag::stride]
+        row += n
+    return X, target
+
+
+def _fit(segments, d, order, stride=1):
+    X, target = _regression(segments, d, order, stride)
+    if X is None:
+        return None, np.inf
+    # normal equations: only small Gram matrices, no SVD of the tall X
+    gram = X.T @ X
+    xty = X.T @ target
+    theta = np.linalg.lstsq(gram, xty, rcond=None)[0]
+    sse = target @ target - 2.0 * theta @ xty + theta @ gram @ theta
+    return theta, float(np.sqrt(max(sse, 0.0) / len(target)))
+
+
+def _search_dead_time(segments, order, max_d, coarse_points=16, coarse_rows=200000):
+    """
+    Coarse grid over 0..max_d on a row subsample, then every value around
+    the best coarse one on all rows.
+    """
+    step = max(1, max_d // coarse_points)
+    stride = max(1, sum(len(y) for y, _ in segments) // coarse_rows)
+    coarse = range(0, max_d + 1, step)
+    best_d = min(coarse, key=lambda d: _fit(segments, d, order, stride)[1])
+    fine = range(max(0, best_d - step + 1), min(max_d, best_d + step - 1) + 1)
+    best_d = min(fine, key=lambda d: _fit(segments, d, order)[1])
+    theta, rmse = _fit(segments, best_d, order)
+    return best_d, theta, rmse
+
+
+def _shift(u, s):
+    """u delayed by s samples, holding the first value."""
+    return np.r_[np.full(s, u[0]), u[:len(u) - s]] if s else u
+
+
+def _simulate_rmse(segments, theta, d, order):
+    """Free-run (simulation) RMSE of the fitted ARX model, using lfilter."""
+    from scipy.signal import lfilter, lfiltic
+
+    a = np.r_[1.0, -theta[:order]]
+    b = theta[order:2 * order]
+    c = theta[-1]
+    errors = []
+    for y, u in segments:
+        if len(y) <= d + order + 1:
+            continue
+        forcing = sum(b[i] * _shift(u, d + i) for i in range(order)) + c
+        # v[k] = y[k+1], starting from the measured (assumed steady) initial value
+        zi = lfiltic([1.0], a, np.full(order, y[0]))
+        v = lfilter([1.0], a, forcing, zi=zi)[0]
+        errors.append(np.r_[y[0], v[:-1]] - y)
+    if not errors:
+        return np.nan
+    err = np.concatenate(errors)
+    return float(np.sqrt(np.mean(err ** 2)))
+
+
+def fit_fopdt(segments, dt, max_dead_time=60.0):
+    max_d = int(round(max_dead_time / dt))
+    d, theta, rmse = _search_dead_time(segments, 1, max_d)
+    a, b, c = theta
+    if not 0 < a < 1:
+        raise ValueError(f"Identified pole a={a:.5f} is not a stable first-order response")
+    return FOPDT(gain=b / (1 - a), tau=-dt / np.log(a), dead_time=d * dt,
+                 ambient=c / (1 - a), rmse=rmse, sim_rmse=_simulate_rmse(segments, theta, d, 1))
+
+
+def fit_sopdt(segments, dt, max_dead_time=60.0):
+    max_d = int(round(max_dead_time / dt))
+    d, theta, rmse = _search_dead_time(segments, 2, max_d)
+    a1, a2, b1, b2, c = theta
+    poles = np.roots([1.0, -a1, -a2])
+    if np.any(np.abs(poles) >= 1):
+        raise ValueError(f"Identified poles {poles} are not stable")
+    taus = sorted((-dt / np.log(np.abs(p)) for p in poles), reverse=True)
+    return SOPDT(gain=(b1 + b2) / (1 - a1 - a2), tau1=float(taus[0]), tau2=float(taus[1]),
+                 dead_time=d * dt, ambient=c / (1 - a1 - a2), rmse=rmse,
+                 sim_rmse=_simulate_rmse(segments, theta, d, 2))
+
+
+def simc_gains(gain, tau, dead_time, tau2=0.0, tau_c=None):
+    """
+    SIMC (Skogestad) tuning converted to the parallel PID_v1 form.
+    Returns (Kp, Ki, Kd) with Kp in PWM/°C, Ki in PWM/(°C s), Kd in PWM s/°C.
+    """
+    if tau_c is None:
+        tau_c = max(dead_time, 0.1 * tau)
+    kc = tau / (gain * (tau_c + dead_time))
+    ti = min(tau, 4.0 * (tau_c + dead_time))
+    td = tau2
+    # series -> parallel form
+    factor = 1.0 + td / ti
+    return kc * factor, kc / ti, kc * td
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit FOPDT/SOPDT heater models to logged runs.")
+    parser.add_argument('log', help="CSV (Zeit, Temperatur, PWM) or binary log")
+    parser.add_argument('--start', type=float, default=None, help="use samples from this time (s)")
+    parser.add_argument('--end', type=float, default=None, help="... up to this time (s)")
+    parser.add_argument('--dt', type=float, default=None, help="resampling interval (default: median)")
+    parser.add_argument('--max-dead-time', type=float, default=60.0, help="dead time search range (s)")
+    parser.add_argument('--steps', action='store_true', help="fit only segments following PWM steps")
+    parser.add_argument('--tau-c', type=float, default=None, help="SIMC closed-loop time constant (s)")
+    args = parser.parse_args()
+
+    t, y, u = load_run(args.log)
+    keep = np.ones(len(t), dtype=bool)
+    if args.start is not None:
+        keep &= t >= args.start
+    if args.end is not None:
+        keep &= t < args.end
+    t, y, u = t[keep], y[keep], u[keep]
+    dt, segments = resample(t, y, u, args.dt)
+    if args.steps:
+        min_len = int(4 * args.max_dead_time / dt) + 10
+        segments = [s for y_seg, u_seg in segments for s in step_segments(y_seg, u_seg, min_len)]
+    n = sum(len(s[0]) for s in segments)
+    print(f"{len(t)} rows -> {n} samples at dt={dt:.3f}s in {len(segments)} segment(s)")
+    if not segments:
+        print("No usable segments.")
+        return
+
+    first = fit_fopdt(segments, dt, args.max_dead_time)
+    print(f"FOPDT: K={first.gain:.4f} °C/PWM  tau={first.tau:.1f}s  theta={first.dead_time:.1f}s  "
+          f"T_amb={first.ambient:.2f}°C  rmse={first.rmse:.4f}  sim_rmse={first.sim_rmse:.3f}")
+    kp, ki, kd = simc_gains(first.gain, first.tau, first.dead_time, tau_c=args.tau_c)
+    print(f"  SIMC PI : Kp={kp:.4f}  Ki={ki:.5f}  Kd={kd:.4f}")
+
+    try:
+        second = fit_sopdt(segments, dt, args.max_dead_time)
+    except (ValueError, np.linalg.LinAlgError) as e:
+        print(f"SOPDT fit failed: {e}")
+        return
+    print(f"SOPDT: K={second.gain:.4f} °C/PWM  tau1={second.tau1:.1f}s  tau2={second.tau2:.1f}s  "
+          f"theta={second.dead_time:.1f}s  rmse={second.rmse:.4f}  sim_rmse={second.sim_rmse:.3f}")
+    kp, ki, kd = simc_gains(second.gain, second.tau1, second.dead_time, tau2=second.tau2, tau_c=args.tau_c)
+    print(f"  SIMC PID: Kp={kp:.4f}  Ki={ki:.5f}  Kd={kd:.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+"""
+Binary telemetry of PIDcontrol.ino (opt-in, ASCII stays the default).
+
+Sending 'b' switches the firmware to BINARY_BAUD and one fixed-size frame
+every 10 ms; 'a' switches back to ASCII lines at 9600 baud. A frame is
+26 bytes, little endian:
+
+    sync        0xA5 0x5A
+    seq         u2   increments per frame (wraps), gaps = lost frames
+    t_us        u4   micros() on the device (wraps after ~71.6 min)
+    adc         u2   raw ADC reading (mean of the 5 samples)
+    temperature f4   °C
+    setpoint    f4   °C
+    output      f4   PID output
+    pwm         u1   PWM written to the MOSFET
+    mode        u1   0 PID off, 1 PID active (pidAktiv in PIDcontrol.ino)
+    checksum    u2   Fletcher-16 over seq..mode
+
+PIDcontrol.ino has no manual mode; mode 2 (MODE_MANUAL) only comes from
+arduino_sim in its manual PWM mode.
+
+TelemetryDecoder turns any byte stream into column arrays, one NumPy pass
+per received chunk: sync candidates are found with vectorized compares,
+all checksums are verified at once, and sequence gaps and t_us wraps are
+tracked across chunks. TelemetryBuffer plugs the decoder into
+serial_reader.SerialLineReader in place of its LineBuffer.
+
+Usage:
+    python -m incubator monitor --telemetry binary --no-plot
+"""
+import struct
+from collections import deque
+
+import numpy as np
+
+SYNC = b'\xa5\x5a'
+ASCII_BAUD = 9600
+BINARY_BAUD = 115200
+CMD_BINARY = b'b'
+CMD_ASCII = b'a'
+MODE_OFF, MODE_PID, MODE_MANUAL = 0, 1, 2
+
+FRAME_DTYPE = np.dtype([
+    ('sync', '<u2'),
+    ('seq', '<u2'),
+    ('t_us', '<u4'),
+    ('adc', '<u2'),
+    ('temperature', '<f4'),
+    ('setpoint', '<f4'),
+    ('output', '<f4'),
+    ('pwm', 'u1'),
+    ('mode', 'u1'),
+    ('checksum', '<u2'),
+])
+FRAME_SIZE = FRAME_DTYPE.itemsize
+PAYLOAD = struct.Struct('<HIHfffBB')
+COLUMNS = ('seq', 'device_time', 'adc', 'temperature', 'setpoint', 'output', 'pwm', 'mode')
+
+_CHECKED = slice(2, FRAME_SIZE - 2)
+_WEIGHTS = np.arange(FRAME_SIZE - 4, 0, -1, dtype=np.int64)
+
+
+def fletcher16(data):
+    sum1 = sum2 = 0
+    for b in bytes(data):
+        sum1 = (sum1 + b) % 255
+        sum2 = (sum2 + sum1) % 255
+    return (sum2 << 8) | sum1
+
+
+def encode_frame(seq, t_us, adc, temperature, setpoint, output, pwm, mode):
+    """One frame as the firmware sends it (used by arduino_sim)."""
+    payload = PAYLOAD.pack(seq & 0xFFFF, t_us & 0xFFFFFFFF, adc, temperature, setpoint, output, pwm, mode)
+    return SYNC + payload + struct.pack('<H', fletcher16(payload))
+
+
+def _fletcher16_rows(rows):
+    """Fletcher-16 of every row of a (n, k) uint8 matrix."""
+    rows = rows.astype(np.int64)
+    sum1 = rows.sum(axis=1) % 255
+    sum2 = (rows @ _WEIGHTS) % 255
+    return (sum2 << 8) | sum1
+
+
+def empty_batch():
+    return {name: np.zeros(0, dtype=np.float64 if name == 'device_time' else FRAME_DTYPE[name])
+            for name in COLUMNS}
+
+
+class TelemetryDecoder:
+    """
+    Incremental decoder. feed() returns a dict of column arrays (COLUMNS;
+    'device_time' is the unwrapped device clock in seconds) for all
+    complete, checksum-valid frames. Bytes between frames are skipped and
+    counted; a corrupted frame costs only itself.
+    """
+
+    def __init__(self, max_gaps=1000):
+        self._pending = b''
+        self.frames = 0
+        self.frames_lost = 0
+        self.checksum_errors = 0
+        self.bytes_received = 0
+        self.bytes_discarded = 0
+        self.gaps = deque(maxlen=max_gaps)  # (first seq after the gap, frames lost)
+        self._last_seq = None
+        self._last_t_us = None
+        self._t_wraps = 0
+
+    def stats(self):
+        return {
+            'frames': self.frames,
+            'frames_lost': self.frames_lost,
+            'checksum_errors': self.checksum_errors,
+            'bytes_received': self.bytes_received,
+            'bytes_discarded': self.bytes_discarded,
+        }
+
+    def feed(self, data):
+        self.bytes_received += len(data)
+        buf = self._pending + bytes(data) if self._pending else bytes(data)
+        raw = np.frombuffer(buf, dtype=np.uint8)
+        n = len(raw)
+        if n < FRAME_SIZE:
+            self._pending = buf
+            return empty_batch()
+
+        starts = np.flatnonzero((raw[:n - FRAME_SIZE + 1] == SYNC[0]) & (raw[1:n - FRAME_SIZE + 2] == SYNC[1]))
+        rows = raw[starts[:, None] + np.arange(FRAME_SIZE)]
+        expected = rows[:, -2].astype(np.int64) | (rows[:, -1].astype(np.int64) << 8)
+        ok = _fletcher16_rows(rows[:, _CHECKED]) == expected
+        self.checksum_errors += int(np.count_nonzero(~ok))
+        starts, rows = starts[ok], rows[ok]
+        if len(starts) > 1 and np.any(np.diff(starts) < FRAME_SIZE):
+            keep = self._non_overlapping(starts)
+            starts, rows = starts[keep], rows[keep]
+
+        # keep a tail that may hold the beginning of the next frame
+        consumed = int(starts[-1]) + FRAME_SIZE if len(starts) else 0
+        keep_from = max(consumed, n - FRAME_SIZE + 1)
+        self.bytes_discarded += keep_from - FRAME_SIZE * len(starts)
+        self._pending = buf[keep_from:]
+        if not len(starts):
+            return empty_batch()
+        frames = np.ascontiguousarray(rows).view(FRAME_DTYPE).reshape(-1)
+        self.frames += len(frames)
+        return self._columns(frames)
+
+    @staticmethod
+    def _non_overlapping(starts):
+        """Valid frames cannot overlap: keeps the first of overlapping checksum matches."""
+        keep = np.zeros(len(starts), dtype=bool)
+        next_free = -1
+        for i, s in enumerate(starts.tolist()):
+            if s >= next_free:
+                keep[i] = True
+                next_free = s + FRAME_SIZE
+        return keep
+
+    def _columns(self, frames):
+        seq = frames['seq']
+        previous = np.empty(len(seq), dtype=np.int64)
+        previous[1:] = seq[:-1]
+        previous[0] = int(seq[0]) - 1 if self._last_seq is None else self._last_seq
+        lost = (seq.astype(np.int64) - previous - 1) % 65536
+        gap_idx = np.flatnonzero(lost)
+        if len(gap_idx):
+            self.frames_lost += int(lost[gap_idx].sum())
+            self.gaps.extend(zip(seq[gap_idx].tolist(), lost[gap_idx].tolist()))
+        self._last_seq = int(seq[-1])
+
+        t_us = frames['t_us'].astype(np.int64)
+        previous_t = np.empty(len(t_us), dtype=np.int64)
+        previous_t[1:] = t_us[:-1]
+        previous_t[0] = t_us[0] if self._last_t_us is None else self._last_t_us
+        wraps = self._t_wraps + np.cumsum(t_us < previous_t)
+        self._t_wraps = int(wraps[-1])
+        self._last_t_us = int(t_us[-1])
+
+        out = {name: frames[name].copy() for name in COLUMNS if name != 'device_time'}
+        out['device_time'] = (t_us + (wraps << 32)) / 1e6
+        return out
+
+
+class TelemetryBuffer:
+    """
+    Drop-in replacement for serial_reader.LineBuffer: push() decodes the
+    received bytes, drain() returns [(receive_time, batch), ...] with one
+    column batch per received chunk that contained frames.
+    """
+
+    def __init__(self, maxlen=10000):
+        self.decoder = TelemetryDecoder()
+        self._batches = deque()
+        self._maxlen = int(maxlen)
+        self.dropped = 0
+
+    @property
+    def pending(self):
+        return len(self._batches)
+
+    @property
+    def lines_received(self):
+        return self.decoder.frames
+
+    @property
+    def bytes_received(self):
+        return self.decoder.bytes_received
+
+    def push(self, chunk, receive_time):
+        batch = self.decoder.feed(chunk)
+        if not len(batch['seq']):
+            return
+        if len(self._batches) >= self._maxlen:
+            self.dropped += len(self._batches.popleft()[1]['seq'])
+        self._batches.append((receive_time, batch))
+
+    def drain(self):
+        items = []
+        pop = self._batches.popleft
+        for _ in range(len(self._batches)):
+            items.append(pop())
+        return items
@@ -0,0 +1,138 @@
+import numpy as np
+
+
+class TimeSeriesStore:
+    """
+    Columnar store for a growing time series, one preallocated NumPy array
+    per column (e.g. float64 time, float32 temperature, uint8 pwm).
+
+    Rows occupy buffer[start:end] of every column. append()/extend() write
+    at `end`; when the buffer is full, the live rows are either moved to the
+    front (if they fill at most half of it) or copied into a buffer of twice
+    the size, so appends are O(1) amortized and a column is always one
+    contiguous slice: column() returns a view, never a copy.
+
+    With max_len the store is a bounded ring: appending to a full store
+    drops the oldest rows (the buffer is 2 * max_len, so the views stay
+    contiguous). discard() / trim() drop rows from the front explicitly,
+    e.g. to keep a time window.
+
+    range() / index_range() find a time interval by binary search and need
+    the time column to be non-decreasing.
+
+    Views stay valid until the next append()/extend(); copy them if they
+    have to survive further writes. After the last write they are the final
+    arrays, no copy is needed.
+    """
+
+    def __init__(self, columns, capacity=4096, max_len=None, time_column=None):
+        columns = list(columns.items()) if isinstance(columns, dict) else list(columns)
+        self.names = tuple(name for name, _ in columns)
+        self.dtypes = {name: np.dtype(dtype) for name, dtype in columns}
+        self.time_column = time_column or self.names[0]
+        self.max_len = None if max_len is None else int(max_len)
+        if self.max_len is not None:
+            capacity = 2 * self.max_len
+        capacity = max(int(capacity), 1)
+        self._arrays = [np.empty(capacity, dtype=self.dtypes[name]) for name in self.names]
+        self._index = {name: i for i, name in enumerate(self.names)}
+        self._start = 0
+        self._end = 0
+        self.total_appended = 0
+
+    def __len__(self):
+        return self._end - self._start
+
+    @property
+    def capacity(self):
+        return len(self._arrays[0])
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in self._arrays)
+
+    def _reserve(self, n):
+        """Makes room for n more rows at the end (n <= max_len in ring mode)."""
+        if self.max_len is not None and len(self) + n > self.max_len:
+            self._start += len(self) + n - self.max_len
+        if self._end + n <= self.capacity:
+            return
+        live = len(self)
+        if live + n <= self.capacity // 2 or self.max_len is not None:
+            for a in self._arrays:
+                a[:live] = a[self._start:self._end]
+        else:
+            capacity = self.capacity
+            while capacity < 2 * (live + n):
+                capacity *= 2
+            grown = []
+            for a in self._arrays:
+                b = np.empty(capacity, dtype=a.dtype)
+                b[:live] = a[self._start:self._end]
+                grown.append(b)
+            self._arrays = grown
+        self._start, self._end = 0, live
+
+    def append(self, *values, **named):
+        """Adds one row, given positionally in column order or by name."""
+        if named:
+            values = tuple(named[name] for name in self.names)
+        self._reserve(1)
+        i = self._end
+        for a, v in zip(self._arrays, values):
+            a[i] = v
+        self._end = i + 1
+        self.total_appended += 1
+
+    def extend(self, *columns, **named):
+        """Adds a block of rows (one equally long array per column)."""
+        if named:
+            columns = tuple(named[name] for name in self.names)
+        n = len(columns[0])
+        self.total_appended += n
+        if self.max_len is not None and n > self.max_len:
+            columns = tuple(c[n - self.max_len:] for c in columns)
+            n = self.max_len
+        if n == 0:
+            return
+        self._reserve(n)
+        i = self._end
+        for a, c in zip(self._arrays, columns):
+            a[i:i + n] = c
+        self._end = i + n
+
+    def column(self, name):
+        """Zero-copy view of one column (oldest row first)."""
+        return self._arrays[self._index[name]][self._start:self._end]
+
+    __getitem__ = column
+
+    def columns(self):
+        return {name: self.column(name) for name in self.names}
+
+    def index_range(self, t_start=None, t_end=None):
+        """Returns (i0, i1) such that rows i0:i1 cover t_start <= time < t_end."""
+        times = self.column(self.time_column)
+        i0 = 0 if t_start is None else int(np.searchsorted(times, t_start, side='left'))
+        i1 = len(times) if t_end is None else int(np.searchsorted(times, t_end, side='left'))
+        return i0, max(i0, i1)
+
+    def range(self, t_start=None, t_end=None):
+        """Views of all columns for t_start <= time < t_end."""
+        i0, i1 = self.index_range(t_start, t_end)
+        return {name: view[i0:i1] for name, view in self.columns().items()}
+
+    def discard(self, n):
+        """Drops the n oldest rows."""
+        self._start = min(self._start + max(int(n), 0), self._end)
+        if self._start == self._end:
+            self._start = self._end = 0
+
+    def trim(self, t_before):
+        """Drops all rows with time < t_before. Returns the number dropped."""
+        n = self.index_range(None, t_before)[1]
+        self.discard(n)
+        return n
+
+    def clear(self):
+        self._start = self._end = 0
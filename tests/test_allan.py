@@ -0,0 +1,28 @@
+import numpy as np
+
+from incubator.allan import oadev
+
+
+def _direct_oadev(y, m):
+    """Textbook overlapping ADEV from the averages of m samples, O(n * m)."""
+    averages = np.array([y[j:j + m].mean() for j in range(len(y) - m + 1)])
+    diffs = averages[m:] - averages[:-m]
+    return np.sqrt(0.5 * np.mean(diffs ** 2))
+
+
+def test_oadev_matches_direct_computation():
+    y = np.random.default_rng(0).normal(37.0, 0.01, 500)
+    result = oadev(y, rate=2.0, taus=[0.5, 1.0, 2.5, 10.0, 50.0], chunk=64)
+    assert result.taus.tolist() == [0.5, 1.0, 2.5, 10.0, 50.0]
+    expected = [_direct_oadev(y, int(m)) for m in result.taus * 2.0]
+    assert np.allclose(result.adev, expected, rtol=1e-9)
+    assert np.all(result.adev_low < result.adev) and np.all(result.adev < result.adev_high)
+
+
+def test_oadev_white_noise_scales_with_sqrt_tau():
+    sigma = 0.02
+    y = np.random.default_rng(1).normal(0.0, sigma, 200000)
+    result = oadev(y, rate=1.0, kind='octave')
+    small = result.taus <= 64
+    # white FM: adev(tau) = sigma / sqrt(tau)
+    assert np.allclose(result.adev[small], sigma / np.sqrt(result.taus[small]), rtol=0.1)
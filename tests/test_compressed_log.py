@@ -0,0 +1,54 @@
+import csv
+
+import numpy as np
+import pytest
+
+from incubator.binary_log import CSV_HEADER, BinaryLogWriter
+from incubator.compressed_log import CompressedLogReader, compress_log
+
+
+def _samples(n=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.round(np.arange(n) * 0.1, 2)
+    temp = np.round(37 + 0.02 * np.sin(t / 30) + rng.normal(0, 0.005, n), 2)
+    pwm = np.clip(np.round(80 + 5 * np.sin(t / 20)), 0, 255).astype(int)
+    return t, temp, pwm
+
+
+def _write_csv(path, t, temp, pwm):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADER)
+        writer.writerows(zip(t.tolist(), temp.tolist(), pwm.tolist()))
+
+
+def _write_bin(path, t, temp, pwm):
+    with BinaryLogWriter(str(path), start_time=0.0) as writer:
+        for row in zip(t.tolist(), temp.tolist(), pwm.tolist()):
+            writer.append(row[0], row[1], 37.0, row[2])
+
+
+def test_csv_round_trip_lossless(tmp_path):
+    t, temp, pwm = _samples()
+    _write_csv(tmp_path / 'run.csv', t, temp, pwm)
+    compress_log(str(tmp_path / 'run.csv'), str(tmp_path / 'run.zlog'))
+    CompressedLogReader(str(tmp_path / 'run.zlog')).export_csv(str(tmp_path / 'out.csv'))
+    assert (tmp_path / 'out.csv').read_text() == (tmp_path / 'run.csv').read_text()
+
+
+@pytest.mark.parametrize('mode', ['deadband', 'swinging_door'])
+def test_csv_lossy_matches_bin(tmp_path, mode):
+    t, temp, pwm = _samples()
+    _write_csv(tmp_path / 'run.csv', t, temp, pwm)
+    _write_bin(tmp_path / 'run.bin', t, temp, pwm)
+    from_csv = compress_log(str(tmp_path / 'run.csv'), str(tmp_path / 'csv.zlog'), mode, 0.01, 2)
+    from_bin = compress_log(str(tmp_path / 'run.bin'), str(tmp_path / 'bin.zlog'), mode, 0.01, 2)
+    assert from_csv.records_written < len(t)
+    assert from_csv.records_written == from_bin.records_written
+
+    kept = CompressedLogReader(str(tmp_path / 'csv.zlog')).read()
+    if mode == 'deadband':
+        held = kept['temperature'][np.searchsorted(kept['time'], t, side='right') - 1]
+    else:
+        held = np.interp(t, kept['time'], kept['temperature'])
+    assert np.abs(held - temp).max() <= 0.01 + 1e-5
@@ -0,0 +1,91 @@
+import socket
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from incubator.binary_log import LOG_DTYPE
+from incubator.pubsub import (HELLO, KIND_HELLO, KIND_SAMPLES, PUB_MAGIC, SamplePublisher, SampleSubscriber,
+                              encode_frame)
+
+
+def test_timeout_inside_frame_keeps_framing(tmp_path):
+    path = str(tmp_path / 'pub.sock')
+    server = socket.socket(socket.AF_UNIX)
+    server.bind(path)
+    server.listen()
+    records = np.zeros(3, dtype=LOG_DTYPE)
+    records['time'] = [1.0, 2.0, 3.0]
+    data = encode_frame(KIND_SAMPLES, records.tobytes()) * 2
+
+    def serve():
+        conn, _ = server.accept()
+        conn.sendall(encode_frame(KIND_HELLO, HELLO.pack(PUB_MAGIC, LOG_DTYPE.itemsize, 0.0)))
+        for i in range(0, len(data), 7):  # trickle, so recv() times out mid-frame
+            conn.sendall(data[i:i + 7])
+            time.sleep(0.02)
+        conn.close()
+
+    thread = threading.Thread(target=serve)
+    thread.start()
+    with SampleSubscriber('unix:' + path, timeout=0.005) as sub:
+        batches = [batch['time'].tolist() for batch in sub if len(batch)]
+    thread.join()
+    server.close()
+    assert batches == [[1.0, 2.0, 3.0]] * 2
+
+
+def test_stop_drains_queued_frames(tmp_path):
+    address = 'unix:' + str(tmp_path / 'pub.sock')
+    pub = SamplePublisher(address, start_time=0.0, max_queue_bytes=1 << 26)
+    pub.start()
+    sub = SampleSubscriber(address, timeout=1.0)
+    time.sleep(0.1)
+    n = 100000
+    for i in range(n):
+        pub.publish(float(i), 37.0, 37.0, i % 256)
+    time.sleep(0.05)
+    pub.stop(timeout=0)  # the subscriber has not read anything yet
+    received = np.concatenate([batch['time'] for batch in sub if len(batch)])
+    sub.close()
+    assert np.array_equal(received, np.arange(n))
+
+
+def test_wrong_handshake_raises_value_error_and_closes(tmp_path):
+    path = str(tmp_path / 'pub.sock')
+    server = socket.socket(socket.AF_UNIX)
+    server.bind(path)
+    server.listen()
+
+    def serve():
+        conn, _ = server.accept()
+        conn.sendall(encode_frame(KIND_SAMPLES, b'\0' * LOG_DTYPE.itemsize))
+        conn.recv(1)  # until the subscriber closes its end
+        conn.close()
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    with pytest.raises(ValueError):
+        SampleSubscriber('unix:' + path, timeout=2.0)
+    thread.join(2.0)
+    server.close()
+    assert not thread.is_alive()  # recv() returned: the subscriber socket was closed
+
+
+def test_bad_sample_does_not_stop_fan_out(tmp_path):
+    address = 'unix:' + str(tmp_path / 'pub.sock')
+    pub = SamplePublisher(address, start_time=0.0)
+    pub.start()
+    with SampleSubscriber(address, timeout=1.0) as sub:
+        time.sleep(0.1)
+        with pytest.raises(ValueError):
+            pub.publish(0.5, 'n/a', 37.0, 0)
+        pub.publish(1.0, 37.0, 37.0, 300)
+        pub.publish(2.0, 37.0, 37.0, -1)
+        time.sleep(0.1)
+        assert pub.is_alive()
+        pub.stop()
+        received = np.concatenate([batch for batch in sub if len(batch)])
+    assert received['time'].tolist() == [1.0, 2.0]
+    assert received['pwm'].tolist() == [255, 0]
@@ -0,0 +1,34 @@
+import numpy as np
+
+from incubator.binary_log import BinaryLogWriter
+from incubator.rollup import RollupReader, build
+
+
+def _write_log(path, n, dt=0.5, seed=0):
+    rng = np.random.default_rng(seed)
+    temps = 37 + rng.normal(0, 0.01, n)
+    with BinaryLogWriter(str(path), start_time=0.0) as writer:
+        for i in range(n):
+            writer.append(i * dt, float(temps[i]), 37.0, i % 256)
+    return temps
+
+
+def test_close_passes_last_buckets_to_every_tier(tmp_path):
+    path = str(tmp_path / 'run.bin')
+    n = 14421  # 7210.5 s at 2 Hz: every tier has an open bucket at close
+    _write_log(path, n)
+    build(path)
+    reader = RollupReader(path)
+    assert [int(records['count'].sum()) for _, records in reader.tiers] == [n] * len(reader.tiers)
+    assert reader.summary()['count'] == n
+    assert reader.summary(0, 7200)['count'] == 14400
+
+
+def test_summary_matches_samples(tmp_path):
+    path = str(tmp_path / 'run.bin')
+    temps = _write_log(path, 5000)
+    build(path)
+    s = RollupReader(path).summary()
+    assert s['count'] == len(temps)
+    assert np.isclose(s['temperature']['mean'], np.float32(temps).astype(np.float64).mean())
+    assert np.isclose(s['temperature']['std'], np.float32(temps).astype(np.float64).std(), rtol=1e-4)